@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Benchmarks the embedding backends on the KPI catalogue.
+
+For every backend it reports the model load time, the single-query encode
+latency (p50/p95), the bulk encode throughput over KPI titles and the mean
+top-k overlap of its search results with the reference (first) backend.
+
+    uv run benchmark_embeddings.py --backends torch onnx torch-int8 --sample 1000
+
+KPI titles come from the metadata snapshot when present, otherwise the
+catalogue is fetched from Kolada.
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from typing import Any
+
+import httpx
+import numpy as np
+import numpy.typing as npt
+
+from config import EMBEDDING_NORMALIZE
+from services.embeddings import EMBEDDING_BACKENDS, load_sentence_model
+from services.kolada_pages import fetch_kpi_catalogue
+from services.snapshot import load_metadata_snapshot
+from services.vector_index import top_k
+
+DEFAULT_QUERIES: list[str] = [
+    "skola",
+    "arbetslöshet",
+    "befolkning",
+    "äldreomsorg",
+    "kostnad per elev",
+    "sjukfrånvaro",
+    "förskola barngrupper",
+    "bostadsbyggande",
+    "miljö och klimat",
+    "ekonomiskt bistånd",
+    "meritvärde åk 9",
+    "nöjd medborgar-index",
+]
+
+
+def load_titles(sample: int, seed: int = 0) -> list[str]:
+    """KPI titles from the snapshot (or a live fetch), randomly sampled."""
+    snapshot = load_metadata_snapshot()
+    if snapshot is not None:
+        kpis = snapshot["kpi_cache"]
+    else:
+        async def fetch() -> list[Any]:
+            async with httpx.AsyncClient() as client:
+                return await fetch_kpi_catalogue(client)
+
+        kpis = asyncio.run(fetch())
+    titles: list[str] = [kpi.get("title", "") for kpi in kpis if kpi.get("title")]
+    if sample and len(titles) > sample:
+        rng = np.random.default_rng(seed)
+        titles = [titles[i] for i in sorted(rng.choice(len(titles), sample, replace=False))]
+    return titles
+
+
+def topk_overlap(
+    reference_scores: npt.NDArray[np.float32], scores: npt.NDArray[np.float32], k: int
+) -> float:
+    """Mean share of the reference top-k rows found in the top-k, per query column."""
+    overlaps: list[float] = [
+        len(
+            np.intersect1d(top_k(reference_scores[:, q], k), top_k(scores[:, q], k))
+        )
+        / min(k, reference_scores.shape[0])
+        for q in range(reference_scores.shape[1])
+    ]
+    return float(np.mean(overlaps)) if overlaps else 1.0
+
+
+def measure_backend(
+    model: Any, titles: list[str], queries: list[str], repeats: int = 5
+) -> dict[str, Any]:
+    """
+    Times single-query encodes and a bulk encode of `titles`. Returns the
+    timings together with the (n_titles, n_queries) score matrix.
+    """
+    model.encode(["uppvärmning"], normalize_embeddings=EMBEDDING_NORMALIZE)
+    latencies: list[float] = []
+    for _ in range(repeats):
+        for query in queries:
+            start = time.perf_counter()
+            model.encode([query], normalize_embeddings=EMBEDDING_NORMALIZE)
+            latencies.append((time.perf_counter() - start) * 1000.0)
+
+    start = time.perf_counter()
+    corpus = np.asarray(
+        model.encode(titles, normalize_embeddings=EMBEDDING_NORMALIZE), dtype=np.float32
+    )
+    bulk_seconds: float = time.perf_counter() - start
+    query_vectors = np.asarray(
+        model.encode(queries, normalize_embeddings=EMBEDDING_NORMALIZE), dtype=np.float32
+    )
+    return {
+        "latency_p50_ms": float(np.percentile(latencies, 50)),
+        "latency_p95_ms": float(np.percentile(latencies, 95)),
+        "titles_per_second": len(titles) / bulk_seconds if bulk_seconds > 0 else float("inf"),
+        "scores": corpus @ query_vectors.T,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--backends",
+        nargs="+",
+        default=list(EMBEDDING_BACKENDS),
+        choices=EMBEDDING_BACKENDS,
+        help="Backends to compare; the first one is the reference for the overlap.",
+    )
+    parser.add_argument("--sample", type=int, default=1000, help="KPI titles to encode (0 = all).")
+    parser.add_argument("--k", type=int, default=10, help="k for the top-k overlap.")
+    parser.add_argument("--repeats", type=int, default=5, help="Repetitions per query.")
+    args = parser.parse_args()
+
+    titles: list[str] = load_titles(args.sample)
+    print(f"Benchmarking on {len(titles)} KPI titles and {len(DEFAULT_QUERIES)} queries.")
+
+    reference_scores: npt.NDArray[np.float32] | None = None
+    rows: list[tuple[str, ...]] = []
+    for backend in args.backends:
+        start = time.perf_counter()
+        try:
+            model = load_sentence_model(backend)
+        except Exception as ex:
+            print(f"[{backend}] skipped: {ex}", file=sys.stderr)
+            continue
+        load_seconds: float = time.perf_counter() - start
+        result = measure_backend(model, titles, DEFAULT_QUERIES, args.repeats)
+        if reference_scores is None:
+            reference_scores = result["scores"]
+        overlap: float = topk_overlap(reference_scores, result["scores"], args.k)
+        rows.append(
+            (
+                backend,
+                f"{load_seconds:.1f}",
+                f"{result['latency_p50_ms']:.1f}",
+                f"{result['latency_p95_ms']:.1f}",
+                f"{result['titles_per_second']:.0f}",
+                f"{overlap:.3f}",
+            )
+        )
+
+    header = ("backend", "load s", "p50 ms", "p95 ms", "titles/s", f"overlap@{args.k}")
+    widths = [max(len(row[i]) for row in [header, *rows]) for i in range(len(header))]
+    for row in [header, *rows]:
+        print("  ".join(cell.rjust(width) for cell, width in zip(row, widths)))
+
+
+if __name__ == "__main__":
+    main()
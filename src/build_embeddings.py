@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Builds the KPI embeddings cache offline, before deployment.
+
+Produces the same `embeddings_cache/` artifact the server builds on a cold
+start (embeddings and IVF index), so the server only memory-maps it at
+startup. The build is
+checkpointed in shards: rerunning the command after an interruption resumes
+where it stopped.
+
+    uv run build_embeddings.py --workers 8
+
+KPIs come from the metadata snapshot when present, otherwise the catalogue is
+fetched from Kolada.
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+
+import httpx
+
+from config import EMBEDDING_BACKEND, EMBEDDING_BUILD_WORKERS, EMBEDDINGS_CACHE_DIR
+from models.types import KoladaKpi
+from services.embeddings import (
+    EMBEDDING_BACKENDS,
+    load_or_build_ann_index,
+    load_or_create_embeddings,
+    load_sentence_model,
+)
+from services.kolada_pages import fetch_kpi_catalogue
+from services.quantization import QuantizedEmbeddings
+from services.snapshot import load_metadata_snapshot
+
+
+def load_kpis() -> list[KoladaKpi]:
+    """The KPI catalogue from the snapshot (or a live fetch), as the server embeds it."""
+    snapshot = load_metadata_snapshot()
+    if snapshot is not None:
+        kpi_list: list[KoladaKpi] = snapshot["kpi_cache"]
+    else:
+        async def fetch() -> list[KoladaKpi]:
+            async with httpx.AsyncClient() as client:
+                return await fetch_kpi_catalogue(client)
+
+        kpi_list = asyncio.run(fetch())
+    return [k for k in kpi_list if "id" in k]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--backend", default=EMBEDDING_BACKEND, choices=EMBEDDING_BACKENDS)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=EMBEDDING_BUILD_WORKERS,
+        help="Encoding processes (0 = one per CPU core, 1 = in-process).",
+    )
+    parser.add_argument("--cache-dir", default=EMBEDDINGS_CACHE_DIR)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    all_kpis: list[KoladaKpi] = load_kpis()
+    print(f"[Kolada MCP] Building embeddings for {len(all_kpis)} KPIs...", file=sys.stderr)
+    model = load_sentence_model(args.backend)
+    embeddings, _ = load_or_create_embeddings(
+        all_kpis, model, backend=args.backend, cache_dir=args.cache_dir, workers=args.workers
+    )
+    load_or_build_ann_index(
+        all_kpis, QuantizedEmbeddings(embeddings), backend=args.backend, cache_dir=args.cache_dir
+    )
+    print(
+        f"[Kolada MCP] Embeddings cache ready in {args.cache_dir}"
+        f" ({time.perf_counter() - start:.1f}s).",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
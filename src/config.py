@@ -1,4 +1,47 @@
+BASE_URL: str = "https://api.kolada.se/v2"
+KPI_PER_PAGE: int = 5000
+KOLADA_PAGE_CONCURRENCY: int = 4  # Concurrent page requests per paginated Kolada fetch
 SWEA_BASE_URL: str = "https://api.riksbank.se/swea/v1"
 TORA_BASE_URL: str = "https://api.riksbank.se/tora/v1"
 RIKSBANK_TOKEN_URL: str = "https://api.riksbank.se/oauth2/token"
-EMBEDDINGS_CACHE_FILE: str = "interest_rate_embeddings.npz"
+RIKSBANK_TOKEN_RENEW_MARGIN: float = 60.0  # Seconds before expiry the token is renewed in the background
+RIKSBANK_TOKEN_RETRY_DELAY: float = 30.0  # Seconds between background renewal attempts after a failure
+RIKSBANK_CACHE_MAX_BYTES: int = 16 * 1024 * 1024  # Serialized size budget of the response cache
+RIKSBANK_CACHE_MAX_ENTRIES: int = 1024
+RIKSBANK_CACHE_HISTORICAL_TTL: float = 7 * 24 * 3600.0  # Ranges ending before the recent window
+RIKSBANK_CACHE_RECENT_TTL: float = 300.0  # Ranges reaching into the recent window or the future
+RIKSBANK_CACHE_RECENT_DAYS: int = 7
+# Recent-range TTL overrides per endpoint (the bank calendar is published well ahead)
+RIKSBANK_CACHE_ENDPOINT_TTLS: dict[str, float] = {"/calendar/calendardays": 24 * 3600.0}
+HTTP_MAX_CONNECTIONS: int = 20  # Per upstream client
+HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 10
+HTTP_KEEPALIVE_EXPIRY: float = 30.0  # Seconds an idle connection is kept open
+HTTP_HTTP2: bool = True  # Used only when the optional h2 package is installed
+HTTP_PREWARM_TIMEOUT: float = 5.0
+EMBEDDINGS_CACHE_DIR: str = "embeddings_cache"
+EMBEDDING_MODEL_NAME: str = "KBLab/sentence-bert-swedish-cased"
+EMBEDDING_MODEL_REVISION: str = "main"  # Branch, tag or commit; caches are keyed by the resolved commit
+EMBEDDING_NORMALIZE: bool = True
+EMBEDDING_BACKEND: str = "torch"  # "torch", "onnx" or "torch-int8"
+EMBEDDING_SHARD_SIZE: int = 1024  # Texts per checkpointed shard during an embedding build
+EMBEDDING_BUILD_WORKERS: int = 0  # Encoding processes for large builds; 0 = one per CPU core
+EMBEDDING_MULTIPROCESS_MIN_TEXTS: int = 2000  # Smaller builds are encoded in-process
+EMBEDDINGS_READY_TIMEOUT: float = 30.0
+QUERY_CACHE_SIZE: int = 1024
+QUERY_CACHE_PERSIST: bool = True
+QUERY_BATCH_MAX_SIZE: int = 64
+QUERY_BATCH_MAX_WAIT: float = 0.005  # Seconds to gather concurrent queries into one batch
+ANN_MIN_ROWS: int = 20000  # Smaller catalogues are searched exactly
+ANN_N_PROBE: int = 8
+BM25_K1: float = 1.2
+BM25_B: float = 0.75
+HYBRID_CANDIDATES: int = 50  # Candidates taken from each ranking before fusion
+HYBRID_RRF_K: int = 60
+COMPLETE_KPI_MAX_LIMIT: int = 50  # Upper bound on complete_kpi results
+METADATA_SNAPSHOT_FILE: str = "kolada_metadata_snapshot.json"
+METADATA_SNAPSHOT_VERSION: int = 1
+KOLADA_CACHE_ENABLED: bool = True
+KOLADA_CACHE_FILE: str = "kolada_cache.sqlite3"
+KOLADA_CACHE_HISTORICAL_TTL: float = 30 * 24 * 3600.0  # Years older than the recent window
+KOLADA_CACHE_RECENT_TTL: float = 3600.0  # Recent years (still revised) and year-less queries
+KOLADA_CACHE_RECENT_YEARS: int = 2
@@ -1,4 +1,4 @@
-import json
+import asyncio
 import sys
 import traceback
 from contextlib import asynccontextmanager
@@ -6,62 +6,57 @@ from typing import Any, AsyncIterator, cast
 
 import httpx
 from mcp.server.fastmcp import FastMCP
-from sentence_transformers import SentenceTransformer
 
-from config import BASE_URL, KPI_PER_PAGE
-from models.types import KoladaKpi, KoladaLifespanContext, KoladaMunicipality
-from services.api import fetch_data_from_kolada
-from services.data_processing import get_operating_areas_summary
-from services.embeddings import load_or_create_embeddings
+from config import (
+    BASE_URL,
+    KOLADA_CACHE_ENABLED,
+    KPI_PER_PAGE,
+    METADATA_SNAPSHOT_FILE,
+)
+from models.types import (
+    KoladaKpi,
+    KoladaLifespanContext,
+    KoladaMetadataSnapshot,
+    KoladaMunicipality,
+)
+from services.api import (
+    fetch_data_from_kolada,
+    kolada_client,
+    set_kolada_cache,
+    set_kolada_client,
+)
+from services.data_processing import (
+    build_operating_area_index,
+    get_operating_areas_summary,
+)
+from services.embeddings import KpiEmbeddingStore
+from services.kolada_pages import fetch_kpi_catalogue
+from services.lexical_index import Bm25Index
+from services.municipality_index import MunicipalityIndex
+from services.prefix_index import KpiPrefixIndex
+from services.snapshot import (
+    build_metadata_snapshot,
+    compute_content_hash,
+    load_metadata_snapshot,
+    save_metadata_snapshot,
+)
+from src.services.auth import riksbank_auth
+from src.services.http_clients import HttpClients, open_http_clients
+from src.services.kolada_cache import open_kolada_cache
+from src.services.response_cache import riksbank_response_cache
+from src.services.riksbank_api import riksbank_api
 
 
-@asynccontextmanager
-async def app_lifespan(server: FastMCP) -> AsyncIterator[KoladaLifespanContext]:
+async def _fetch_municipalities() -> list[KoladaMunicipality]:
     """
-    Initializes the Kolada MCP Server at startup. Includes stderr logging.
-    Yields the dictionary that becomes ctx.request_context.lifespan_context.
+    Fetches all municipalities and regions from Kolada.
+    Raises RuntimeError if the municipality list cannot be fetched.
     """
-    print("[Kolada MCP Lifespan] Starting lifespan setup...", file=sys.stderr)
-
-    kpi_list: list[KoladaKpi] = []
-    municipality_list: list[KoladaMunicipality] = []
-
-    print(
-        "[Kolada MCP] Initializing: Fetching all KPI metadata from Kolada API...",
-        file=sys.stderr,
-    )
-    async with httpx.AsyncClient() as client:
-        next_url: str | None = f"{BASE_URL}/kpi?per_page={KPI_PER_PAGE}"
-        while next_url:
-            print(f"[Kolada MCP] Fetching page: {next_url}", file=sys.stderr)
-            try:
-                resp = await client.get(next_url, timeout=180.0)
-                resp.raise_for_status()
-                data: dict[str, Any] = resp.json()
-            except (
-                httpx.RequestError,
-                httpx.HTTPStatusError,
-                json.JSONDecodeError,
-            ) as e:
-                print(
-                    f"[Kolada MCP] CRITICAL ERROR fetching Kolada KPIs: {e}",
-                    file=sys.stderr,
-                )
-                print(f"Failed URL: {next_url}", file=sys.stderr)
-                raise RuntimeError(f"Failed to initialize Kolada KPI cache: {e}") from e
-
-            values: list[KoladaKpi] = data.get("values", [])
-            kpi_list.extend(values)
-            next_url = data.get("next_page")
-
-    print(
-        f"[Kolada MCP] Fetched {len(kpi_list)} total KPIs from Kolada.", file=sys.stderr
-    )
-
     print("[Kolada MCP] Fetching municipality data...", file=sys.stderr)
     try:
+        # Metadata has its own snapshot and revalidation, so bypass the response cache
         muni_resp: dict[str, Any] = await fetch_data_from_kolada(
-            f"{BASE_URL}/municipality"
+            f"{BASE_URL}/municipality", cache=False
         )
         if "error" in muni_resp:
             raise RuntimeError(
@@ -79,7 +74,18 @@ async def app_lifespan(server: FastMCP) -> AsyncIterator[KoladaLifespanContext]:
             file=sys.stderr,
         )
         raise RuntimeError(f"Failed to initialize municipality cache: {e}") from e
+    return municipality_list
+
 
+def _build_metadata_context(
+    kpi_list: list[KoladaKpi],
+    municipality_list: list[KoladaMunicipality],
+    operating_areas_summary: list[dict[str, str | int]],
+) -> dict[str, Any]:
+    """
+    Builds the metadata part of the lifespan context (caches and lookup maps)
+    from the raw KPI and municipality lists.
+    """
     kpi_map: dict[str, KoladaKpi] = {}
     for kpi_obj in kpi_list:
         k_id: str | None = kpi_obj.get("id")
@@ -91,39 +97,236 @@ async def app_lifespan(server: FastMCP) -> AsyncIterator[KoladaLifespanContext]:
         if m_id is not None:
             municipality_map[m_id] = m_obj
 
-    operating_areas_summary: list[dict[str, str | int]] = get_operating_areas_summary(
-        kpi_list
-    )
+    return {
+        "kpi_cache": kpi_list,
+        "kpi_map": kpi_map,
+        "operating_areas_summary": operating_areas_summary,
+        "kpi_area_index": build_operating_area_index(kpi_list),
+        "kpi_lexical_index": Bm25Index.build(kpi_list),
+        "kpi_prefix_index": KpiPrefixIndex(kpi_list),
+        "municipality_cache": municipality_list,
+        "municipality_map": municipality_map,
+        "municipality_index": MunicipalityIndex(municipality_list),
+    }
+
+
+def _response_validators(resp: httpx.Response) -> dict[str, str]:
+    """Extracts the HTTP cache validators (ETag/Last-Modified) from a response."""
+    validators: dict[str, str] = {}
+    etag: str | None = resp.headers.get("ETag")
+    if etag:
+        validators["etag"] = etag
+    last_modified: str | None = resp.headers.get("Last-Modified")
+    if last_modified:
+        validators["last_modified"] = last_modified
+    return validators
+
+
+def _snapshot_first_page(kpi_list: list[KoladaKpi]) -> dict[str, Any]:
+    """
+    The first KPI catalogue page as Kolada served it when the snapshot was
+    taken, for reuse when Kolada answers that page with 304 Not Modified.
+    """
+    page: dict[str, Any] = {"count": len(kpi_list), "values": kpi_list[:KPI_PER_PAGE]}
+    if len(kpi_list) > KPI_PER_PAGE:
+        page["next_page"] = f"{BASE_URL}/kpi?page=2&per_page={KPI_PER_PAGE}"
+    return page
+
+
+async def _revalidate_metadata(
+    context_data: KoladaLifespanContext, snapshot: KoladaMetadataSnapshot
+) -> None:
+    """
+    Revalidates a metadata snapshot against Kolada in the background.
+    Sends a conditional request for the first KPI page (ETag/Last-Modified);
+    a 304 answer only saves that page, which is then taken from the snapshot.
+    The later KPI pages and the municipality list are always fetched, and the
+    result is compared with the snapshot by content hash. Changed metadata is
+    swapped into the live context and written back to the snapshot. Failures
+    keep the snapshot.
+    """
+    print("[Kolada MCP] Revalidating metadata snapshot in background...", file=sys.stderr)
+    try:
+        headers: dict[str, str] = {}
+        validators: dict[str, str] = snapshot.get("validators", {})
+        if "etag" in validators:
+            headers["If-None-Match"] = validators["etag"]
+        if "last_modified" in validators:
+            headers["If-Modified-Since"] = validators["last_modified"]
+
+        async with kolada_client() as client:
+            resp = await client.get(
+                f"{BASE_URL}/kpi?per_page={KPI_PER_PAGE}", headers=headers, timeout=180.0
+            )
+            first_page: dict[str, Any]
+            new_validators: dict[str, str]
+            if resp.status_code == 304:
+                print(
+                    "[Kolada MCP] First KPI page not modified; checking the remaining"
+                    " pages and municipalities.",
+                    file=sys.stderr,
+                )
+                first_page = _snapshot_first_page(snapshot["kpi_cache"])
+                new_validators = validators
+            else:
+                resp.raise_for_status()
+                first_page = resp.json()
+                new_validators = _response_validators(resp)
+            kpi_list, municipality_list = await asyncio.gather(
+                fetch_kpi_catalogue(client, first_page=first_page), _fetch_municipalities()
+            )
+
+        if compute_content_hash(kpi_list, municipality_list) == snapshot["content_hash"]:
+            print("[Kolada MCP] Metadata snapshot is up to date (same content).", file=sys.stderr)
+            if new_validators != validators:
+                snapshot["validators"] = new_validators
+                save_metadata_snapshot(snapshot)
+            return
+
+        print(
+            f"[Kolada MCP] Kolada metadata changed; refreshing cache with {len(kpi_list)} KPIs.",
+            file=sys.stderr,
+        )
+        operating_areas_summary: list[dict[str, str | int]] = get_operating_areas_summary(
+            kpi_list
+        )
+        # Rebuild embeddings with the already loaded model before swapping, so
+        # the metadata maps and the embedding rows always stay consistent
+        old_store: KpiEmbeddingStore = context_data["kpi_embedding_store"]
+        await old_store.wait_until_ready(timeout=None)
+        new_store = KpiEmbeddingStore()
+        new_store.query_cache = old_store.query_cache
+        new_store.start([k for k in kpi_list if "id" in k], model=old_store.model)
+        if not await new_store.wait_until_ready(timeout=None):
+            raise RuntimeError(f"embedding rebuild failed: {new_store.error}")
+
+        refreshed: dict[str, Any] = _build_metadata_context(
+            kpi_list, municipality_list, operating_areas_summary
+        )
+        refreshed["kpi_embedding_store"] = new_store
+        context_data.update(refreshed)  # type: ignore[typeddict-item]
+
+        save_metadata_snapshot(
+            build_metadata_snapshot(
+                kpi_list, municipality_list, operating_areas_summary, new_validators
+            )
+        )
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        print(
+            f"[Kolada MCP] WARNING: Metadata revalidation failed, keeping snapshot: {e}",
+            file=sys.stderr,
+        )
+
+
+def _use_http_clients(http_clients: HttpClients | None) -> None:
+    """Injects the pooled clients into the API service singletons (None detaches them)."""
+    set_kolada_client(http_clients["kolada"] if http_clients else None)
+    riksbank_api.set_client(http_clients["riksbank"] if http_clients else None)
+    riksbank_auth.set_client(http_clients["oauth"] if http_clients else None)
+
+
+@asynccontextmanager
+async def app_lifespan(server: FastMCP) -> AsyncIterator[KoladaLifespanContext]:
+    """
+    Owns the pooled HTTP clients (one per upstream) for the server's lifetime:
+    they are created and pre-warmed before any metadata is fetched and closed
+    after everything else has shut down. The Riksbank token is renewed in the
+    background meanwhile, and Kolada data responses go through the persistent
+    response cache.
+    """
+    async with open_http_clients() as http_clients:
+        _use_http_clients(http_clients)
+        riksbank_auth.start_renewal()
+        response_cache = open_kolada_cache() if KOLADA_CACHE_ENABLED else None
+        set_kolada_cache(response_cache)
+        try:
+            async with _kolada_lifespan(server) as context_data:
+                yield context_data
+        finally:
+            await riksbank_auth.stop_renewal()
+            _use_http_clients(None)
+            set_kolada_cache(None)
+            if response_cache is not None:
+                print(
+                    f"[Kolada MCP] Response cache: {response_cache.hits} hits,"
+                    f" {response_cache.misses} misses.",
+                    file=sys.stderr,
+                )
+                response_cache.close()
+            print(
+                f"[Riksbank MCP] Response cache stats: {riksbank_response_cache.stats()}",
+                file=sys.stderr,
+            )
+
+
+@asynccontextmanager
+async def _kolada_lifespan(server: FastMCP) -> AsyncIterator[KoladaLifespanContext]:
+    """
+    Initializes the Kolada MCP Server at startup. Includes stderr logging.
+    Yields the dictionary that becomes ctx.request_context.lifespan_context.
+    """
+    print("[Kolada MCP Lifespan] Starting lifespan setup...", file=sys.stderr)
+
+    snapshot: KoladaMetadataSnapshot | None = load_metadata_snapshot()
+    if snapshot:
+        print(
+            f"[Kolada MCP] Loaded metadata snapshot from {METADATA_SNAPSHOT_FILE}"
+            f" ({len(snapshot['kpi_cache'])} KPIs, {len(snapshot['municipality_cache'])} municipalities).",
+            file=sys.stderr,
+        )
+        kpi_list: list[KoladaKpi] = snapshot["kpi_cache"]
+        municipality_list: list[KoladaMunicipality] = snapshot["municipality_cache"]
+        operating_areas_summary: list[dict[str, str | int]] = snapshot[
+            "operating_areas_summary"
+        ] or get_operating_areas_summary(kpi_list)
+    else:
+        print(
+            "[Kolada MCP] Initializing: Fetching all KPI metadata and municipalities from Kolada API...",
+            file=sys.stderr,
+        )
+        async with kolada_client() as client:
+            kpi_list, municipality_list = await asyncio.gather(
+                fetch_kpi_catalogue(client), _fetch_municipalities()
+            )
+        print(
+            f"[Kolada MCP] Fetched {len(kpi_list)} total KPIs from Kolada.",
+            file=sys.stderr,
+        )
+        operating_areas_summary = get_operating_areas_summary(kpi_list)
+        save_metadata_snapshot(
+            build_metadata_snapshot(kpi_list, municipality_list, operating_areas_summary)
+        )
+
     print(
         f"[Kolada MCP] Identified {len(operating_areas_summary)} unique operating areas.",
         file=sys.stderr,
     )
 
     # ----------------------------------------------------------------
-    # Load or create embeddings for the simpler vector-based approach
+    # Load the model and embeddings in the background; search_kpis awaits them
     # ----------------------------------------------------------------
-    print("[Kolada MCP] Loading SentenceTransformer model...", file=sys.stderr)
-    sentence_model: SentenceTransformer = SentenceTransformer(
-        "KBLab/sentence-bert-swedish-cased"  # type: ignore
-    )
-    print("[Kolada MCP] Model loaded.", file=sys.stderr)
-
     all_kpis: list[KoladaKpi] = [k for k in kpi_list if "id" in k]
-    embeddings, kpi_ids_list = await load_or_create_embeddings(all_kpis, sentence_model)
+    embedding_store = KpiEmbeddingStore()
+    embedding_store.start(all_kpis)
 
     # Create the final context data
     context_data: KoladaLifespanContext = {
-        "kpi_cache": kpi_list,
-        "kpi_map": kpi_map,
-        "operating_areas_summary": operating_areas_summary,
-        "municipality_cache": municipality_list,
-        "municipality_map": municipality_map,
-        "sentence_model": sentence_model,
-        "kpi_embeddings": embeddings,
-        "kpi_ids": kpi_ids_list,
-    }
+        **_build_metadata_context(kpi_list, municipality_list, operating_areas_summary),
+        "kpi_embedding_store": embedding_store,
+    }  # type: ignore[typeddict-item]
+
+    revalidation_task: asyncio.Task[None] | None = None
+    if snapshot:
+        revalidation_task = asyncio.create_task(
+            _revalidate_metadata(context_data, snapshot)
+        )
 
-    print("[Kolada MCP] Initialization complete. All data cached.", file=sys.stderr)
+    print(
+        "[Kolada MCP] Initialization complete. Metadata cached; embeddings loading in background.",
+        file=sys.stderr,
+    )
     print(
         f"[Kolada MCP Lifespan] Yielding context with {len(kpi_list)} KPIs and {len(municipality_list)} municipalities...",
         file=sys.stderr,
@@ -145,4 +348,7 @@ async def app_lifespan(server: FastMCP) -> AsyncIterator[KoladaLifespanContext]:
         print(
             "[Kolada MCP Lifespan] Entering finally block (shutdown).", file=sys.stderr
         )
+        if revalidation_task and not revalidation_task.done():
+            revalidation_task.cancel()
+        await context_data["kpi_embedding_store"].close()
         print("[Kolada MCP] Shutting down.", file=sys.stderr)
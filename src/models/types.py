@@ -1,8 +1,10 @@
-from typing import Required, TypedDict
+from typing import TYPE_CHECKING, Required, TypedDict
 
-import numpy as np
-import numpy.typing as npt
-from sentence_transformers import SentenceTransformer
+if TYPE_CHECKING:
+    from services.embeddings import KpiEmbeddingStore
+    from services.lexical_index import Bm25Index
+    from services.municipality_index import MunicipalityIndex
+    from services.prefix_index import KpiPrefixIndex
 
 
 class KoladaKpi(TypedDict, total=False):
@@ -19,6 +21,12 @@ class KoladaKpi(TypedDict, total=False):
     operating_area: str  # The thematic category/categories (e.g., "Demographics", "Economy,Environment")
 
 
+class KoladaKpiSearchResult(KoladaKpi, total=False):
+    """A KPI returned by semantic search, optionally with its similarity score."""
+
+    score: float  # Cosine similarity between the query and the KPI title
+
+
 class KoladaMunicipality(TypedDict, total=False):
     """
     Represents a single municipality (or region) from Kolada.
@@ -46,6 +54,38 @@ class InterestRateType(TypedDict, total=False):
     date_range: dict[str, str]  # Available date range, e.g., {"from": "2020-01-01", "to": "2023-12-31"}
 
 
+class KoladaKpiQueryResults(TypedDict):
+    """The ranked KPIs found for one keyword of a batch search."""
+
+    keyword: str
+    kpis: list[KoladaKpiSearchResult]
+
+
+class KoladaKpiBatchSearchResult(TypedDict, total=False):
+    """
+    Result of `search_kpis_batch`: one ranked list per keyword and, when
+    requested, a merged ranking without duplicates (best score per KPI).
+    """
+
+    results: Required[list[KoladaKpiQueryResults]]
+    merged: list[KoladaKpiSearchResult]
+
+
+class KoladaMetadataSnapshot(TypedDict):
+    """
+    On-disk snapshot of the Kolada metadata caches, used for warm starts.
+    The snapshot is revalidated against Kolada in the background after startup.
+    """
+
+    version: int  # Snapshot format version (METADATA_SNAPSHOT_VERSION)
+    created_at: float  # Unix timestamp of when the metadata was fetched
+    content_hash: str  # SHA-256 over the KPI and municipality lists
+    validators: dict[str, str]  # HTTP validators ("etag", "last_modified") of the KPI catalogue
+    kpi_cache: list[KoladaKpi]
+    municipality_cache: list[KoladaMunicipality]
+    operating_areas_summary: list[dict[str, str | int]]
+
+
 class KoladaLifespanContext(TypedDict):
     """
     Data cached in the server's memory at startup ('lifespan_context').
@@ -56,15 +96,17 @@ class KoladaLifespanContext(TypedDict):
     kpi_cache: list[KoladaKpi]  # A list of all KPI metadata objects.
     kpi_map: dict[str, KoladaKpi]  # Mapping from KPI ID -> KPI object
     operating_areas_summary: list[dict[str, str | int]]
+    kpi_area_index: dict[str, list[str]]  # Lower-cased operating area -> KPI IDs
+    kpi_lexical_index: "Bm25Index"  # BM25 inverted index over title, description and operating area
+    kpi_prefix_index: "KpiPrefixIndex"  # Sorted id/title arrays for prefix completion
 
     # Municipality data
     municipality_cache: list[KoladaMunicipality]
     municipality_map: dict[str, KoladaMunicipality]
+    municipality_index: "MunicipalityIndex"  # Trigram index for fuzzy name -> ID resolution
 
-    # Vector search additions
-    sentence_model: SentenceTransformer  # The loaded embedding model
-    kpi_embeddings: npt.NDArray[np.float32]  # The embeddings for all KPIs
-    kpi_ids: list[str]  # KPI IDs in the same order as rows in kpi_embeddings
+    # Vector search additions (model and embeddings are loaded in the background)
+    kpi_embedding_store: "KpiEmbeddingStore"
     
     # Riksbank data (optional)
     interest_rate_types_cache: list[InterestRateType]  # Optional cached interest rate types
@@ -26,12 +26,18 @@ def riksbank_entry_point() -> str:
         "    *   **Use When:** The user wants to see all KPIs within a specific municipal category.\n"
         "7.  **`search_kpis(keyword: str, limit: int = 20)`:**\n"
         "    *   **Use When:** The user is looking for KPIs related to a specific municipal topic.\n"
-        "8.  **`get_kpi_metadata(kpi_id: str)`:**\n"
+        "8.  **`search_kpis_batch(keywords: list[str], limit: int = 20, merge: bool = False)`:**\n"
+        "    *   **Use When:** You want to search several phrasings or topics at once instead of calling `search_kpis` repeatedly.\n"
+        "9.  **`get_kpi_metadata(kpi_id: str)`:**\n"
         "    *   **Use When:** You need detailed description of a specific municipal KPI.\n"
-        "9.  **`fetch_kolada_data(kpi_id: str, municipality_id: str, year: str | None = None)`:**\n"
+        "10. **`fetch_kolada_data(kpi_id: str, municipality_id: str, year: str | None = None)`:**\n"
         "    *   **Use When:** The user wants data for a specific KPI in a specific municipality.\n"
-        "10. **`analyze_kpi_across_municipalities(...)`:**\n"
-        "    *   **Use When:** The user wants to compare municipalities for a specific KPI.\n\n"
+        "11. **`analyze_kpi_across_municipalities(...)`:**\n"
+        "    *   **Use When:** The user wants to compare municipalities for a specific KPI.\n"
+        "12. **`resolve_municipality(names: list[str], limit: int = 3)`:**\n"
+        "    *   **Use When:** You need the municipality or region ID for one or more place names.\n"
+        "13. **`complete_kpi(prefix: str, limit: int = 10)`:**\n"
+        "    *   **Use When:** You know how a KPI id or title starts and want the matching KPIs cheaply.\n\n"
         "**General Strategy & Workflow:**\n\n"
         "1. Understand the user's goal and determine if they need Riksbank data (financial/calendar) or municipal data (Kolada).\n"
         "2. For Riksbank calendar data, use the appropriate calendar day functions.\n"
@@ -10,12 +10,14 @@ from tools.data_tools import (
     analyze_kpi_across_municipalities,  # type: ignore[Context]
     fetch_kolada_data,  # type: ignore[Context]
 )
-from tools.municipality_tools import list_municipalities, filter_municipalities_by_kpi  # type: ignore[Context]
+from tools.municipality_tools import list_municipalities, filter_municipalities_by_kpi, resolve_municipality  # type: ignore[Context]
 from tools.metadata_tools import (
+    complete_kpi,  # type: ignore[Context]
     get_kpi_metadata,  # type: ignore[Context]
     get_kpis_by_operating_area,  # type: ignore[Context]
     list_operating_areas,  # type: ignore[Context]
     search_kpis,  # type: ignore[Context]
+    search_kpis_batch,  # type: ignore[Context]
 )
 from tools.riksbank_tools import (
     list_interest_rate_types,  # type: ignore[Context]
@@ -32,10 +34,13 @@ mcp.tool()(list_operating_areas)  # type: ignore[Context]
 mcp.tool()(get_kpis_by_operating_area)  # type: ignore[Context]
 mcp.tool()(get_kpi_metadata)  # type: ignore[Context]
 mcp.tool()(search_kpis)  # type: ignore[Context]
+mcp.tool()(search_kpis_batch)  # type: ignore[Context]
+mcp.tool()(complete_kpi)  # type: ignore[Context]
 mcp.tool()(fetch_kolada_data)  # type: ignore[Context]
 mcp.tool()(analyze_kpi_across_municipalities)  # type: ignore[Context]
 mcp.tool()(compare_kpis)  # type: ignore[Context]
 mcp.tool()(list_municipalities)  # type: ignore[Context]
+mcp.tool()(resolve_municipality)  # type: ignore[Context]
 mcp.tool()(filter_municipalities_by_kpi)  # type: ignore[Context]
 
 # Register Riksbank tools
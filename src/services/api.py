@@ -1,56 +1,100 @@
 import json
 import sys
 import traceback
+from contextlib import AbstractAsyncContextManager
 from typing import Any, Dict, Optional, List
 
 import httpx
+from src.services.http_clients import shared_or_new_client
+from src.services.kolada_cache import KoladaResponseCache, canonical_url
+from src.services.response_cache import (
+    make_cache_key,
+    response_ttl,
+    riksbank_response_cache,
+)
 from src.services.riksbank_api import riksbank_api
+from src.services.single_flight import SingleFlight
+from services.kolada_pages import collect_kolada_pages
 
+# Pooled Kolada client injected by the server lifespan; None outside it
+_kolada_client: httpx.AsyncClient | None = None
 
-async def fetch_data_from_kolada(url: str) -> dict[str, Any]:
+
+def set_kolada_client(client: httpx.AsyncClient | None) -> None:
+    """Uses a shared pooled client for Kolada requests (None restores per-call clients)."""
+    global _kolada_client
+    _kolada_client = client
+
+
+# Concurrent fetches of the same Kolada URL share one upstream walk
+_kolada_in_flight: SingleFlight[dict[str, Any]] = SingleFlight()
+
+# Persistent Kolada response cache opened by the server lifespan; None outside it
+_kolada_cache: KoladaResponseCache | None = None
+
+
+def set_kolada_cache(cache: KoladaResponseCache | None) -> None:
+    """Serves Kolada responses from (and stores them in) `cache` (None disables caching)."""
+    global _kolada_cache
+    _kolada_cache = cache
+
+
+def kolada_client() -> AbstractAsyncContextManager[httpx.AsyncClient]:
+    """The shared Kolada client inside the server, a short-lived one otherwise."""
+    return shared_or_new_client(_kolada_client)
+
+
+async def fetch_data_from_kolada(url: str, cache: bool = True) -> dict[str, Any]:
     """
     Helper function to fetch data from Kolada with consistent error handling.
     Now includes pagination support: if 'next_page' is present, we keep fetching
     subsequent pages and merge 'values' into one combined list.
+    With `cache` (and a response cache opened by the server), complete
+    responses are served from and stored in the persistent response cache.
+    Concurrent calls for the same URL share a single fetch.
     """
-    combined_values: list[dict[str, Any]] = []
-    visited_urls: set[str] = set()
-
-    this_url: str | None = url
-    async with httpx.AsyncClient() as client:
-        while this_url and this_url not in visited_urls:
-            visited_urls.add(this_url)
-            print(f"[Kolada MCP] Fetching page: {this_url}", file=sys.stderr)
-            try:
-                resp = await client.get(this_url, timeout=60.0)
-                resp.raise_for_status()
-                data: dict[str, Any] = resp.json()
-            except (
-                httpx.RequestError,
-                httpx.HTTPStatusError,
-                json.JSONDecodeError,
-            ) as ex:
-                error_msg: str = f"Error accessing Kolada API: {ex}"
-                print(f"[Kolada MCP] {error_msg}", file=sys.stderr)
-                traceback.print_exc(file=sys.stderr)
-                return {"error": error_msg, "details": str(ex), "endpoint": this_url}
-
-            if "error" in data:
-                return data
-
-            page_values: list[dict[str, Any]] = data.get("values", [])
-            combined_values.extend(page_values)
-
-            next_url: str | None = data.get("next_page")
-            if not next_url:
-                this_url = None
-            else:
-                this_url = next_url
-
-    return {
-        "count": len(combined_values),
-        "values": combined_values,
-    }
+    return await _kolada_in_flight.run(
+        (canonical_url(url), cache), lambda: _fetch_kolada_cached(url, cache)
+    )
+
+
+async def _fetch_kolada_cached(url: str, cache: bool) -> dict[str, Any]:
+    """Serves a Kolada URL from the response cache, fetching and storing it on a miss."""
+    response_cache: KoladaResponseCache | None = _kolada_cache if cache else None
+    if response_cache is not None:
+        cached: dict[str, Any] | None = await response_cache.get(url)
+        if cached is not None:
+            return cached
+
+    result: dict[str, Any] = await _fetch_kolada_pages(url)
+    if response_cache is not None and "error" not in result:
+        await response_cache.put(url, result)
+    return result
+
+
+async def _fetch_kolada_page(client: httpx.AsyncClient, url: str) -> dict[str, Any]:
+    """Fetches one Kolada page; failures are returned as an error dictionary."""
+    print(f"[Kolada MCP] Fetching page: {url}", file=sys.stderr)
+    try:
+        resp = await client.get(url, timeout=60.0)
+        resp.raise_for_status()
+        data: dict[str, Any] = resp.json()
+    except (
+        httpx.RequestError,
+        httpx.HTTPStatusError,
+        json.JSONDecodeError,
+    ) as ex:
+        error_msg: str = f"Error accessing Kolada API: {ex}"
+        print(f"[Kolada MCP] {error_msg}", file=sys.stderr)
+        traceback.print_exc(file=sys.stderr)
+        return {"error": error_msg, "details": str(ex), "endpoint": url}
+    return data
+
+
+async def _fetch_kolada_pages(url: str) -> dict[str, Any]:
+    """Fetches a Kolada URL and all its `next_page` pages (uncached)."""
+    async with kolada_client() as client:
+        return await collect_kolada_pages(client, url, _fetch_kolada_page)
 
 
 async def fetch_data_from_riksbank(
@@ -59,11 +103,14 @@ async def fetch_data_from_riksbank(
     method: str = "GET",
     params: Optional[Dict[str, Any]] = None,
     data: Optional[Dict[str, Any]] = None,
-    max_retries: int = 3
+    max_retries: int = 3,
+    cache: bool = False
 ) -> Dict[str, Any]:
     """
     Helper function to fetch data from Riksbanken APIs with consistent error handling.
     Supports both SWEA and TORA APIs, with automatic pagination where available.
+    With `cache`, successful GET responses are kept in the shared response cache
+    for a TTL that depends on the endpoint and how recent the requested dates are.
     
     Args:
         endpoint: API endpoint path without base URL
@@ -72,10 +119,33 @@ async def fetch_data_from_riksbank(
         params: Query parameters for the request
         data: JSON body data for POST requests
         max_retries: Maximum number of retry attempts for transient errors
+        cache: Whether to serve and store the response in the response cache
         
     Returns:
         Dict containing combined response data from all pages or error information
     """
+    cache_key = make_cache_key(api_type, endpoint, params)
+    use_cache = cache and method.upper() == "GET"
+    if use_cache:
+        cached = riksbank_response_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    response = await _fetch_riksbank_pages(endpoint, api_type, method, params, data, max_retries)
+    if use_cache and "error" not in response:
+        riksbank_response_cache.put(cache_key, response, response_ttl(endpoint, params))
+    return response
+
+
+async def _fetch_riksbank_pages(
+    endpoint: str,
+    api_type: str,
+    method: str,
+    params: Optional[Dict[str, Any]],
+    data: Optional[Dict[str, Any]],
+    max_retries: int
+) -> Dict[str, Any]:
+    """Fetches a Riksbank response, following `next_page` links (uncached)."""
     print(f"[Riksbank MCP] Fetching from {api_type.upper()} API: {endpoint}", file=sys.stderr)
     
     # Use the appropriate method based on the requested HTTP method
@@ -121,7 +191,7 @@ async def fetch_data_from_riksbank(
             next_params = params.copy() if params else {}
             next_params.update({"page": next_page})
             
-            next_response = await fetch_data_from_riksbank(
+            next_response = await _fetch_riksbank_pages(
                 endpoint=endpoint,
                 api_type=api_type,
                 method=method,
@@ -1,3 +1,4 @@
+import asyncio
 import os
 import time
 import logging
@@ -5,7 +6,12 @@ from typing import Dict, Optional, Any
 import json
 
 import httpx
-from src.config import RIKSBANK_TOKEN_URL
+from src.config import (
+    RIKSBANK_TOKEN_RENEW_MARGIN,
+    RIKSBANK_TOKEN_RETRY_DELAY,
+    RIKSBANK_TOKEN_URL,
+)
+from src.services.http_clients import shared_or_new_client
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -16,12 +22,20 @@ class RiksbankAuth:
     """
     Handles OAuth2 client credentials flow authentication for Riksbanken APIs.
     Manages token lifecycle including obtaining and refreshing access tokens.
+
+    Concurrent callers that find the token stale share a single refresh, and
+    an optional background task renews the token before it expires so that
+    requests do not wait for the token endpoint.
     """
     def __init__(self):
         self._client_id = os.getenv("RIKSBANK_CLIENT_ID")
         self._client_secret = os.getenv("RIKSBANK_CLIENT_SECRET")
         self._access_token = None
         self._token_expires_at = 0
+        # Pooled client injected by the server lifespan; None outside it
+        self._client: Optional[httpx.AsyncClient] = None
+        self._refresh_task: Optional[asyncio.Task[None]] = None
+        self._renewal_task: Optional[asyncio.Task[None]] = None
         
         # Log a warning if credentials are not set, but don't fail initialization
         if not self._client_id or not self._client_secret:
@@ -30,6 +44,14 @@ class RiksbankAuth:
                 "Authentication will fail when used."
             )
     
+    @property
+    def has_credentials(self) -> bool:
+        return bool(self._client_id and self._client_secret)
+
+    def set_client(self, client: Optional[httpx.AsyncClient]) -> None:
+        """Uses a shared pooled client for token requests (None restores per-request clients)."""
+        self._client = client
+
     async def get_access_token(self) -> str:
         """
         Returns a valid access token, obtaining a new one if necessary.
@@ -51,9 +73,63 @@ class RiksbankAuth:
         # Check if we need a new token
         current_time = time.time()
         if not self._access_token or current_time >= self._token_expires_at:
-            await self._fetch_new_token()
+            await self._refresh_token()
             
         return self._access_token
+
+    async def _refresh_token(self) -> None:
+        """
+        Fetches a new token, or joins the fetch already in flight, so concurrent
+        callers never send more than one token request. A cancelled caller does
+        not cancel the shared fetch for the others.
+        """
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._fetch_new_token())
+            self._refresh_task.add_done_callback(self._refresh_done)
+        await asyncio.shield(self._refresh_task)
+
+    def _refresh_done(self, task: "asyncio.Task[None]") -> None:
+        self._refresh_task = None
+        if not task.cancelled():
+            task.exception()  # Retrieved here too in case every waiter was cancelled
+
+    def start_renewal(self) -> None:
+        """
+        Starts renewing the token in the background, RIKSBANK_TOKEN_RENEW_MARGIN
+        seconds before it expires (the first token is fetched right away).
+        Does nothing without credentials or if renewal is already running.
+        """
+        if not self.has_credentials:
+            logger.debug("No Riksbank API credentials; background token renewal not started")
+            return
+        if self._renewal_task is None or self._renewal_task.done():
+            self._renewal_task = asyncio.create_task(self._renew_token_loop())
+
+    async def stop_renewal(self) -> None:
+        """Stops the background renewal task, if running."""
+        task, self._renewal_task = self._renewal_task, None
+        if task is not None and not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def _renew_token_loop(self) -> None:
+        """Sleeps until the token is due for renewal, renews it and repeats."""
+        while True:
+            delay = self._token_expires_at - RIKSBANK_TOKEN_RENEW_MARGIN - time.time()
+            if self._access_token and delay > 0:
+                await asyncio.sleep(delay)
+                continue  # The token may have been renewed by a request meanwhile
+            try:
+                await self._refresh_token()
+            except Exception as e:
+                logger.warning(
+                    f"Background token renewal failed, retrying in {RIKSBANK_TOKEN_RETRY_DELAY}s: {e}"
+                )
+                await asyncio.sleep(RIKSBANK_TOKEN_RETRY_DELAY)
+                continue
+            if self._token_expires_at - RIKSBANK_TOKEN_RENEW_MARGIN <= time.time():
+                # Token lifetime shorter than the margin; avoid renewing in a tight loop
+                await asyncio.sleep(RIKSBANK_TOKEN_RETRY_DELAY)
     
     async def _fetch_new_token(self) -> None:
         """
@@ -77,7 +153,7 @@ class RiksbankAuth:
         }
         
         try:
-            async with httpx.AsyncClient() as client:
+            async with shared_or_new_client(self._client) as client:
                 response = await client.post(
                     RIKSBANK_TOKEN_URL, 
                     data=data,
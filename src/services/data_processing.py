@@ -1,6 +1,8 @@
 import sys
 from typing import Any
 
+import numpy as np
+import numpy.typing as npt
 import polars as pl
 
 from models.types import KoladaKpi, KoladaMunicipality
@@ -26,6 +28,37 @@ def group_kpis_by_operating_area(
     return grouped
 
 
+def build_operating_area_index(kpis: list[KoladaKpi]) -> dict[str, list[str]]:
+    """
+    Maps each lower-cased operating area to the ids of its KPIs (catalogue
+    order), so area lookups are a dictionary access instead of a catalogue scan.
+    """
+    index: dict[str, dict[str, None]] = {}
+    for area, area_kpis in group_kpis_by_operating_area(kpis).items():
+        ids: dict[str, None] = index.setdefault(area.lower(), {})
+        for kpi in area_kpis:
+            if kpi.get("id"):
+                ids[kpi["id"]] = None
+    return {area: list(ids) for area, ids in index.items()}
+
+
+def build_area_rows(
+    all_kpis: list[KoladaKpi], kpi_rows: dict[str, int]
+) -> dict[str, npt.NDArray[np.int64]]:
+    """
+    Precomputes, per operating area (lower-cased), the sorted rows of its KPIs
+    in an index whose rows are given by `kpi_rows` (KPI id -> row), so an
+    area-filtered search only scores those rows.
+    """
+    grouped: dict[str, set[int]] = {}
+    for area, kpis in group_kpis_by_operating_area(all_kpis).items():
+        rows: set[int] = grouped.setdefault(area.lower(), set())
+        rows.update(
+            kpi_rows[kpi_obj["id"]] for kpi_obj in kpis if kpi_obj.get("id") in kpi_rows
+        )
+    return {area: np.array(sorted(rows), dtype=np.int64) for area, rows in grouped.items()}
+
+
 def get_operating_areas_summary(
     kpis: list[KoladaKpi],
 ) -> list[dict[str, str | int]]:
@@ -1,86 +1,662 @@
+import asyncio
+import hashlib
+import json
 import os
+import re
+import shutil
 import sys
-from typing import Any
+import tempfile
+import time
+from typing import TYPE_CHECKING, Any, Callable
 
 import numpy as np
 import numpy.typing as npt
-from sentence_transformers import SentenceTransformer
 
-from config import EMBEDDINGS_CACHE_FILE
+from config import (
+    ANN_MIN_ROWS,
+    EMBEDDING_BACKEND,
+    EMBEDDING_BUILD_WORKERS,
+    EMBEDDING_MULTIPROCESS_MIN_TEXTS,
+    EMBEDDING_MODEL_NAME,
+    EMBEDDING_MODEL_REVISION,
+    EMBEDDING_NORMALIZE,
+    EMBEDDING_SHARD_SIZE,
+    EMBEDDINGS_CACHE_DIR,
+    QUERY_CACHE_PERSIST,
+    QUERY_CACHE_SIZE,
+)
 from models.types import KoladaKpi
+from services.data_processing import build_area_rows
+from services.quantization import QuantizedEmbeddings
+from services.query_cache import QueryEmbeddingCache, normalize_query
+from services.query_encoder import QueryEncoder
+from services.vector_index import IvfIndex
 
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
 
-async def load_or_create_embeddings(
-    all_kpis: list[KoladaKpi], model: SentenceTransformer
-) -> tuple[npt.NDArray[np.float32], list[str]]:
+MANIFEST_FILE_NAME: str = "manifest.json"
+EMBEDDING_BACKENDS: tuple[str, ...] = ("torch", "onnx", "torch-int8")
+MANIFEST_FORMAT: int = 2
+HASH_BYTES: int = 32
+
+# Text variants that can be embedded for a KPI; each variant gets its own cache namespace
+KPI_TEXT_VARIANTS: dict[str, Callable[[KoladaKpi], str]] = {
+    "title": lambda kpi: kpi.get("title", ""),
+    "title_description": lambda kpi: f"{kpi.get('title', '')}. {kpi.get('description', '')}",
+}
+
+
+def load_sentence_model(
+    backend: str = EMBEDDING_BACKEND,
+    model_name: str = EMBEDDING_MODEL_NAME,
+    revision: str = EMBEDDING_MODEL_REVISION,
+) -> "SentenceTransformer":
     """
-    Loads existing embeddings from cache file or creates new ones if needed.
-    Returns the embeddings array and the list of KPI IDs.
+    Loads the SentenceTransformer model used for KPI search with the given
+    inference backend (see EMBEDDING_BACKENDS). "onnx" needs the optional
+    onnx extra (optimum + onnxruntime); "torch-int8" quantizes the Linear
+    layers of the torch model to int8 with dynamic quantization.
+    sentence_transformers (and torch) are imported here rather than at module
+    level, so tools that never search do not pay for the import.
     """
-    kpi_ids_list: list[str] = []
-    titles_list: list[str] = []
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unsupported embedding backend: {backend}")
+    from sentence_transformers import SentenceTransformer
 
-    for kpi_obj in all_kpis:
-        k_id = kpi_obj["id"]
-        title_str: str = kpi_obj.get("title", "")
-        kpi_ids_list.append(k_id)
-        titles_list.append(title_str)
+    print(
+        f"[Kolada MCP] Loading SentenceTransformer model {model_name}"
+        f" (revision {revision}, backend {backend})...",
+        file=sys.stderr,
+    )
+    model: SentenceTransformer = SentenceTransformer(
+        model_name,
+        revision=revision,
+        backend="onnx" if backend == "onnx" else "torch",  # type: ignore
+    )
+    if backend == "torch-int8":
+        import torch
 
-    # Attempt to load cached .npz
-    existing_embeddings: npt.NDArray[np.float32] | None = None
-    loaded_ids = []
-    if os.path.isfile(EMBEDDINGS_CACHE_FILE):
+        model = torch.ao.quantization.quantize_dynamic(  # type: ignore[assignment]
+            model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+    print("[Kolada MCP] Model loaded.", file=sys.stderr)
+    return model
+
+
+def text_hash(text: str) -> str:
+    """Returns the SHA-256 hex digest of the exact text that is encoded."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def resolve_revision(model_name: str, revision: str) -> str:
+    """
+    Returns the commit hash a branch or tag such as "main" resolved to when
+    the model was downloaded, read from the Hugging Face hub cache. The
+    revision is returned unchanged if it already is a commit hash or is not
+    in the cache (e.g. a local model path, or before the first download).
+    """
+    if re.fullmatch(r"[0-9a-f]{40}", revision):
+        return revision
+    try:
+        from huggingface_hub.constants import HF_HUB_CACHE
+        from huggingface_hub.file_download import repo_folder_name
+
+        ref_path: str = os.path.join(
+            HF_HUB_CACHE, repo_folder_name(repo_id=model_name, repo_type="model"), "refs", revision
+        )
+        with open(ref_path, encoding="utf-8") as f:
+            return f.read().strip() or revision
+    except (ImportError, OSError, ValueError):
+        return revision
+
+
+def cache_namespace(
+    model_name: str,
+    revision: str,
+    normalize: bool,
+    text_variant: str,
+    backend: str = EMBEDDING_BACKEND,
+) -> str:
+    """
+    Returns the cache namespace key for a model configuration and text variant.
+    Vectors from different models, revisions, normalization settings or
+    inference backends (whose outputs differ slightly) never share a
+    namespace, so they cannot be served in place of each other. A branch
+    revision is keyed by the commit it resolved to, so a model update pushed
+    to "main" gets a new namespace.
+    """
+    commit: str = resolve_revision(model_name, revision)
+    key: str = f"{model_name}|{commit}|{int(normalize)}|{text_variant}|{backend}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+
+
+def catalogue_fingerprint(all_kpis: list[KoladaKpi], text_variant: str = "title") -> str:
+    """Hash over the ordered text hashes of a catalogue, identifying its embedding rows."""
+    build_text: Callable[[KoladaKpi], str] = KPI_TEXT_VARIANTS[text_variant]
+    return text_hash("".join(text_hash(build_text(kpi_obj)) for kpi_obj in all_kpis))
+
+
+def _atomic_write(path: str, write: Callable[[Any], None], suffix: str) -> None:
+    """
+    Writes a file atomically: `write` receives a binary file object for a
+    temporary file next to `path`, which is then renamed over `path`.
+    """
+    directory: str = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".embeddings-", suffix=suffix, dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def _remove_file(path: str) -> None:
+    """Deletes a superseded cache file; one still open elsewhere is left for later."""
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+def _load_manifest(cache_dir: str) -> dict[str, Any]:
+    """Loads the embeddings cache manifest, or returns an empty one."""
+    manifest_path: str = os.path.join(cache_dir, MANIFEST_FILE_NAME)
+    empty: dict[str, Any] = {"format": MANIFEST_FORMAT, "namespaces": {}}
+    if not os.path.isfile(manifest_path):
+        return empty
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest: dict[str, Any] = json.load(f)
+    except (OSError, json.JSONDecodeError) as ex:
+        print(f"[Kolada MCP] Failed to load embeddings manifest: {ex}", file=sys.stderr)
+        return empty
+    if manifest.get("format") != MANIFEST_FORMAT:
+        return empty
+    manifest.setdefault("namespaces", {})
+    return manifest
+
+
+def _update_manifest(cache_dir: str, namespace: str, entry: dict[str, Any]) -> None:
+    """Records (or replaces) a namespace entry in the manifest."""
+    manifest: dict[str, Any] = _load_manifest(cache_dir)
+    manifest["namespaces"][namespace] = entry
+    payload: bytes = json.dumps(manifest, indent=2, sort_keys=True).encode("utf-8")
+    _atomic_write(
+        os.path.join(cache_dir, MANIFEST_FILE_NAME), lambda f: f.write(payload), ".json"
+    )
+
+
+def _hashes_to_table(hashes: list[str]) -> npt.NDArray[np.uint8]:
+    """Packs hex SHA-256 digests into a compact (n, 32) uint8 table."""
+    return np.frombuffer(
+        b"".join(bytes.fromhex(h) for h in hashes), dtype=np.uint8
+    ).reshape(len(hashes), HASH_BYTES)
+
+
+def _table_to_hashes(table: npt.NDArray[np.uint8]) -> list[str]:
+    """Unpacks a (n, 32) uint8 digest table into hex strings."""
+    return [row.tobytes().hex() for row in table]
+
+
+def _load_namespace_vectors(
+    cache_dir: str, entry: dict[str, Any]
+) -> tuple[npt.NDArray[np.float32], list[str]] | None:
+    """
+    Opens the vectors of a manifest entry as a read-only memory map (no copy,
+    and pages are shared between server processes through the OS page cache)
+    and loads their text-hash table.
+    """
+    embeddings_path: str = os.path.join(cache_dir, entry["embeddings_file"])
+    hashes_path: str = os.path.join(cache_dir, entry["hashes_file"])
+    try:
+        embeddings: npt.NDArray[np.float32] = np.load(
+            embeddings_path, mmap_mode="r", allow_pickle=False
+        )
+        hash_table: npt.NDArray[np.uint8] = np.load(hashes_path, allow_pickle=False)
+    except Exception as ex:
+        print(
+            f"[Kolada MCP] Failed to load embeddings cache {embeddings_path}: {ex}",
+            file=sys.stderr,
+        )
+        return None
+    if (
+        embeddings.ndim != 2
+        or embeddings.dtype != np.float32
+        or hash_table.shape != (embeddings.shape[0], HASH_BYTES)
+    ):
         print(
-            f"[Kolada MCP] Found embeddings cache at {EMBEDDINGS_CACHE_FILE}",
+            f"[Kolada MCP] WARNING: Invalid embeddings cache {embeddings_path}.",
             file=sys.stderr,
         )
+        return None
+    return embeddings, _table_to_hashes(hash_table)
+
+
+def _load_shards(shard_dir: str, wanted: set[str]) -> dict[str, npt.NDArray[np.float32]]:
+    """
+    Loads the checkpointed shards of an interrupted build, keeping only the
+    vectors of `wanted` text hashes. Unreadable shards are skipped.
+    """
+    vectors: dict[str, npt.NDArray[np.float32]] = {}
+    if not os.path.isdir(shard_dir):
+        return vectors
+    for file_name in sorted(os.listdir(shard_dir)):
+        if not file_name.endswith(".npz"):
+            continue
         try:
-            cache_data: dict[str, Any] = dict(
-                np.load(EMBEDDINGS_CACHE_FILE, allow_pickle=True)
-            )
-            existing_embeddings = cache_data.get("embeddings", None)
-            loaded_ids_arr: npt.NDArray[np.str_] = cache_data.get("kpi_ids", [])
-            loaded_ids = loaded_ids_arr.tolist()
+            with np.load(os.path.join(shard_dir, file_name), allow_pickle=False) as shard:
+                shard_hashes: list[str] = _table_to_hashes(shard["hashes"])
+                shard_vectors: npt.NDArray[np.float32] = np.asarray(
+                    shard["vectors"], dtype=np.float32
+                )
         except Exception as ex:
-            print(f"[Kolada MCP] Failed to load .npz cache: {ex}", file=sys.stderr)
-        if existing_embeddings is None or existing_embeddings.size == 0:
+            print(f"[Kolada MCP] Skipping unreadable shard {file_name}: {ex}", file=sys.stderr)
+            continue
+        for h, vector in zip(shard_hashes, shard_vectors):
+            if h in wanted:
+                vectors[h] = vector
+    return vectors
+
+
+def _encode_with_checkpoints(
+    model: "SentenceTransformer",
+    hashes: list[str],
+    texts: list[str],
+    normalize: bool,
+    shard_dir: str,
+    workers: int,
+) -> dict[str, npt.NDArray[np.float32]]:
+    """
+    Encodes `texts` in shards of EMBEDDING_SHARD_SIZE and checkpoints every
+    finished shard to `shard_dir`, so an interrupted build resumes with the
+    shards that are already done. Large builds are spread over a pool of
+    `workers` processes (SentenceTransformer's multi-process encoding).
+    Returns text hash -> vector.
+    """
+    done: dict[str, npt.NDArray[np.float32]] = _load_shards(shard_dir, set(hashes))
+    if done:
+        print(
+            f"[Kolada MCP] Resuming embedding build: {len(done)} of {len(hashes)}"
+            " texts already encoded in checkpointed shards.",
+            file=sys.stderr,
+        )
+    todo: list[tuple[str, str]] = [(h, t) for h, t in zip(hashes, texts) if h not in done]
+    if not todo:
+        return done
+
+    os.makedirs(shard_dir, exist_ok=True)
+    pool: dict[str, Any] | None = None
+    if workers > 1 and len(todo) >= EMBEDDING_MULTIPROCESS_MIN_TEXTS:
+        print(f"[Kolada MCP] Encoding with {workers} worker processes...", file=sys.stderr)
+        pool = model.start_multi_process_pool(["cpu"] * workers)  # type: ignore[union-attr]
+    try:
+        for start in range(0, len(todo), EMBEDDING_SHARD_SIZE):
+            shard: list[tuple[str, str]] = todo[start : start + EMBEDDING_SHARD_SIZE]
+            shard_hashes: list[str] = [h for h, _ in shard]
+            shard_texts: list[str] = [t for _, t in shard]
+            if pool is not None:
+                vectors: npt.NDArray[np.float32] = model.encode_multi_process(  # type: ignore[union-attr]
+                    shard_texts, pool, normalize_embeddings=normalize
+                )
+            else:
+                vectors = model.encode(  # type: ignore[encode]
+                    shard_texts,
+                    show_progress_bar=len(shard_texts) > 100,
+                    normalize_embeddings=normalize,
+                )
+            vectors = np.asarray(vectors, dtype=np.float32)
+            _atomic_write(
+                os.path.join(shard_dir, f"shard-{text_hash(''.join(shard_hashes))[:16]}.npz"),
+                lambda f: np.savez(f, hashes=_hashes_to_table(shard_hashes), vectors=vectors),
+                ".npz",
+            )
+            done.update(zip(shard_hashes, vectors))
             print(
-                "[Kolada MCP] WARNING: No valid embeddings found in cache.",
+                f"[Kolada MCP] Encoded {min(start + len(shard), len(todo))}/{len(todo)} texts"
+                " (checkpointed).",
                 file=sys.stderr,
             )
-            existing_embeddings = None
+    finally:
+        if pool is not None:
+            model.stop_multi_process_pool(pool)  # type: ignore[union-attr]
+    return done
 
-    # Check if we can reuse the loaded embeddings
-    embeddings: npt.NDArray[np.float32] | None = None
-    if (
-        existing_embeddings is not None
-        and existing_embeddings.size > 0
-        and len(loaded_ids) == len(kpi_ids_list)
-        and set(loaded_ids) == set(kpi_ids_list)
-    ):
-        print("[Kolada MCP] Using existing cached embeddings.", file=sys.stderr)
-        embeddings = existing_embeddings
-    else:
+
+def load_or_create_embeddings(
+    all_kpis: list[KoladaKpi],
+    model: "SentenceTransformer",
+    model_name: str = EMBEDDING_MODEL_NAME,
+    revision: str = EMBEDDING_MODEL_REVISION,
+    normalize: bool = EMBEDDING_NORMALIZE,
+    text_variant: str = "title",
+    backend: str = EMBEDDING_BACKEND,
+    cache_dir: str = EMBEDDINGS_CACHE_DIR,
+    workers: int = EMBEDDING_BUILD_WORKERS,
+) -> tuple[npt.NDArray[np.float32], list[str]]:
+    """
+    Loads KPI embeddings from the content-addressed cache, encoding only texts
+    that are not cached yet. Cached vectors are keyed by (model name, revision,
+    normalization flag, text variant, backend) through the manifest, and by the SHA-256
+    of the exact encoded text within a namespace, so a changed title or model
+    never serves a stale vector. Vectors are stored as raw .npy files; when the
+    cached rows already match the catalogue the read-only memory map is returned
+    as is. Missing texts are encoded in checkpointed shards (resumable after an
+    interruption), over `workers` processes for large builds (0 = one per CPU
+    core). Returns the embeddings array and the list of KPI IDs (rows follow
+    the order of `all_kpis`).
+    This is blocking; call it from a worker thread when running inside the event loop.
+    """
+    build_text: Callable[[KoladaKpi], str] = KPI_TEXT_VARIANTS[text_variant]
+    kpi_ids_list: list[str] = [kpi_obj["id"] for kpi_obj in all_kpis]
+    texts: list[str] = [build_text(kpi_obj) for kpi_obj in all_kpis]
+    hashes: list[str] = [text_hash(text) for text in texts]
+
+    namespace: str = cache_namespace(model_name, revision, normalize, text_variant, backend)
+    entry: dict[str, Any] | None = _load_manifest(cache_dir)["namespaces"].get(namespace)
+
+    cached: tuple[npt.NDArray[np.float32], list[str]] | None = None
+    if entry:
+        print(
+            f"[Kolada MCP] Found embeddings cache namespace {namespace} in {cache_dir}",
+            file=sys.stderr,
+        )
+        cached = _load_namespace_vectors(cache_dir, entry)
+
+    cached_rows: dict[str, int] = {}
+    existing_embeddings: npt.NDArray[np.float32] | None = None
+    if cached is not None:
+        existing_embeddings, cached_hashes = cached
+        cached_rows = {h: row for row, h in enumerate(cached_hashes)}
+        if cached_hashes == hashes:
+            print("[Kolada MCP] Using existing cached embeddings.", file=sys.stderr)
+            return existing_embeddings, kpi_ids_list
+
+    # Encode each missing text once, even if several KPIs share it
+    missing: list[str] = []
+    missing_texts: list[str] = []
+    seen: set[str] = set(cached_rows)
+    for h, text in zip(hashes, texts):
+        if h not in seen:
+            seen.add(h)
+            missing.append(h)
+            missing_texts.append(text)
+
+    encoded_rows: dict[str, npt.NDArray[np.float32]] = {}
+    if missing:
         print(
-            "[Kolada MCP] Generating new embeddings for all KPI titles...",
+            f"[Kolada MCP] Encoding {len(missing)} new or changed KPI texts"
+            f" (reusing {len(hashes) - len(missing)} cached embeddings)...",
             file=sys.stderr,
         )
-        embeddings = model.encode(  # type: ignore[encode]
-            titles_list, show_progress_bar=True, normalize_embeddings=True
+        encoded_rows = _encode_with_checkpoints(
+            model,
+            missing,
+            missing_texts,
+            normalize,
+            os.path.join(cache_dir, f"{namespace}.shards"),
+            workers or os.cpu_count() or 1,
+        )
+
+    rows: list[npt.NDArray[np.float32]] = [
+        encoded_rows[h] if h in encoded_rows else existing_embeddings[cached_rows[h]]  # type: ignore[index]
+        for h in hashes
+    ]
+    embeddings: npt.NDArray[np.float32] = np.asarray(rows, dtype=np.float32)
+    if not rows:
+        embeddings = np.empty((0, 0), dtype=np.float32)
+
+    dropped: int = len(set(cached_rows) - set(hashes))
+    print(
+        f"[Kolada MCP] Embeddings updated: {len(hashes) - len(missing)} reused,"
+        f" {len(missing)} encoded, {dropped} unused cached vectors dropped.",
+        file=sys.stderr,
+    )
+
+    # Save them. Each build writes a new, content-named pair and the manifest is
+    # switched to it last, so a crash or a concurrent reader never pairs the
+    # vectors of one build with the hash table of another.
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        build_id: str = catalogue_fingerprint(all_kpis, text_variant)[:16]
+        embeddings_file: str = f"{namespace}.{build_id}.embeddings.npy"
+        hashes_file: str = f"{namespace}.{build_id}.hashes.npy"
+        hash_table: npt.NDArray[np.uint8] = _hashes_to_table(hashes)
+        _atomic_write(
+            os.path.join(cache_dir, embeddings_file),
+            lambda f: np.save(f, embeddings, allow_pickle=False),
+            ".npy",
+        )
+        _atomic_write(
+            os.path.join(cache_dir, hashes_file),
+            lambda f: np.save(f, hash_table, allow_pickle=False),
+            ".npy",
+        )
+        _update_manifest(
+            cache_dir,
+            namespace,
+            {
+                "model": model_name,
+                "revision": resolve_revision(model_name, revision),
+                "normalize": normalize,
+                "text_variant": text_variant,
+                "backend": backend,
+                "embeddings_file": embeddings_file,
+                "hashes_file": hashes_file,
+                "rows": int(embeddings.shape[0]),
+                "dim": int(embeddings.shape[1]) if embeddings.ndim == 2 else 0,
+                "updated_at": time.time(),
+            },
         )
+        if entry:
+            for key in ("embeddings_file", "hashes_file"):
+                if entry.get(key) not in (None, embeddings_file, hashes_file):
+                    _remove_file(os.path.join(cache_dir, entry[key]))
+        shutil.rmtree(os.path.join(cache_dir, f"{namespace}.shards"), ignore_errors=True)
+        print("[Kolada MCP] Embeddings saved to disk.", file=sys.stderr)
+    except Exception as ex:
+        print(
+            f"[Kolada MCP] WARNING: Failed to save embeddings: {ex}",
+            file=sys.stderr,
+        )
+
+    return embeddings, kpi_ids_list
 
-        # Save them
+
+def load_or_build_ann_index(
+    all_kpis: list[KoladaKpi],
+    embeddings: QuantizedEmbeddings,
+    min_rows: int = ANN_MIN_ROWS,
+    model_name: str = EMBEDDING_MODEL_NAME,
+    revision: str = EMBEDDING_MODEL_REVISION,
+    normalize: bool = EMBEDDING_NORMALIZE,
+    text_variant: str = "title",
+    backend: str = EMBEDDING_BACKEND,
+    cache_dir: str = EMBEDDINGS_CACHE_DIR,
+) -> IvfIndex | None:
+    """
+    Returns the IVF index for the embeddings, loading it from the cache when it
+    was built for the same catalogue rows. Catalogues smaller than `min_rows`
+    get no index (None), so search falls back to the exact scan.
+    """
+    if embeddings.shape[0] < min_rows:
+        return None
+
+    namespace: str = cache_namespace(model_name, revision, normalize, text_variant, backend)
+    fingerprint: str = catalogue_fingerprint(all_kpis, text_variant)
+    entry: dict[str, Any] = _load_manifest(cache_dir)["namespaces"].get(namespace, {})
+    record: dict[str, Any] | None = entry.get("ann")
+    if record and record.get("fingerprint") == fingerprint:
         try:
-            np.savez(
-                EMBEDDINGS_CACHE_FILE,
-                embeddings=embeddings,
-                kpi_ids=np.array(kpi_ids_list),
+            index = IvfIndex(
+                **{
+                    name: np.load(os.path.join(cache_dir, file_name), allow_pickle=False)
+                    for name, file_name in record["files"].items()
+                }
+            )
+            print(
+                f"[Kolada MCP] Loaded IVF index with {index.n_lists} lists from cache.",
+                file=sys.stderr,
             )
-            print("[Kolada MCP] Embeddings saved to disk.", file=sys.stderr)
+            return index
         except Exception as ex:
+            print(f"[Kolada MCP] Failed to load IVF index: {ex}", file=sys.stderr)
+
+    print(
+        f"[Kolada MCP] Building IVF index for {embeddings.shape[0]} embeddings...",
+        file=sys.stderr,
+    )
+    index = IvfIndex.build(embeddings)
+    try:
+        files: dict[str, str] = {}
+        for name, array in index.arrays().items():
+            files[name] = f"{namespace}.ivf.{name}.npy"
+            _atomic_write(
+                os.path.join(cache_dir, files[name]),
+                lambda f, array=array: np.save(f, array, allow_pickle=False),
+                ".npy",
+            )
+        if entry:
+            entry["ann"] = {"fingerprint": fingerprint, "n_lists": index.n_lists, "files": files}
+            _update_manifest(cache_dir, namespace, entry)
+    except Exception as ex:
+        print(f"[Kolada MCP] WARNING: Failed to save IVF index: {ex}", file=sys.stderr)
+    return index
+
+
+class KpiEmbeddingStore:
+    """
+    Lazily resolved SentenceTransformer model and KPI embeddings.
+    Loading happens in a background task (model load, embedding cache, warm-up
+    encode) so the server can start answering non-search tools immediately.
+    Search tools await readiness with `wait_until_ready`.
+    """
+
+    def __init__(self) -> None:
+        self.model: "SentenceTransformer | None" = None
+        self.embeddings: QuantizedEmbeddings | None = None
+        self.kpi_ids: list[str] = []
+        self.kpi_rows: dict[str, int] = {}  # KPI id -> embedding row
+        self.area_rows: dict[str, npt.NDArray[np.int64]] = {}  # lower-cased area -> sorted rows
+        self.ann_index: IvfIndex | None = None
+        self.query_cache: QueryEmbeddingCache = QueryEmbeddingCache(QUERY_CACHE_SIZE)
+        self.encoder: QueryEncoder | None = None
+        self.error: BaseException | None = None
+        self._ready: asyncio.Event = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def is_ready(self) -> bool:
+        """True once loading finished successfully."""
+        return self._ready.is_set() and self.error is None
+
+    @staticmethod
+    def query_cache_path(cache_dir: str = EMBEDDINGS_CACHE_DIR) -> str:
+        """Path of the persisted query cache for the configured model."""
+        namespace: str = cache_namespace(
+            EMBEDDING_MODEL_NAME, EMBEDDING_MODEL_REVISION, EMBEDDING_NORMALIZE, "query"
+        )
+        return os.path.join(cache_dir, f"{namespace}.queries.npz")
+
+    def start(
+        self, all_kpis: list[KoladaKpi], model: "SentenceTransformer | None" = None
+    ) -> None:
+        """
+        Starts loading in the background. An already loaded model can be passed
+        in to only rebuild the embeddings (e.g. after a catalogue refresh).
+        """
+        self._task = asyncio.create_task(self._load(all_kpis, model))
+
+    async def _load(
+        self, all_kpis: list[KoladaKpi], model: "SentenceTransformer | None"
+    ) -> None:
+        try:
+            if model is None:
+                model = await asyncio.to_thread(load_sentence_model)
+            if QUERY_CACHE_PERSIST and not len(self.query_cache):
+                await asyncio.to_thread(self.query_cache.load, self.query_cache_path())
+            matrix, kpi_ids = await asyncio.to_thread(load_or_create_embeddings, all_kpis, model)
+            # Search scans the float32 memory map directly (reduced precisions only
+            # save memory and would make every scan slower)
+            embeddings: QuantizedEmbeddings = QuantizedEmbeddings(matrix)
+            ann_index: IvfIndex | None = await asyncio.to_thread(
+                load_or_build_ann_index, all_kpis, embeddings
+            )
+            # Warm-up encode so the first real query does not pay for lazy initialization
+            await asyncio.to_thread(
+                model.encode, ["uppvärmning"], normalize_embeddings=EMBEDDING_NORMALIZE  # type: ignore[encode]
+            )
+            self.model = model
+            self.encoder = QueryEncoder(model)
+            self.embeddings = embeddings
+            self.kpi_ids = kpi_ids
+            self.kpi_rows = {kpi_id: row for row, kpi_id in enumerate(kpi_ids)}
+            self.area_rows = build_area_rows(all_kpis, self.kpi_rows)
+            self.ann_index = ann_index
             print(
-                f"[Kolada MCP] WARNING: Failed to save embeddings: {ex}",
+                f"[Kolada MCP] Embedding store ready with {len(kpi_ids)} KPI embeddings.",
                 file=sys.stderr,
             )
+        except asyncio.CancelledError:
+            raise
+        except Exception as ex:
+            self.error = ex
+            print(f"[Kolada MCP] ERROR: Failed to load embeddings: {ex}", file=sys.stderr)
+        finally:
+            self._ready.set()
 
-    return embeddings, kpi_ids_list
+    async def wait_until_ready(self, timeout: float | None) -> bool:
+        """
+        Waits for background loading to finish. Returns True if the model and
+        embeddings are available, False on timeout or if loading failed.
+        """
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except TimeoutError:
+            return False
+        return self.is_ready
+
+    async def encode_queries(self, queries: list[str]) -> npt.NDArray[np.float32]:
+        """
+        Returns one embedding row per query. Queries are normalized and looked
+        up in the query cache; the misses are encoded by the micro-batching
+        encoder, off the event loop. Requires the store to be ready.
+        """
+        keys: list[str] = [normalize_query(query) for query in queries]
+        vectors: dict[str, npt.NDArray[np.float32]] = {}
+        missing: list[str] = []
+        for key in keys:
+            if key in vectors or key in missing:
+                continue
+            cached = self.query_cache.get(key)
+            if cached is None:
+                missing.append(key)
+            else:
+                vectors[key] = cached
+        if missing:
+            encoded: npt.NDArray[np.float32] = await self.encoder.encode(missing)  # type: ignore[union-attr]
+            for key, vector in zip(missing, encoded):
+                vectors[key] = vector
+                self.query_cache.put(key, vector)
+        return np.stack([vectors[key] for key in keys])
+
+    async def close(self) -> None:
+        """
+        Cancels a still running background load, stops the query encoder and
+        persists the query cache.
+        """
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self.encoder is not None:
+            await self.encoder.close()
+        if self.is_ready:
+            print(f"[Kolada MCP] Query cache stats: {self.query_cache.stats()}", file=sys.stderr)
+            if QUERY_CACHE_PERSIST:
+                await asyncio.to_thread(self.query_cache.save, self.query_cache_path())
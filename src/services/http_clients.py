@@ -0,0 +1,106 @@
+import asyncio
+import importlib.util
+import logging
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import AsyncIterator, TypedDict
+
+import httpx
+from src.config import (
+    BASE_URL,
+    HTTP_HTTP2,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_PREWARM_TIMEOUT,
+    RIKSBANK_TOKEN_URL,
+    SWEA_BASE_URL,
+)
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class HttpClients(TypedDict):
+    """Long-lived pooled clients, one per upstream."""
+
+    kolada: httpx.AsyncClient
+    riksbank: httpx.AsyncClient  # SWEA and TORA
+    oauth: httpx.AsyncClient
+
+
+# URL used to open the first connection to each upstream
+PREWARM_URLS: dict[str, str] = {
+    "kolada": BASE_URL,
+    "riksbank": SWEA_BASE_URL,
+    "oauth": RIKSBANK_TOKEN_URL,
+}
+
+
+def http2_available() -> bool:
+    """HTTP/2 needs the optional `h2` package (`httpx[http2]`)."""
+    return importlib.util.find_spec("h2") is not None
+
+
+def create_http_client(http2: bool = HTTP_HTTP2) -> httpx.AsyncClient:
+    """
+    A keep-alive client with the configured pool limits. HTTP/2 is only
+    enabled when requested and `h2` is installed.
+    """
+    limits = httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+    return httpx.AsyncClient(limits=limits, http2=http2 and http2_available())
+
+
+async def prewarm_client(client: httpx.AsyncClient, url: str) -> None:
+    """
+    Opens a pooled connection (DNS, TCP and TLS) with a HEAD request so the
+    first real call does not pay for it. Any answer is fine; failures are
+    only logged.
+    """
+    try:
+        await client.head(url, timeout=HTTP_PREWARM_TIMEOUT)
+    except httpx.HTTPError as e:
+        logger.warning(f"Could not pre-warm connection to {url}: {e}")
+
+
+@asynccontextmanager
+async def open_http_clients(prewarm: bool = True) -> AsyncIterator[HttpClients]:
+    """
+    Creates the pooled clients, pre-warms them in the background and closes
+    them (and any unfinished pre-warming) on exit.
+    """
+    async with AsyncExitStack() as stack:
+        clients: HttpClients = {
+            "kolada": await stack.enter_async_context(create_http_client()),
+            "riksbank": await stack.enter_async_context(create_http_client()),
+            "oauth": await stack.enter_async_context(create_http_client()),
+        }
+        prewarm_task: asyncio.Future[list[None]] | None = None
+        if prewarm:
+            prewarm_task = asyncio.gather(
+                *(prewarm_client(clients[name], url) for name, url in PREWARM_URLS.items())  # type: ignore[literal-required]
+            )
+        try:
+            yield clients
+        finally:
+            if prewarm_task is not None and not prewarm_task.done():
+                prewarm_task.cancel()
+                await asyncio.gather(prewarm_task, return_exceptions=True)
+
+
+@asynccontextmanager
+async def shared_or_new_client(
+    shared: httpx.AsyncClient | None,
+) -> AsyncIterator[httpx.AsyncClient]:
+    """
+    Yields the shared pooled client when one was injected, otherwise a
+    short-lived client that is closed on exit (scripts and tests).
+    """
+    if shared is not None:
+        yield shared
+    else:
+        async with httpx.AsyncClient() as client:
+            yield client
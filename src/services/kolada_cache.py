@@ -0,0 +1,152 @@
+import asyncio
+import datetime
+import json
+import re
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from typing import Any
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from src.config import (
+    KOLADA_CACHE_FILE,
+    KOLADA_CACHE_HISTORICAL_TTL,
+    KOLADA_CACHE_RECENT_TTL,
+    KOLADA_CACHE_RECENT_YEARS,
+)
+
+YEARS_IN_PATH: re.Pattern[str] = re.compile(r"/year/([0-9,]+)")
+
+SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS responses (
+    url TEXT PRIMARY KEY,
+    body BLOB NOT NULL,
+    fetched_at REAL NOT NULL,
+    expires_at REAL NOT NULL
+)
+"""
+
+
+def canonical_url(url: str) -> str:
+    """
+    Cache key for a Kolada URL: scheme and host lower-cased, trailing slash
+    and spaces in comma lists removed, query parameters sorted.
+    """
+    parts = urlsplit(url.strip())
+    path: str = re.sub(r"\s*,\s*", ",", parts.path).rstrip("/")
+    query: str = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, query, ""))
+
+
+def response_ttl(url: str, today: datetime.date | None = None) -> float:
+    """
+    Seconds a response may be served from the cache. Data for years older
+    than KOLADA_CACHE_RECENT_YEARS is published and effectively final; recent
+    years are still revised, and URLs without a year cover them too.
+    """
+    match = YEARS_IN_PATH.search(url)
+    if not match:
+        return KOLADA_CACHE_RECENT_TTL
+    years: list[int] = [int(y) for y in match.group(1).split(",") if y]
+    current_year: int = (today or datetime.date.today()).year
+    if years and max(years) < current_year - KOLADA_CACHE_RECENT_YEARS:
+        return KOLADA_CACHE_HISTORICAL_TTL
+    return KOLADA_CACHE_RECENT_TTL
+
+
+class KoladaResponseCache:
+    """
+    Persistent cache of Kolada responses in SQLite, keyed by canonical URL.
+    Bodies are stored as zlib-compressed JSON with their fetch and expiry
+    times. The database runs in WAL mode, so several server processes on one
+    host can share the file. Blocking database work runs in a worker thread.
+    """
+
+    def __init__(self, path: str = KOLADA_CACHE_FILE) -> None:
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(SCHEMA)
+        self._conn.commit()
+
+    def _get(self, key: str) -> dict[str, Any] | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body FROM responses WHERE url = ? AND expires_at > ?",
+                (key, time.time()),
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(zlib.decompress(row[0]))
+
+    def _put(self, key: str, response: dict[str, Any], ttl: float) -> None:
+        body: bytes = zlib.compress(
+            json.dumps(response, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        )
+        now: float = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (url, body, fetched_at, expires_at)"
+                " VALUES (?, ?, ?, ?)",
+                (key, body, now, now + ttl),
+            )
+            self._conn.commit()
+
+    async def get(self, url: str) -> dict[str, Any] | None:
+        """The cached response for the URL, or None if missing or expired."""
+        try:
+            response = await asyncio.to_thread(self._get, canonical_url(url))
+        except (sqlite3.Error, zlib.error, json.JSONDecodeError) as ex:
+            print(f"[Kolada MCP] Response cache read failed: {ex}", file=sys.stderr)
+            response = None
+        if response is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return response
+
+    async def put(self, url: str, response: dict[str, Any], ttl: float | None = None) -> None:
+        """Stores a response with a TTL chosen by the age of its data."""
+        try:
+            await asyncio.to_thread(
+                self._put, canonical_url(url), response, response_ttl(url) if ttl is None else ttl
+            )
+        except sqlite3.Error as ex:
+            print(f"[Kolada MCP] Response cache write failed: {ex}", file=sys.stderr)
+
+    def prune(self) -> int:
+        """Deletes expired responses and returns how many were removed."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM responses WHERE expires_at <= ?", (time.time(),)
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def open_kolada_cache(path: str = KOLADA_CACHE_FILE) -> KoladaResponseCache | None:
+    """
+    Opens the response cache and prunes expired entries. Returns None (no
+    caching) if the database cannot be opened.
+    """
+    try:
+        cache = KoladaResponseCache(path)
+        pruned: int = cache.prune()
+    except sqlite3.Error as ex:
+        print(f"[Kolada MCP] WARNING: Response cache disabled: {ex}", file=sys.stderr)
+        return None
+    print(
+        f"[Kolada MCP] Opened response cache {path} ({pruned} expired entries pruned).",
+        file=sys.stderr,
+    )
+    return cache
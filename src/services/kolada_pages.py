@@ -0,0 +1,167 @@
+import asyncio
+import json
+import math
+import sys
+from typing import Any, Awaitable, Callable
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import httpx
+
+from config import BASE_URL, KOLADA_PAGE_CONCURRENCY, KPI_PER_PAGE
+from models.types import KoladaKpi
+
+# Fetches one Kolada page with the given client
+PageFetcher = Callable[[httpx.AsyncClient, str], Awaitable[dict[str, Any]]]
+
+
+def _remaining_page_urls(first_page: dict[str, Any], next_url: str) -> list[str] | None:
+    """
+    URLs of all pages after the first, inferred from the first page's total
+    `count` and its `next_page` link (`page=2`, page size from `per_page` or
+    the first page's length). None when the scheme cannot be inferred.
+    """
+    parts = urlsplit(next_url)
+    query: list[tuple[str, str]] = parse_qsl(parts.query, keep_blank_values=True)
+    params: dict[str, str] = dict(query)
+    first_count: int = len(first_page.get("values", []))
+    total_count: Any = first_page.get("count")
+    try:
+        next_page_number: int = int(params["page"])
+        per_page: int = int(params.get("per_page", first_count))
+    except (KeyError, ValueError):
+        return None
+    if (
+        next_page_number != 2
+        or per_page <= 0
+        or not isinstance(total_count, int)
+        or total_count <= first_count
+    ):
+        return None
+
+    page_count: int = math.ceil(total_count / per_page)
+    return [
+        urlunsplit(
+            parts._replace(
+                query=urlencode([(k, str(page) if k == "page" else v) for k, v in query])
+            )
+        )
+        for page in range(2, page_count + 1)
+    ]
+
+
+async def collect_kolada_pages(
+    client: httpx.AsyncClient,
+    url: str,
+    fetch_page: PageFetcher,
+    first_page: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """
+    Fetches a Kolada URL and all its `next_page` pages with `client` and merges
+    their values. When the first page reveals the total count and page scheme,
+    the remaining pages are fetched concurrently (bounded by
+    KOLADA_PAGE_CONCURRENCY) and merged in page order; otherwise the links are
+    followed one by one. An error dictionary from `fetch_page` is returned as
+    is (a raising `fetch_page` aborts the walk instead). `first_page` is an
+    already fetched response for `url` that is used instead of fetching it.
+    """
+    combined_values: list[dict[str, Any]] = []
+    visited_urls: set[str] = {url}
+
+    data: dict[str, Any] = (
+        first_page if first_page is not None else await fetch_page(client, url)
+    )
+    if "error" in data:
+        return data
+    combined_values.extend(data.get("values", []))
+    this_url: str | None = data.get("next_page")
+
+    page_urls: list[str] | None = (
+        _remaining_page_urls(data, this_url) if this_url else None
+    )
+    page_urls = [u for u in page_urls or [] if u not in visited_urls]
+    if page_urls:
+        visited_urls.update(page_urls)
+        semaphore = asyncio.Semaphore(KOLADA_PAGE_CONCURRENCY)
+
+        async def fetch_one(page_url: str) -> dict[str, Any]:
+            async with semaphore:
+                return await fetch_page(client, page_url)
+
+        tasks: list[asyncio.Task[dict[str, Any]]] = [
+            asyncio.create_task(fetch_one(page_url)) for page_url in page_urls
+        ]
+        try:
+            pages: list[dict[str, Any]] = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        # gather() preserves task order, so values keep Kolada's page order
+        for page_data in pages:
+            if "error" in page_data:
+                return page_data
+            combined_values.extend(page_data.get("values", []))
+        # Keep walking if the last page still links on (e.g. the data grew)
+        this_url = pages[-1].get("next_page")
+
+    while this_url and this_url not in visited_urls:
+        visited_urls.add(this_url)
+        data = await fetch_page(client, this_url)
+        if "error" in data:
+            return data
+
+        page_values: list[dict[str, Any]] = data.get("values", [])
+        combined_values.extend(page_values)
+
+        next_url: str | None = data.get("next_page")
+        if not next_url:
+            this_url = None
+        else:
+            this_url = next_url
+
+    return {
+        "count": len(combined_values),
+        "values": combined_values,
+    }
+
+
+async def _fetch_kpi_page(client: httpx.AsyncClient, url: str) -> dict[str, Any]:
+    """
+    Fetches a single page of the Kolada KPI catalogue.
+    Raises RuntimeError if the page cannot be fetched or decoded.
+    """
+    print(f"[Kolada MCP] Fetching page: {url}", file=sys.stderr)
+    try:
+        resp = await client.get(url, timeout=180.0)
+        resp.raise_for_status()
+        data: dict[str, Any] = resp.json()
+    except (
+        httpx.RequestError,
+        httpx.HTTPStatusError,
+        json.JSONDecodeError,
+    ) as e:
+        print(
+            f"[Kolada MCP] CRITICAL ERROR fetching Kolada KPIs: {e}",
+            file=sys.stderr,
+        )
+        print(f"Failed URL: {url}", file=sys.stderr)
+        raise RuntimeError(f"Failed to initialize Kolada KPI cache: {e}") from e
+    return data
+
+
+async def fetch_kpi_catalogue(
+    client: httpx.AsyncClient, first_page: dict[str, Any] | None = None
+) -> list[KoladaKpi]:
+    """
+    Fetches the full Kolada KPI catalogue (see `collect_kolada_pages`: pages
+    after the first are fetched concurrently when their count is known).
+    An already fetched `first_page` is reused instead of requesting it again.
+    Raises RuntimeError if any page cannot be fetched or decoded.
+    """
+    catalogue: dict[str, Any] = await collect_kolada_pages(
+        client,
+        f"{BASE_URL}/kpi?per_page={KPI_PER_PAGE}",
+        fetch_page=_fetch_kpi_page,
+        first_page=first_page,
+    )
+    return catalogue["values"]
@@ -0,0 +1,124 @@
+import math
+import re
+import unicodedata
+from collections import Counter, defaultdict
+
+import numpy as np
+import numpy.typing as npt
+
+from config import BM25_B, BM25_K1, HYBRID_RRF_K
+from models.types import KoladaKpi
+from services.data_processing import build_area_rows
+from services.vector_index import top_k
+
+TOKEN_PATTERN: re.Pattern[str] = re.compile(r"\w+")
+INDEXED_FIELDS: tuple[str, ...] = ("title", "description", "operating_area")
+
+
+def tokenize(text: str) -> list[str]:
+    """Splits text into case-folded word tokens (Unicode aware, so å/ä/ö stay intact)."""
+    return TOKEN_PATTERN.findall(unicodedata.normalize("NFC", text).casefold())
+
+
+class Bm25Index:
+    """
+    Inverted index over KPI title, description and operating area, scored with
+    Okapi BM25. The BM25 weight of every (term, KPI) pair is computed once at
+    build time, so scoring a query only sums the postings of its terms.
+    """
+
+    def __init__(
+        self,
+        kpi_ids: list[str],
+        postings: dict[str, tuple[npt.NDArray[np.int32], npt.NDArray[np.float32]]],
+        area_rows: dict[str, npt.NDArray[np.int64]] | None = None,
+    ) -> None:
+        self.kpi_ids = kpi_ids
+        self.postings = postings
+        self.area_rows = area_rows or {}  # lower-cased operating area -> sorted rows
+        self._id_lookup: dict[str, str] = {kpi_id.upper(): kpi_id for kpi_id in kpi_ids}
+
+    def __len__(self) -> int:
+        return len(self.kpi_ids)
+
+    @classmethod
+    def build(
+        cls, kpis: list[KoladaKpi], k1: float = BM25_K1, b: float = BM25_B
+    ) -> "Bm25Index":
+        """Builds the index from the KPI catalogue (KPIs without an id are skipped)."""
+        kpi_ids: list[str] = []
+        term_counts: list[Counter[str]] = []
+        for kpi_obj in kpis:
+            if "id" not in kpi_obj:
+                continue
+            kpi_ids.append(kpi_obj["id"])
+            text: str = " ".join(str(kpi_obj.get(field) or "") for field in INDEXED_FIELDS)
+            term_counts.append(Counter(tokenize(text)))
+
+        n_docs: int = len(kpi_ids)
+        doc_lengths: npt.NDArray[np.float32] = np.array(
+            [sum(counts.values()) for counts in term_counts], dtype=np.float32
+        )
+        avg_length: float = float(doc_lengths.mean()) if n_docs else 0.0
+
+        raw: defaultdict[str, tuple[list[int], list[int]]] = defaultdict(lambda: ([], []))
+        for row, counts in enumerate(term_counts):
+            for term, tf in counts.items():
+                raw[term][0].append(row)
+                raw[term][1].append(tf)
+
+        postings: dict[str, tuple[npt.NDArray[np.int32], npt.NDArray[np.float32]]] = {}
+        for term, (rows, tfs) in raw.items():
+            row_array: npt.NDArray[np.int32] = np.array(rows, dtype=np.int32)
+            tf_array: npt.NDArray[np.float32] = np.array(tfs, dtype=np.float32)
+            idf: float = math.log(1.0 + (n_docs - len(rows) + 0.5) / (len(rows) + 0.5))
+            norm = k1 * (1.0 - b + b * doc_lengths[row_array] / max(avg_length, 1e-9))
+            weights = (idf * tf_array * (k1 + 1.0) / (tf_array + norm)).astype(np.float32)
+            postings[term] = (row_array, weights)
+        kpi_rows: dict[str, int] = {kpi_id: row for row, kpi_id in enumerate(kpi_ids)}
+        return cls(kpi_ids, postings, build_area_rows(kpis, kpi_rows))
+
+    def lookup_id(self, query: str) -> str | None:
+        """Returns the KPI id if the query is exactly an id (case-insensitive)."""
+        return self._id_lookup.get(query.strip().upper())
+
+    def score(self, query: str) -> npt.NDArray[np.float32]:
+        """BM25 score of every KPI for the query (0 for KPIs sharing no term)."""
+        scores: npt.NDArray[np.float32] = np.zeros(len(self.kpi_ids), dtype=np.float32)
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if posting is not None:
+                scores[posting[0]] += posting[1]
+        return scores
+
+    def search(
+        self, query: str, k: int, subset: npt.NDArray[np.int64] | None = None
+    ) -> tuple[npt.NDArray[np.int64], npt.NDArray[np.float32]]:
+        """
+        Rows and scores of the `k` best matching KPIs, best first (matches only),
+        optionally among the `subset` rows only.
+        """
+        scores = self.score(query)
+        rows: npt.NDArray[np.int64] = (
+            np.arange(scores.shape[0], dtype=np.int64) if subset is None else subset
+        )
+        candidate_scores = scores[rows]
+        best = top_k(candidate_scores, k)
+        best = best[candidate_scores[best] > 0]
+        return rows[best], candidate_scores[best]
+
+
+def reciprocal_rank_fusion(
+    rankings: list[list[str]], k: int = HYBRID_RRF_K
+) -> list[tuple[str, float]]:
+    """
+    Fuses ranked id lists with reciprocal rank fusion: each id scores
+    sum(1 / (k + rank)) over the lists it appears in. Rank-based, so BM25 and
+    cosine scores need no calibration against each other. Returns (id, score)
+    pairs, best first.
+    """
+    fused: dict[str, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            fused[item] = fused.get(item, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda pair: pair[1], reverse=True)
@@ -0,0 +1,177 @@
+import re
+import unicodedata
+from collections import Counter
+from typing import TypedDict
+
+from models.types import KoladaMunicipality
+
+# Words that do not identify a municipality or region ("Göteborgs stad", "Region Skåne")
+NAME_AFFIXES: re.Pattern[str] = re.compile(r"regionen\b|\b(kommun|stad|region|landsting)\b")
+REGION_WORDS: re.Pattern[str] = re.compile(r"region|landsting")
+MUNICIPALITY_WORDS: re.Pattern[str] = re.compile(r"\b(kommun|stad)\b")
+MIN_SCORE: float = 0.3
+FOLDED_SCORE: float = 0.95  # Same name only once diacritics are removed ("Habo" vs "Håbo")
+TYPE_MISMATCH_SCORE: float = 0.9  # Same name, but the query names another kind of body
+FUZZY_CANDIDATES: int = 4  # Trigram candidates per requested result that get an edit distance
+# Municipality types ranked first when scores tie ("Stockholm" vs "Region Stockholm")
+TYPE_PRIORITY: dict[str, int] = {"K": 0, "R": 1, "L": 2}
+REGION_TYPE_PRIORITY: dict[str, int] = {"R": 0, "L": 0, "K": 1}
+
+
+class MunicipalityCandidate(TypedDict):
+    """A ranked match for a municipality name."""
+
+    id: str
+    name: str
+    type: str
+    score: float  # 1.0 for an exact match (case, suffixes and genitive s ignored)
+
+
+def _fold(name: str) -> str:
+    """Case-folds a name and removes diacritics (å/ä/ö -> a/a/o)."""
+    decomposed: str = unicodedata.normalize("NFKD", name.casefold())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def normalize_name(name: str, fold_diacritics: bool = True) -> str:
+    """
+    Normalizes a municipality name for matching: case-folded, diacritics
+    removed (unless `fold_diacritics` is False) and "kommun", "stad",
+    "region" etc. dropped.
+    """
+    folded: str = _fold(name) if fold_diacritics else name.casefold()
+    return " ".join(re.findall(r"\w+", NAME_AFFIXES.sub(" ", folded)))
+
+
+def _query_variants(query: str, fold_diacritics: bool = True) -> list[str]:
+    """
+    Normalized forms of a query. When an affix was dropped, the genitive form
+    ("Göteborgs kommun") is also tried without its trailing s.
+    """
+    key: str = normalize_name(query, fold_diacritics)
+    variants: list[str] = [key] if key else []
+    if key.endswith("s") and NAME_AFFIXES.search(_fold(query)):
+        variants.append(key[:-1])
+    return variants
+
+
+def trigrams(key: str) -> set[str]:
+    """Character trigrams of a normalized name, padded so short names still match."""
+    padded: str = f"  {key} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Levenshtein distance between two short strings."""
+    previous: list[int] = list(range(len(b) + 1))
+    for i, ca in enumerate(a, start=1):
+        current: list[int] = [i]
+        for j, cb in enumerate(b, start=1):
+            current.append(
+                min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            )
+        previous = current
+    return previous[-1]
+
+
+class MunicipalityIndex:
+    """
+    Trigram index over municipality and region names for fuzzy name -> id
+    resolution. Candidates sharing trigrams with the query are ranked by the
+    mean of their trigram (Dice) and edit-distance similarities.
+    """
+
+    def __init__(self, municipalities: list[KoladaMunicipality]) -> None:
+        self.entries: list[KoladaMunicipality] = [m for m in municipalities if m.get("id")]
+        self.keys: list[str] = [normalize_name(m.get("title", "")) for m in self.entries]
+        self.grams: list[set[str]] = [trigrams(key) for key in self.keys]
+        self.by_id: dict[str, int] = {m["id"]: i for i, m in enumerate(self.entries)}
+        self.by_key: dict[str, list[int]] = {}
+        self.by_exact_key: dict[str, list[int]] = {}
+        self.postings: dict[str, list[int]] = {}
+        for i, (key, grams) in enumerate(zip(self.keys, self.grams)):
+            self.by_key.setdefault(key, []).append(i)
+            exact_key: str = normalize_name(self.entries[i].get("title", ""), False)
+            self.by_exact_key.setdefault(exact_key, []).append(i)
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(i)
+
+    def _edit_similarity(self, variant: str, entry: int) -> float:
+        key: str = self.keys[entry]
+        return 1 - edit_distance(variant, key) / max(len(variant), len(key), 1)
+
+    def resolve(
+        self, query: str, limit: int = 3, municipality_type: str = ""
+    ) -> list[MunicipalityCandidate]:
+        """
+        Ranked candidates for a name (or an id) scoring at least MIN_SCORE,
+        optionally restricted to one municipality type ("K", "R", "L").
+        Names equal up to case, suffixes and a genitive s score 1.0 and names
+        equal only without diacritics FOLDED_SCORE; if there are any such
+        matches, no fuzzy candidates are added. A municipality never scores
+        1.0 for a query naming a region ("Region Stockholm"), nor a region for
+        a query naming a municipality ("Stockholms stad").
+        """
+        folded_query: str = _fold(query)
+        names_region: bool = bool(REGION_WORDS.search(folded_query))
+        names_municipality: bool = bool(MUNICIPALITY_WORDS.search(folded_query))
+        variants: list[str] = _query_variants(query)
+
+        scores: dict[int, float] = {}
+        for variant in variants:
+            for entry in self.by_key.get(variant, []):
+                scores[entry] = FOLDED_SCORE
+        for variant in _query_variants(query, fold_diacritics=False):
+            for entry in self.by_exact_key.get(variant, []):
+                scores[entry] = 1.0
+        if query.strip() in self.by_id:
+            scores[self.by_id[query.strip()]] = 1.0
+
+        if not scores:
+            for variant in variants:
+                variant_grams: set[str] = trigrams(variant)
+                shared: Counter[int] = Counter(
+                    entry for gram in variant_grams for entry in self.postings.get(gram, [])
+                )
+                # Edit distance only for the best trigram matches
+                for entry, count in shared.most_common(max(limit, 1) * FUZZY_CANDIDATES):
+                    dice: float = 2 * count / (len(variant_grams) + len(self.grams[entry]))
+                    score: float = round((dice + self._edit_similarity(variant, entry)) / 2, 4)
+                    scores[entry] = max(scores.get(entry, 0.0), score)
+
+        for entry, score in scores.items():
+            entry_type: str = self.entries[entry].get("type", "")
+            if (names_region and entry_type == "K") or (
+                names_municipality and entry_type in ("R", "L")
+            ):
+                scores[entry] = min(score, TYPE_MISMATCH_SCORE)
+
+        # "Region X" prefers regions over the municipality X, otherwise municipalities first
+        priority: dict[str, int] = (
+            REGION_TYPE_PRIORITY if names_region else TYPE_PRIORITY
+        )
+        ranked: list[tuple[int, float]] = sorted(
+            (
+                (entry, score)
+                for entry, score in scores.items()
+                if score >= MIN_SCORE
+                and (
+                    not municipality_type
+                    or self.entries[entry].get("type") == municipality_type
+                )
+            ),
+            key=lambda pair: (
+                -pair[1],
+                priority.get(self.entries[pair[0]].get("type", ""), 9),
+                self.entries[pair[0]]["id"],
+            ),
+        )
+        return [
+            {
+                "id": self.entries[entry]["id"],
+                "name": self.entries[entry].get("title", ""),
+                "type": self.entries[entry].get("type", ""),
+                "score": score,
+            }
+            for entry, score in ranked[:limit]
+        ]
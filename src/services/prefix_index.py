@@ -0,0 +1,71 @@
+from bisect import bisect_left
+
+from models.types import KoladaKpi
+from services.lexical_index import tokenize
+
+
+def normalize_title(title: str) -> str:
+    """Case-folded title with punctuation dropped and words separated by single spaces."""
+    return " ".join(tokenize(title))
+
+
+def _prefix_range(keys: list[str], prefix: str) -> range:
+    """Positions of the sorted `keys` that start with `prefix` (found by bisection)."""
+    start: int = bisect_left(keys, prefix)
+    # Every key with the prefix sorts before prefix + the highest code point
+    return range(start, bisect_left(keys, prefix + "\U0010ffff", lo=start))
+
+
+class KpiPrefixIndex:
+    """
+    Sorted arrays of KPI ids, normalized titles and title word suffixes
+    ("kostnad per elev", "per elev", "elev"), so a prefix is answered with two
+    bisections plus a scan bounded by the result limit.
+    """
+
+    def __init__(self, kpis: list[KoladaKpi]) -> None:
+        ids: list[tuple[str, str]] = []
+        titles: list[tuple[str, str]] = []
+        words: list[tuple[str, str]] = []
+        for kpi_obj in kpis:
+            kpi_id: str | None = kpi_obj.get("id")
+            if not kpi_id:
+                continue
+            ids.append((kpi_id.upper(), kpi_id))
+            tokens: list[str] = tokenize(kpi_obj.get("title", ""))
+            if tokens:
+                titles.append((" ".join(tokens), kpi_id))
+            words.extend((" ".join(tokens[i:]), kpi_id) for i in range(1, len(tokens)))
+        ids.sort()
+        titles.sort()
+        words.sort()
+        self.id_keys: list[str] = [key for key, _ in ids]
+        self.id_values: list[str] = [kpi_id for _, kpi_id in ids]
+        self.title_keys: list[str] = [key for key, _ in titles]
+        self.title_ids: list[str] = [kpi_id for _, kpi_id in titles]
+        self.word_keys: list[str] = [key for key, _ in words]
+        self.word_ids: list[str] = [kpi_id for _, kpi_id in words]
+
+    def __len__(self) -> int:
+        return len(self.id_keys)
+
+    def complete(self, prefix: str, limit: int = 10) -> list[str]:
+        """
+        Ids of KPIs whose id, title or a later word of the title starts with
+        `prefix` (case-insensitive), in that order and alphabetically within
+        each group, at most `limit` of them.
+        """
+        found: dict[str, None] = {}
+        groups: list[tuple[list[str], list[str], str]] = [
+            (self.id_keys, self.id_values, prefix.strip().upper()),
+            (self.title_keys, self.title_ids, normalize_title(prefix)),
+            (self.word_keys, self.word_ids, normalize_title(prefix)),
+        ]
+        for keys, values, key_prefix in groups:
+            if not key_prefix:
+                continue
+            for position in _prefix_range(keys, key_prefix):
+                if len(found) >= limit:
+                    return list(found)
+                found.setdefault(values[position])
+        return list(found)[:limit]
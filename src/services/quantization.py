@@ -0,0 +1,149 @@
+import numpy as np
+import numpy.typing as npt
+
+PRECISIONS: tuple[str, ...] = ("float32", "float16", "int8")
+SCORE_CHUNK_ROWS: int = 4096
+
+
+class QuantizedEmbeddings:
+    """
+    Embedding matrix held in float32, float16 or int8 (with a per-row scale).
+    Scoring upcasts the matrix in chunks of SCORE_CHUNK_ROWS rows, so the
+    temporary float32 copy stays small while the stored matrix is 2-4x smaller.
+    Only float32 is scored directly by BLAS; float16/int8 are a storage format
+    that saves memory at the cost of several times slower scans, which is why
+    KPI search always uses float32.
+    """
+
+    def __init__(
+        self,
+        data: npt.NDArray[np.float32 | np.float16 | np.int8],
+        precision: str = "float32",
+        scales: npt.NDArray[np.float32] | None = None,
+    ) -> None:
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unsupported embedding precision: {precision}")
+        if precision == "int8" and scales is None:
+            raise ValueError("int8 embeddings require per-row scales")
+        self.data = data
+        self.precision = precision
+        self.scales = scales
+
+    @property
+    def shape(self) -> tuple[int, ...]:
+        return self.data.shape
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the matrix and its scales."""
+        return self.data.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def __len__(self) -> int:
+        return self.data.shape[0]
+
+    def dequantize(
+        self, rows: npt.NDArray[np.intp] | slice | None = None
+    ) -> npt.NDArray[np.float32]:
+        """Returns (a subset of) the matrix as float32."""
+        selector = slice(None) if rows is None else rows
+        block: npt.NDArray[np.float32] = np.asarray(self.data[selector], dtype=np.float32)
+        if self.scales is not None:
+            block *= self.scales[selector, None]
+        return block
+
+    def score(self, query: npt.NDArray[np.float32]) -> npt.NDArray[np.float32]:
+        """
+        Dot products of every row with `query` (a vector) or with every column
+        of `query` (a (dim, n_queries) matrix).
+        """
+        query = np.asarray(query, dtype=np.float32)
+        n_rows: int = self.data.shape[0]
+        if self.precision == "float32":
+            return np.asarray(self.data @ query, dtype=np.float32)
+
+        out: npt.NDArray[np.float32] = np.empty(
+            (n_rows,) + query.shape[1:], dtype=np.float32
+        )
+        for start in range(0, n_rows, SCORE_CHUNK_ROWS):
+            chunk = slice(start, min(start + SCORE_CHUNK_ROWS, n_rows))
+            out[chunk] = self.dequantize(chunk) @ query
+        return out
+
+    def score_rows(
+        self, query: npt.NDArray[np.float32], rows: npt.NDArray[np.intp]
+    ) -> npt.NDArray[np.float32]:
+        """Dot products of the given rows only with `query` (a vector or a (dim, n_queries) matrix)."""
+        return self.dequantize(rows) @ np.asarray(query, dtype=np.float32)
+
+
+def quantize_embeddings(
+    embeddings: npt.NDArray[np.float32], precision: str
+) -> QuantizedEmbeddings:
+    """Quantizes a float32 matrix to the requested precision."""
+    if precision == "float32":
+        return QuantizedEmbeddings(np.asarray(embeddings, dtype=np.float32))
+    if precision == "float16":
+        return QuantizedEmbeddings(embeddings.astype(np.float16), "float16")
+    if precision == "int8":
+        max_abs: npt.NDArray[np.float32] = np.abs(embeddings).max(axis=1)
+        scales: npt.NDArray[np.float32] = np.where(max_abs > 0, max_abs / 127.0, 1.0).astype(
+            np.float32
+        )
+        data = np.clip(np.rint(embeddings / scales[:, None]), -127, 127).astype(np.int8)
+        return QuantizedEmbeddings(data, "int8", scales)
+    raise ValueError(f"Unsupported embedding precision: {precision}")
+
+
+def measure_recall(
+    reference: npt.NDArray[np.float32],
+    candidate: QuantizedEmbeddings,
+    queries: npt.NDArray[np.float32],
+    k: int = 10,
+) -> float:
+    """
+    Mean recall@k of `candidate` against exact float32 scoring of `reference`
+    for the given (n_queries, dim) query matrix.
+    """
+    k = min(k, reference.shape[0])
+    if k == 0 or queries.shape[0] == 0:
+        return 1.0
+    exact: npt.NDArray[np.float32] = np.asarray(reference, dtype=np.float32) @ queries.T
+    approx: npt.NDArray[np.float32] = candidate.score(queries.T)
+    exact_top = np.argpartition(-exact, k - 1, axis=0)[:k]
+    approx_top = np.argpartition(-approx, k - 1, axis=0)[:k]
+    hits: int = sum(
+        len(np.intersect1d(exact_top[:, q], approx_top[:, q]))
+        for q in range(queries.shape[0])
+    )
+    return hits / (k * queries.shape[0])
+
+
+def choose_quantization(
+    embeddings: npt.NDArray[np.float32],
+    precision: str,
+    tolerance: float,
+    k: int = 10,
+    sample_size: int = 256,
+    seed: int = 0,
+) -> tuple[QuantizedEmbeddings, float]:
+    """
+    Quantizes to `precision`, falling back to the next wider precision while the
+    measured recall@k stays below `tolerance`. Sampled matrix rows (with a little
+    noise) act as queries. Returns the chosen matrix and its measured recall.
+    """
+    order: list[str] = list(PRECISIONS[: PRECISIONS.index(precision) + 1])
+    rng = np.random.default_rng(seed)
+    n_rows: int = embeddings.shape[0]
+    sample = rng.choice(n_rows, size=min(sample_size, n_rows), replace=False)
+    queries: npt.NDArray[np.float32] = np.asarray(embeddings[sample], dtype=np.float32)
+    queries = queries + rng.normal(0, 0.05, queries.shape).astype(np.float32)
+    queries /= np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+
+    for candidate_precision in reversed(order):
+        candidate: QuantizedEmbeddings = quantize_embeddings(embeddings, candidate_precision)
+        if candidate_precision == "float32":
+            return candidate, 1.0
+        recall: float = measure_recall(embeddings, candidate, queries, k)
+        if recall >= tolerance:
+            return candidate, recall
+    return quantize_embeddings(embeddings, "float32"), 1.0
@@ -0,0 +1,108 @@
+import os
+import sys
+import tempfile
+import unicodedata
+from collections import OrderedDict
+
+import numpy as np
+import numpy.typing as npt
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalizes a search query for caching: Unicode NFC, trimmed, with inner
+    whitespace collapsed. Case is kept, since the embedding model is cased.
+    """
+    return " ".join(unicodedata.normalize("NFC", query).split())
+
+
+class QueryEmbeddingCache:
+    """
+    Bounded LRU of normalized query -> embedding vector, with hit/miss counters.
+    Optionally persisted as an .npz file (no pickling) so repeated searches
+    skip the transformer across restarts. Not thread-safe; use it from the
+    event loop.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self.hits: int = 0
+        self.misses: int = 0
+        self._entries: OrderedDict[str, npt.NDArray[np.float32]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, query: str) -> npt.NDArray[np.float32] | None:
+        """Returns the cached vector for a normalized query, counting hits and misses."""
+        vector = self._entries.get(query)
+        if vector is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(query)
+        self.hits += 1
+        return vector
+
+    def put(self, query: str, vector: npt.NDArray[np.float32]) -> None:
+        """Stores a vector, evicting the least recently used entries beyond the bound."""
+        if self.max_entries <= 0:
+            return
+        self._entries[query] = np.asarray(vector, dtype=np.float32)
+        self._entries.move_to_end(query)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict[str, int | float]:
+        """Entry count, hits, misses and hit rate."""
+        lookups: int = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def load(self, path: str) -> None:
+        """
+        Loads persisted entries (least to most recently used). A missing or
+        unreadable file leaves the cache empty.
+        """
+        if not os.path.isfile(path):
+            return
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                queries: list[str] = [str(q) for q in data["queries"]]
+                vectors: npt.NDArray[np.float32] = np.asarray(
+                    data["vectors"], dtype=np.float32
+                )
+        except Exception as ex:
+            print(f"[Kolada MCP] Failed to load query cache {path}: {ex}", file=sys.stderr)
+            return
+        for query, vector in zip(queries, vectors):
+            self.put(query, vector)
+        print(
+            f"[Kolada MCP] Loaded {len(self._entries)} cached query embeddings.",
+            file=sys.stderr,
+        )
+
+    def save(self, path: str) -> None:
+        """Writes the entries to `path` atomically; failures are only logged."""
+        if not self._entries:
+            return
+        queries: npt.NDArray[np.str_] = np.array(list(self._entries), dtype=np.str_)
+        vectors: npt.NDArray[np.float32] = np.stack(list(self._entries.values()))
+        directory: str = os.path.dirname(os.path.abspath(path))
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix=".queries-", suffix=".npz", dir=directory)
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    np.savez(f, queries=queries, vectors=vectors)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError as ex:
+            print(
+                f"[Kolada MCP] WARNING: Failed to save query cache: {ex}", file=sys.stderr
+            )
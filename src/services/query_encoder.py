@@ -0,0 +1,113 @@
+import asyncio
+import sys
+from typing import TYPE_CHECKING
+
+import numpy as np
+import numpy.typing as npt
+
+from config import EMBEDDING_NORMALIZE, QUERY_BATCH_MAX_SIZE, QUERY_BATCH_MAX_WAIT
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+
+class QueryEncoder:
+    """
+    Encodes search queries in a worker thread, micro-batching concurrent calls.
+    Requests arriving within `max_wait` seconds of the first one (and while a
+    batch is being encoded) are merged into a single `model.encode` call of at
+    most `max_batch_size` texts, and each caller's future gets its own rows.
+    The event loop is never blocked by inference.
+    """
+
+    def __init__(
+        self,
+        model: "SentenceTransformer",
+        normalize: bool = EMBEDDING_NORMALIZE,
+        max_batch_size: int = QUERY_BATCH_MAX_SIZE,
+        max_wait: float = QUERY_BATCH_MAX_WAIT,
+    ) -> None:
+        self.model = model
+        self.normalize = normalize
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.batches: int = 0
+        self.texts_encoded: int = 0
+        self._pending: list[tuple[list[str], asyncio.Future[npt.NDArray[np.float32]]]] = []
+        self._flusher: asyncio.Task[None] | None = None
+
+    async def encode(self, texts: list[str]) -> npt.NDArray[np.float32]:
+        """Returns the (len(texts), dim) embeddings of `texts`."""
+        future: asyncio.Future[npt.NDArray[np.float32]] = (
+            asyncio.get_running_loop().create_future()
+        )
+        self._pending.append((list(texts), future))
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush())
+        return await future
+
+    def _next_batch(
+        self,
+    ) -> list[tuple[list[str], asyncio.Future[npt.NDArray[np.float32]]]]:
+        """Takes pending requests (whole requests only) up to `max_batch_size` texts."""
+        batch: list[tuple[list[str], asyncio.Future[npt.NDArray[np.float32]]]] = []
+        size: int = 0
+        while self._pending:
+            texts, future = self._pending[0]
+            if batch and size + len(texts) > self.max_batch_size:
+                break
+            self._pending.pop(0)
+            if future.done():  # Caller went away
+                continue
+            batch.append((texts, future))
+            size += len(texts)
+        return batch
+
+    async def _flush(self) -> None:
+        """Drains the pending requests batch by batch, then exits."""
+        await asyncio.sleep(self.max_wait)
+        while self._pending:
+            batch = self._next_batch()
+            texts: list[str] = [text for request_texts, _ in batch for text in request_texts]
+            if not texts:
+                for _, future in batch:
+                    future.set_result(np.empty((0, 0), dtype=np.float32))
+                continue
+            try:
+                vectors: npt.NDArray[np.float32] = await asyncio.to_thread(
+                    self.model.encode,  # type: ignore[encode]
+                    texts,
+                    batch_size=len(texts),
+                    normalize_embeddings=self.normalize,
+                )
+            except asyncio.CancelledError:
+                for _, future in batch:
+                    future.cancel()
+                raise
+            except Exception as ex:
+                print(f"[Kolada MCP] ERROR: Query encoding failed: {ex}", file=sys.stderr)
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(ex)
+                continue
+
+            self.batches += 1
+            self.texts_encoded += len(texts)
+            offset: int = 0
+            for request_texts, future in batch:
+                rows = np.asarray(vectors[offset : offset + len(request_texts)], dtype=np.float32)
+                offset += len(request_texts)
+                if not future.done():
+                    future.set_result(rows)
+
+    async def close(self) -> None:
+        """Stops the flusher and cancels requests that were not encoded yet."""
+        if self._flusher and not self._flusher.done():
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+        for _, future in self._pending:
+            future.cancel()
+        self._pending.clear()
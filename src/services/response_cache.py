@@ -0,0 +1,138 @@
+import json
+import logging
+import time
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from src.config import (
+    RIKSBANK_CACHE_ENDPOINT_TTLS,
+    RIKSBANK_CACHE_HISTORICAL_TTL,
+    RIKSBANK_CACHE_MAX_BYTES,
+    RIKSBANK_CACHE_MAX_ENTRIES,
+    RIKSBANK_CACHE_RECENT_DAYS,
+    RIKSBANK_CACHE_RECENT_TTL,
+)
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, str, str]
+
+
+def make_cache_key(
+    api_type: str, endpoint: str, params: Optional[Dict[str, Any]] = None
+) -> CacheKey:
+    """
+    Cache key for a request: (api type, endpoint, params), with the endpoint
+    given a leading slash and the params serialized with sorted keys so that
+    equivalent requests share an entry.
+    """
+    normalized_endpoint = f"/{endpoint.lstrip('/')}"
+    normalized_params = json.dumps(params or {}, sort_keys=True, default=str)
+    return (api_type.lower(), normalized_endpoint, normalized_params)
+
+
+def response_ttl(
+    endpoint: str, params: Optional[Dict[str, Any]] = None, today: Optional[date] = None
+) -> float:
+    """
+    Seconds a response may be cached. Ranges that end more than
+    RIKSBANK_CACHE_RECENT_DAYS before today are historical and effectively
+    immutable; ranges that reach recent or future dates (or are open-ended)
+    get the endpoint's short TTL.
+    """
+    params = params or {}
+    today = today or date.today()
+    last_date = params.get("toDate") or None
+    if last_date is None and "fromDate" in params:
+        last_date = today.isoformat()  # Open-ended ranges run up to today
+    try:
+        end = date.fromisoformat(str(last_date)) if last_date else None
+    except ValueError:
+        end = None
+    if end is not None and end < today - timedelta(days=RIKSBANK_CACHE_RECENT_DAYS):
+        return RIKSBANK_CACHE_HISTORICAL_TTL
+    return RIKSBANK_CACHE_ENDPOINT_TTLS.get(f"/{endpoint.lstrip('/')}", RIKSBANK_CACHE_RECENT_TTL)
+
+
+class ResponseCache:
+    """
+    Bounded LRU cache of API responses with a TTL per entry. Responses are
+    stored as serialized JSON, which gives their exact size for the byte
+    budget and hands every caller its own copy.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = RIKSBANK_CACHE_MAX_BYTES,
+        max_entries: int = RIKSBANK_CACHE_MAX_ENTRIES,
+    ):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[CacheKey, Tuple[float, bytes]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: CacheKey) -> Optional[Dict[str, Any]]:
+        """Returns a copy of the cached response, or None if absent or expired."""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] <= time.monotonic():
+            self._remove(key)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return json.loads(entry[1])
+
+    def put(self, key: CacheKey, response: Dict[str, Any], ttl: float) -> None:
+        """
+        Stores a response for `ttl` seconds, evicting the least recently used
+        entries until it fits. Responses larger than the whole budget are not
+        cached.
+        """
+        if ttl <= 0:
+            return
+        payload = json.dumps(response, default=str).encode("utf-8")
+        if len(payload) > self.max_bytes:
+            logger.debug(f"Response for {key[1]} too large to cache ({len(payload)} bytes)")
+            return
+        if key in self._entries:
+            self._remove(key)
+        while self._entries and (
+            self.size_bytes + len(payload) > self.max_bytes
+            or len(self._entries) >= self.max_entries
+        ):
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+        self._entries[key] = (time.monotonic() + ttl, payload)
+        self.size_bytes += len(payload)
+
+    def _remove(self, key: CacheKey) -> None:
+        _, payload = self._entries.pop(key)
+        self.size_bytes -= len(payload)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.size_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Entry count, size and hit/miss/eviction counters."""
+        return {
+            "entries": len(self._entries),
+            "size_bytes": self.size_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+# Create a singleton instance
+riksbank_response_cache = ResponseCache()
@@ -8,6 +8,8 @@ from typing import Any, Dict, Optional, Union, Callable
 import httpx
 from src.config import SWEA_BASE_URL, TORA_BASE_URL
 from src.services.auth import riksbank_auth
+from src.services.http_clients import shared_or_new_client
+from src.services.single_flight import SingleFlight, request_key
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -16,7 +18,17 @@ class RiksbankApiClient:
     """
     Client for interacting with Riksbanken's APIs (SWEA and TORA).
     Handles authentication and API requests with error handling.
+    Concurrent identical GET requests share one upstream request.
     """
+
+    def __init__(self):
+        # Pooled client injected by the server lifespan; None outside it
+        self._client: Optional[httpx.AsyncClient] = None
+        self._in_flight: SingleFlight[Dict[str, Any]] = SingleFlight()
+
+    def set_client(self, client: Optional[httpx.AsyncClient]) -> None:
+        """Uses a shared pooled client for all requests (None restores per-request clients)."""
+        self._client = client
     
     async def request(
         self, 
@@ -29,6 +41,45 @@ class RiksbankApiClient:
         max_retries: int = 3,
         retry_delay: float = 1.0,
         retry_on_status_codes: Optional[list[int]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Make an authenticated request to Riksbanken API. GET requests identical
+        to one already in flight (same API, endpoint, params and headers) wait
+        for its response instead of sending their own.
+        
+        Args and return value as for `_request`.
+        """
+        def send() -> Any:
+            return self._request(
+                method,
+                endpoint,
+                api_type,
+                params=params,
+                data=data,
+                headers=headers,
+                max_retries=max_retries,
+                retry_delay=retry_delay,
+                retry_on_status_codes=retry_on_status_codes,
+            )
+
+        if method.upper() != "GET":
+            return await send()
+        key = request_key(
+            api_type.lower(), f"/{endpoint.lstrip('/')}", params or {}, headers or {}
+        )
+        return await self._in_flight.run(key, send)
+
+    async def _request(
+        self, 
+        method: str, 
+        endpoint: str, 
+        api_type: str = "swea", 
+        params: Optional[Dict[str, Any]] = None,
+        data: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, Any]] = None,
+        max_retries: int = 3,
+        retry_delay: float = 1.0,
+        retry_on_status_codes: Optional[list[int]] = None,
     ) -> Dict[str, Any]:
         """
         Make an authenticated request to Riksbanken API.
@@ -86,7 +137,7 @@ class RiksbankApiClient:
                     
                 logger.debug(f"Making {method} request to {url}")
                 
-                async with httpx.AsyncClient() as client:
+                async with shared_or_new_client(self._client) as client:
                     response = await client.request(
                         method=method,
                         url=url,
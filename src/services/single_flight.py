@@ -0,0 +1,73 @@
+import asyncio
+import copy
+import json
+from typing import Any, Awaitable, Callable, Dict, Generic, Hashable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class _Call(Generic[T]):
+    """An in-flight call and the number of callers waiting for it."""
+
+    def __init__(self, task: "asyncio.Task[T]"):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight(Generic[T]):
+    """
+    Coalesces concurrent identical calls: callers passing the same key while a
+    call is in flight share its task and result instead of starting their own.
+
+    * Errors raised by the shared call reach every waiting caller.
+    * A cancelled caller only stops waiting; the call keeps running for the
+      others and is cancelled once no caller waits for it anymore.
+    * Nothing is kept after the call finishes, so later callers start afresh.
+
+    The caller that started the call gets its result as is; the others get
+    a copy (deep by default), so no caller can change another's result.
+    """
+
+    def __init__(self, copy_result: Callable[[T], T] = copy.deepcopy):
+        self._calls: Dict[Hashable, _Call[T]] = {}
+        self._copy_result = copy_result
+        self.coalesced = 0  # Callers served by a call another caller started
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def run(self, key: Hashable, factory: Callable[[], Awaitable[T]]) -> T:
+        """Awaits the in-flight call for `key`, starting it with `factory()` if there is none."""
+        call: Optional[_Call[T]] = self._calls.get(key)
+        leader = call is None
+        if call is None:
+            call = _Call(asyncio.ensure_future(factory()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda task: self._finished(key, call, task))
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+        try:
+            result = await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Every caller was cancelled; new callers must not join the dying call
+                self._forget(key, call)
+                call.task.cancel()
+        return result if leader else self._copy_result(result)
+
+    def _forget(self, key: Hashable, call: _Call[T]) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def _finished(self, key: Hashable, call: _Call[T], task: "asyncio.Task[T]") -> None:
+        self._forget(key, call)
+        if not task.cancelled():
+            task.exception()  # Retrieved here in case no caller is left to see it
+
+
+def request_key(*parts: Any) -> str:
+    """A stable key for request arguments (dicts are compared regardless of key order)."""
+    return json.dumps(parts, sort_keys=True, default=str)
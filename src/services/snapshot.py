@@ -0,0 +1,103 @@
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Any
+
+from config import METADATA_SNAPSHOT_FILE, METADATA_SNAPSHOT_VERSION
+from models.types import KoladaKpi, KoladaMetadataSnapshot, KoladaMunicipality
+
+
+def compute_content_hash(
+    kpi_list: list[KoladaKpi], municipality_list: list[KoladaMunicipality]
+) -> str:
+    """
+    Computes a stable SHA-256 hash over the KPI and municipality metadata.
+    Used to detect whether a freshly fetched catalogue differs from the snapshot.
+    """
+    payload: str = json.dumps(
+        {"kpis": kpi_list, "municipalities": municipality_list},
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def build_metadata_snapshot(
+    kpi_list: list[KoladaKpi],
+    municipality_list: list[KoladaMunicipality],
+    operating_areas_summary: list[dict[str, str | int]],
+    validators: dict[str, str] | None = None,
+) -> KoladaMetadataSnapshot:
+    """Creates a version-stamped snapshot of the metadata caches."""
+    return {
+        "version": METADATA_SNAPSHOT_VERSION,
+        "created_at": time.time(),
+        "content_hash": compute_content_hash(kpi_list, municipality_list),
+        "validators": validators or {},
+        "kpi_cache": kpi_list,
+        "municipality_cache": municipality_list,
+        "operating_areas_summary": operating_areas_summary,
+    }
+
+
+def load_metadata_snapshot(
+    path: str = METADATA_SNAPSHOT_FILE,
+) -> KoladaMetadataSnapshot | None:
+    """
+    Loads the metadata snapshot from disk.
+    Returns None if the file is missing, unreadable or has another format version.
+    """
+    if not os.path.isfile(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data: dict[str, Any] = json.load(f)
+    except (OSError, json.JSONDecodeError) as ex:
+        print(f"[Kolada MCP] Failed to load metadata snapshot: {ex}", file=sys.stderr)
+        return None
+
+    if data.get("version") != METADATA_SNAPSHOT_VERSION:
+        print(
+            f"[Kolada MCP] Ignoring metadata snapshot with version {data.get('version')}"
+            f" (expected {METADATA_SNAPSHOT_VERSION}).",
+            file=sys.stderr,
+        )
+        return None
+    if not data.get("kpi_cache") or not data.get("municipality_cache"):
+        print("[Kolada MCP] Ignoring empty metadata snapshot.", file=sys.stderr)
+        return None
+
+    data.setdefault("validators", {})
+    data.setdefault("operating_areas_summary", [])
+    return data  # type: ignore[return-value]
+
+
+def save_metadata_snapshot(
+    snapshot: KoladaMetadataSnapshot, path: str = METADATA_SNAPSHOT_FILE
+) -> None:
+    """
+    Writes the metadata snapshot atomically (temporary file + rename), so a
+    concurrent reader never sees a partially written file.
+    """
+    directory: str = os.path.dirname(os.path.abspath(path))
+    try:
+        fd, tmp_path = tempfile.mkstemp(
+            prefix=".metadata-snapshot-", suffix=".tmp", dir=directory
+        )
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        print(f"[Kolada MCP] Metadata snapshot saved to {path}.", file=sys.stderr)
+    except OSError as ex:
+        print(
+            f"[Kolada MCP] WARNING: Failed to save metadata snapshot: {ex}",
+            file=sys.stderr,
+        )
@@ -31,7 +31,7 @@ class SweaApiService:
             to_date: End date for the range (inclusive) - string format 'YYYY-MM-DD' or date object
             limit: Maximum number of calendar days to return
             include_non_business_days: Whether to include weekends and holidays
-            cache: Whether to use cached results if available
+            cache: Whether to serve the response from (and store it in) the response cache
             
         Returns:
             Dict containing calendar days data or error information
@@ -65,7 +65,8 @@ class SweaApiService:
         response = await fetch_data_from_riksbank(
             endpoint="/calendar/calendardays",
             api_type="swea",
-            params=params
+            params=params,
+            cache=cache
         )
         
         # Process the response
@@ -32,7 +32,7 @@ class ToraApiService:
             to_date: End date for the range (inclusive) - string format 'YYYY-MM-DD' or date object
             interest_rate_id: Specific interest rate ID to fetch
             limit: Maximum number of records to return
-            cache: Whether to use cached results if available
+            cache: Whether to serve the response from (and store it in) the response cache
             
         Returns:
             Dict containing interest rate data or error information
@@ -64,7 +64,8 @@ class ToraApiService:
         response = await fetch_data_from_riksbank(
             endpoint="/interestrate",
             api_type="tora",
-            params=params
+            params=params,
+            cache=cache
         )
         
         # Process the response
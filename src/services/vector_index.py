@@ -0,0 +1,201 @@
+import math
+
+import numpy as np
+import numpy.typing as npt
+
+from config import ANN_N_PROBE
+from services.quantization import QuantizedEmbeddings
+
+KMEANS_CHUNK_ROWS: int = 4096
+
+
+def _assign(
+    data: npt.NDArray[np.float32], centroids: npt.NDArray[np.float32]
+) -> npt.NDArray[np.intp]:
+    """Assigns every row to the centroid with the highest dot product."""
+    labels: npt.NDArray[np.intp] = np.empty(data.shape[0], dtype=np.intp)
+    for start in range(0, data.shape[0], KMEANS_CHUNK_ROWS):
+        chunk = slice(start, start + KMEANS_CHUNK_ROWS)
+        labels[chunk] = np.argmax(data[chunk] @ centroids.T, axis=1)
+    return labels
+
+
+def spherical_kmeans(
+    data: npt.NDArray[np.float32], n_clusters: int, iterations: int = 10, seed: int = 0
+) -> npt.NDArray[np.float32]:
+    """
+    k-means on the unit sphere (cosine similarity), suitable for normalized
+    embeddings. Empty clusters are re-seeded with random rows.
+    Returns the (n_clusters, dim) normalized centroids.
+    """
+    rng = np.random.default_rng(seed)
+    n_clusters = min(n_clusters, data.shape[0])
+    centroids: npt.NDArray[np.float32] = data[
+        rng.choice(data.shape[0], size=n_clusters, replace=False)
+    ].copy()
+    for _ in range(iterations):
+        labels = _assign(data, centroids)
+        sums: npt.NDArray[np.float32] = np.zeros_like(centroids)
+        np.add.at(sums, labels, data)
+        counts = np.bincount(labels, minlength=n_clusters)
+        empty = counts == 0
+        if empty.any():
+            sums[empty] = data[rng.choice(data.shape[0], size=int(empty.sum()))]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        centroids = (sums / np.maximum(norms, 1e-12)).astype(np.float32)
+    return centroids
+
+
+class IvfIndex:
+    """
+    Inverted-file (IVF) approximate nearest-neighbour index.
+    Rows are partitioned by their nearest k-means centroid; a query only scans
+    the rows of its `n_probe` closest centroids. `list_rows` holds the row ids
+    grouped by list, and `list_offsets[i]:list_offsets[i + 1]` delimits list i.
+    """
+
+    def __init__(
+        self,
+        centroids: npt.NDArray[np.float32],
+        list_offsets: npt.NDArray[np.int64],
+        list_rows: npt.NDArray[np.int64],
+    ) -> None:
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.list_rows = list_rows
+
+    @property
+    def n_lists(self) -> int:
+        return self.centroids.shape[0]
+
+    def arrays(self) -> dict[str, npt.NDArray[np.float32] | npt.NDArray[np.int64]]:
+        """The arrays that make up the index, for persisting next to the embeddings."""
+        return {
+            "centroids": self.centroids,
+            "list_offsets": self.list_offsets,
+            "list_rows": self.list_rows,
+        }
+
+    @classmethod
+    def build(
+        cls,
+        embeddings: QuantizedEmbeddings,
+        n_lists: int | None = None,
+        iterations: int = 10,
+        seed: int = 0,
+    ) -> "IvfIndex":
+        """Builds the index; `n_lists` defaults to about sqrt(rows)."""
+        data: npt.NDArray[np.float32] = embeddings.dequantize()
+        if n_lists is None:
+            n_lists = max(1, int(math.sqrt(data.shape[0])))
+        centroids = spherical_kmeans(data, n_lists, iterations, seed)
+        labels = _assign(data, centroids)
+        order: npt.NDArray[np.int64] = np.argsort(labels, kind="stable").astype(np.int64)
+        counts = np.bincount(labels, minlength=centroids.shape[0])
+        offsets: npt.NDArray[np.int64] = np.concatenate(([0], np.cumsum(counts))).astype(
+            np.int64
+        )
+        return cls(centroids, offsets, order)
+
+    def candidates(
+        self, query: npt.NDArray[np.float32], n_probe: int
+    ) -> npt.NDArray[np.int64]:
+        """Row ids in the `n_probe` lists whose centroids are closest to `query`."""
+        n_probe = max(1, min(n_probe, self.n_lists))
+        centroid_scores = self.centroids @ query
+        probes = np.argpartition(-centroid_scores, n_probe - 1)[:n_probe]
+        return np.concatenate(
+            [self.list_rows[self.list_offsets[p] : self.list_offsets[p + 1]] for p in probes]
+        )
+
+
+def top_k(scores: npt.NDArray[np.float32], k: int) -> npt.NDArray[np.intp]:
+    """
+    Indices of the `k` highest scores, best first. Uses argpartition so only the
+    selected `k` entries are sorted instead of the whole score vector.
+    """
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if k < scores.shape[0]:
+        part: npt.NDArray[np.intp] = np.argpartition(-scores, k - 1)[:k]
+    else:
+        part = np.arange(scores.shape[0])
+    return part[np.argsort(-scores[part], kind="stable")]
+
+
+def search_embeddings(
+    embeddings: QuantizedEmbeddings,
+    query: npt.NDArray[np.float32],
+    k: int,
+    index: IvfIndex | None = None,
+    n_probe: int = ANN_N_PROBE,
+    min_score: float | None = None,
+    subset: npt.NDArray[np.int64] | None = None,
+) -> tuple[npt.NDArray[np.int64], npt.NDArray[np.float32]]:
+    """
+    Returns the rows of the `k` best matching embeddings and their scores, best
+    first, dropping rows scoring below `min_score`. Uses the IVF index when given
+    (probing `n_probe` lists) and falls back to an exact brute-force scan
+    otherwise, or when the probed lists hold fewer than `k` rows. With `subset`
+    only those rows are scored (exactly), e.g. the rows of one operating area.
+    """
+    rows: npt.NDArray[np.int64]
+    scores: npt.NDArray[np.float32]
+    if subset is not None:
+        subset_scores = embeddings.score_rows(query, subset)
+        best = top_k(subset_scores, k)
+        rows, scores = subset[best], subset_scores[best]
+    elif index is not None and (candidates := index.candidates(query, n_probe)).shape[0] >= k:
+        candidate_scores = embeddings.score_rows(query, candidates)
+        best = top_k(candidate_scores, k)
+        rows, scores = candidates[best], candidate_scores[best]
+    else:
+        sims = embeddings.score(query)
+        best = top_k(sims, k)
+        rows, scores = best.astype(np.int64), sims[best]
+
+    if min_score is not None:
+        keep = scores >= min_score
+        rows, scores = rows[keep], scores[keep]
+    return rows, scores
+
+
+def search_embeddings_batch(
+    embeddings: QuantizedEmbeddings,
+    queries: npt.NDArray[np.float32],
+    k: int,
+    index: IvfIndex | None = None,
+    n_probe: int = ANN_N_PROBE,
+    min_score: float | None = None,
+    subset: npt.NDArray[np.int64] | None = None,
+) -> list[tuple[npt.NDArray[np.int64], npt.NDArray[np.float32]]]:
+    """
+    `search_embeddings` for a (n_queries, dim) query matrix. Without an IVF
+    index all queries are scored in one matrix-matrix product (a single pass
+    over the embeddings, or over the `subset` rows only); with an index each
+    query probes its own lists.
+    """
+    if index is not None and subset is None:
+        return [
+            search_embeddings(embeddings, query, k, index, n_probe, min_score)
+            for query in queries
+        ]
+
+    query_matrix: npt.NDArray[np.float32] = np.ascontiguousarray(queries.T)
+    sims: npt.NDArray[np.float32] = (
+        embeddings.score(query_matrix)
+        if subset is None
+        else embeddings.score_rows(query_matrix, subset)
+    )
+    results: list[tuple[npt.NDArray[np.int64], npt.NDArray[np.float32]]] = []
+    for column in range(sims.shape[1]):
+        column_scores: npt.NDArray[np.float32] = sims[:, column]
+        best = top_k(column_scores, k)
+        rows = best.astype(np.int64) if subset is None else subset[best]
+        scores = column_scores[best]
+        if min_score is not None:
+            keep = scores >= min_score
+            rows, scores = rows[keep], scores[keep]
+        results.append((rows, scores))
+    return results
@@ -1,9 +1,21 @@
 import sys
 
 import numpy as np
+import numpy.typing as npt
 from mcp.server.fastmcp.server import Context
 
-from models.types import KoladaKpi, KoladaLifespanContext
+from config import COMPLETE_KPI_MAX_LIMIT, EMBEDDINGS_READY_TIMEOUT, HYBRID_CANDIDATES
+from models.types import (
+    KoladaKpi,
+    KoladaKpiBatchSearchResult,
+    KoladaKpiQueryResults,
+    KoladaKpiSearchResult,
+    KoladaLifespanContext,
+)
+from services.embeddings import KpiEmbeddingStore
+from services.lexical_index import Bm25Index, reciprocal_rank_fusion
+from services.prefix_index import KpiPrefixIndex
+from services.vector_index import search_embeddings, search_embeddings_batch
 from utils.context import safe_get_lifespan_context  # type: ignore[Context]
 
 
@@ -43,6 +55,7 @@ async def list_operating_areas(ctx: Context) -> list[dict[str, str | int]]:  # t
 async def get_kpis_by_operating_area(
     operating_area: str,
     ctx: Context,  # type: ignore[Context]
+    fields: list[str] | None = None,
 ) -> list[KoladaKpi]:
     """
     **Step 2: Filter KPIs by Category.**
@@ -54,8 +67,11 @@ async def get_kpis_by_operating_area(
     with the KPI.
 
     Args:
-        operating_area: The exact name of the operating area to filter by.
+        operating_area: The exact name of the operating area to filter by (case-insensitive).
         ctx: The server context (injected automatically).
+        fields: Optional list of KPI fields to return (e.g. ["id", "title"]) to
+            skip the long descriptions. The `id` is always included. Default is
+            all fields.
 
     Returns:
         A list of KoladaKpi objects matching the area, or an empty list.
@@ -65,26 +81,28 @@ async def get_kpis_by_operating_area(
         empty_list: list[KoladaKpi] = []
         return empty_list
 
-    kpi_list: list[KoladaKpi] = lifespan_ctx.get("kpi_cache", [])
-    if not kpi_list:
+    kpi_map: dict[str, KoladaKpi] = lifespan_ctx.get("kpi_map", {})
+    if not kpi_map:
         print("Warning: KPI cache is empty in context.", file=sys.stderr)
         empty_list: list[KoladaKpi] = []
         return empty_list
 
-    target_area_lower: str = operating_area.lower().strip()
-    matches: list[KoladaKpi] = []
-
-    for kpi in kpi_list:
-        area_field: str = kpi.get("operating_area", "").lower()
-        kpi_areas: set[str] = {a.strip() for a in area_field.split(",")}
-        if target_area_lower in kpi_areas:
-            matches.append(kpi)
+    # Area -> KPI id index precomputed at startup
+    area_index: dict[str, list[str]] = lifespan_ctx.get("kpi_area_index", {})
+    kpi_ids: list[str] = area_index.get(operating_area.lower().strip(), [])
+    matches: list[KoladaKpi] = [kpi_map[k_id] for k_id in kpi_ids if k_id in kpi_map]
 
     if not matches:
         print(
             f"Info: No KPIs found for operating area '{operating_area}'.",
             file=sys.stderr,
         )
+    if fields:
+        keep: set[str] = {"id", *fields}
+        matches = [
+            {key: value for key, value in kpi.items() if key in keep}  # type: ignore[misc]
+            for kpi in matches
+        ]
     return matches
 
 
@@ -124,11 +142,86 @@ async def get_kpi_metadata(
     return kpi_obj
 
 
+async def complete_kpi(
+    prefix: str,
+    ctx: Context,  # type: ignore[Context]
+    limit: int = 10,
+) -> list[dict[str, str]]:
+    """
+    Completes a partial KPI id (e.g. "N009") or the beginning of a KPI title
+    or of any word in it (e.g. "kostnad per") to matching KPIs. Much cheaper
+    than `search_kpis`: no model is involved and the lookup only uses a
+    sorted index built at startup. Use it when you know how a KPI id or
+    title starts; use `search_kpis` for topics.
+
+    Args:
+        prefix: The beginning of a KPI id or title (case-insensitive).
+        ctx: The server context (injected automatically).
+        limit: Maximum number of completions (default 10, at most 50).
+
+    Returns:
+        A list of {"id", "title"} dictionaries: id matches first, then title
+        matches, then matches on a later word of the title. Empty if nothing
+        matches.
+    """
+    lifespan_ctx: KoladaLifespanContext | None = safe_get_lifespan_context(ctx)
+    if not lifespan_ctx:
+        return []
+
+    kpi_map: dict[str, KoladaKpi] = lifespan_ctx.get("kpi_map", {})
+    prefix_index: KpiPrefixIndex | None = lifespan_ctx.get("kpi_prefix_index")
+    if prefix_index is None:
+        prefix_index = KpiPrefixIndex(list(kpi_map.values()))
+    limit = max(0, min(limit, COMPLETE_KPI_MAX_LIMIT))
+    return [
+        {"id": kpi_id, "title": kpi_map[kpi_id].get("title", "")}
+        for kpi_id in prefix_index.complete(prefix, limit)
+        if kpi_id in kpi_map
+    ]
+
+
+def _kpi_in_area(kpi_obj: KoladaKpi, area_key: str) -> bool:
+    """True if the KPI belongs to the (lower-cased) operating area."""
+    area_field: str = kpi_obj.get("operating_area", "").lower()
+    return area_key in {a.strip() for a in area_field.split(",")}
+
+
+def _area_subset(
+    area_rows: dict[str, npt.NDArray[np.int64]], area_key: str | None
+) -> npt.NDArray[np.int64] | None:
+    """Rows of an operating area (empty if unknown), or None when not filtering."""
+    if area_key is None:
+        return None
+    return area_rows.get(area_key, np.empty(0, dtype=np.int64))
+
+
+def _to_search_results(
+    rows: npt.NDArray[np.int64],
+    scores: npt.NDArray[np.float32],
+    kpi_ids: list[str],
+    kpi_map: dict[str, KoladaKpi],
+    include_scores: bool,
+) -> list[KoladaKpiSearchResult]:
+    """Maps ranked embedding rows to KPI objects, optionally with their scores."""
+    results: list[KoladaKpiSearchResult] = []
+    for idx, score in zip(rows, scores):
+        if kpi_ids[idx] in kpi_map:
+            kpi_obj: KoladaKpiSearchResult = kpi_map[kpi_ids[idx]]
+            if include_scores:
+                kpi_obj = {**kpi_obj, "score": round(float(score), 4)}
+            results.append(kpi_obj)
+    return results
+
+
 async def search_kpis(
     keyword: str,
     ctx: Context,  # type: ignore[Context]
     limit: int = 20,
-) -> list[KoladaKpi]:
+    include_scores: bool = False,
+    min_score: float | None = None,
+    hybrid: bool = True,
+    operating_area: str | None = None,
+) -> list[KoladaKpiSearchResult]:
     """
     **Purpose:** Performs a semantic search for Kolada Key Performance Indicators (KPIs)
     based on a user-provided keyword or phrase. Instead of simple text matching,
@@ -144,71 +237,256 @@ async def search_kpis(
     *   (Used as a preliminary step before using tools like `analyze_kpi_across_municipalities` or `fetch_kolada_data` if the KPI ID is not known).
 
     **Arguments:**
-    *   `keyword` (str): The search term or phrase describing the topic of interest. The tool will find KPIs with semantically similar titles. **Required.**
+    *   `keyword` (str): The search term or phrase describing the topic of interest. The tool will find KPIs with semantically similar titles. An exact KPI ID (e.g., "N00945") returns just that KPI. **Required.**
     *   `ctx` (Context): The server context (automatically injected by the MCP framework). You do not need to provide this.
     *   `limit` (int, optional): The maximum number of matching KPIs to return, ordered by relevance (highest relevance first). Default is 20.
+    *   `include_scores` (bool, optional): If True, each returned KPI gets a `score` field with its cosine similarity to the keyword (higher is more relevant). Default is False.
+    *   `min_score` (float, optional): Drops KPIs whose similarity is below this cutoff, so fewer than `limit` results may be returned. Useful instead of asking for a large `limit` and filtering afterwards. Default is no cutoff. The cutoff also applies to KPIs found by keyword (see `hybrid`), using their cosine similarity.
+    *   `operating_area` (str, optional): Only returns KPIs from this operating area (exact name as returned by `list_operating_areas`, case-insensitive). Only that area's KPIs are scored, so this is cheaper than a large `limit` combined with `get_kpis_by_operating_area`. Default is all areas.
+    *   `hybrid` (bool, optional): If True, the semantic ranking is fused with a keyword (BM25) ranking over KPI titles, descriptions and operating areas, which catches acronyms, codes and rare words that only appear in a description. Set to False for a purely semantic search. Default is True.
 
     **Core Logic:**
-    1.  Accesses the pre-loaded data from the server's lifespan context (`lifespan_ctx`), specifically:
+    0.  **Exact ID Fast Path:** If `keyword` is exactly a KPI ID, that KPI is returned right away without running the model.
+    1.  Accesses the data from the server's lifespan context (`lifespan_ctx`). The model and embeddings are loaded in the background at startup, so the tool first waits (up to a timeout) for them to become ready:
         *   The `SentenceTransformer` model (e.g., `KBLab/sentence-bert-swedish-cased`).
-        *   The pre-computed `kpi_embeddings` (a NumPy array where each row is the vector embedding of a KPI title).
+        *   The pre-computed `kpi_embeddings` (a float32 matrix, memory-mapped from the embeddings cache, where each row is the vector embedding of a KPI title).
         *   The list of `kpi_ids` corresponding to the rows in the embeddings array.
         *   The `kpi_map` (dictionary mapping KPI IDs to their full metadata objects).
-    2.  Checks if embeddings are available. If not (e.g., failed during startup), returns an empty list.
-    3.  **Embeds the User Query:** Takes the input `keyword` string and uses the loaded SentenceTransformer model to convert it into a numerical vector representation (embedding). This captures the semantic meaning of the keyword.
-    4.  **Calculates Similarity:** Computes the cosine similarity between the user's query vector and *all* the pre-computed KPI title vectors stored in `kpi_embeddings`. Since the embeddings are pre-normalized during startup, this is efficiently done using a matrix-vector dot product (`embeddings @ query_vec`).
-    5.  **Sorts by Relevance:** Sorts the results based on the calculated similarity scores in descending order. The indices of the most similar KPI embeddings are identified.
-    6.  **Selects Top N:** Takes the top `limit` indices from the sorted list.
+    2.  Checks if embeddings are available. If not (e.g., still loading after the timeout, or failed during startup), returns only the keyword (BM25) matches when `hybrid` is True (without scores), otherwise an empty list.
+    3.  **Embeds the User Query:** Takes the input `keyword` string and uses the loaded SentenceTransformer model to convert it into a numerical vector representation (embedding). Encoding runs in a worker thread, and queries from concurrent searches that arrive within a few milliseconds are encoded together in one batch. This captures the semantic meaning of the keyword. Vectors of recently used (whitespace-normalized) queries are kept in a bounded LRU cache, persisted across restarts, so repeated searches skip the model.
+    4.  **Calculates Similarity:** Computes the cosine similarity between the user's query vector and *all* the pre-computed KPI title vectors stored in `kpi_embeddings`. Since the embeddings are pre-normalized during startup, this is efficiently done using a matrix-vector dot product (`embeddings.score(query_vec)`).
+    5.  **Sorts by Relevance:** Selects the `limit` highest similarity scores (a partial selection with `np.argpartition`, then a sort of just those rows) and drops rows below `min_score`. For catalogues above `ANN_MIN_ROWS` an IVF (k-means) index restricts scoring to the `ANN_N_PROBE` closest clusters; smaller catalogues are scanned exactly. With `operating_area`, only the rows of that area (precomputed per area at startup) are scored.
+    6.  **Hybrid Fusion:** When `hybrid` is True, the BM25 ranking from an inverted index (built at startup from `kpi_cache`) is fused with the semantic ranking using reciprocal rank fusion. The reported `score` stays the cosine similarity, and `min_score` is applied to it after fusion, so KPIs found only by keyword must pass the cutoff too. The order is the fused rank, so with `hybrid` scores are not necessarily decreasing.
     7.  **Retrieves KPI Metadata:** Uses the top indices to look up the corresponding `kpi_ids` and then retrieves the full `KoladaKpi` metadata objects for those IDs from the `kpi_map`.
-    8.  Returns the list of found `KoladaKpi` objects.
+    8.  Returns the list of found `KoladaKpi` objects (with `score` if `include_scores` is True).
 
     **Return Value:**
     *   A list of `KoladaKpi` dictionaries (containing `id`, `title`, `description`, `operating_area`).
     *   The list is sorted by semantic relevance to the `keyword`, with the most relevant KPI appearing first.
     *   The list contains at most `limit` items.
-    *   Returns an empty list (`[]`) if no relevant KPIs are found or if the embeddings cache is unavailable.
+    *   Returns an empty list (`[]`) if no relevant KPIs are found or if the embeddings are unavailable (still loading or failed).
 
     **Important Notes:**
     *   This tool operates entirely on **cached data** loaded at server startup. It does **not** call the live Kolada API.
+    *   Right after a server start the embedding model may still be loading; the first call then waits for it.
+    *   Repeating a search is cheap: the query vector comes from the query-embedding cache.
     *   The search is **semantic**, meaning it looks for related concepts, not just exact word matches. A search for "cars" might find KPIs about "vehicle traffic".
     *   The quality of the search results depends on the chosen SentenceTransformer model and the clarity/informativeness of the cached KPI titles.
-    *   It searches primarily based on **KPI titles**. While descriptions are part of the metadata, the embeddings used for the search are generated *only* from the titles for efficiency.
+    *   The semantic part searches **KPI titles** only (the embeddings are generated from the titles for efficiency); words in descriptions and operating areas are found through the keyword (BM25) part of the hybrid search.
     *   The default `limit` is 20, but can be adjusted if more or fewer results are needed.
     """
     lifespan_ctx: KoladaLifespanContext | None = safe_get_lifespan_context(ctx)
     if not lifespan_ctx:
-        empty_list: list[KoladaKpi] = []
+        empty_list: list[KoladaKpiSearchResult] = []
         return empty_list
 
-    # --- Vector-based approach (while keeping the original docstring) ---
-    model = lifespan_ctx["sentence_model"]
-    embeddings = lifespan_ctx["kpi_embeddings"]
-    kpi_ids = lifespan_ctx["kpi_ids"]
     kpi_map = lifespan_ctx["kpi_map"]
+    lexical_index: Bm25Index | None = lifespan_ctx.get("kpi_lexical_index")
+    area_key: str | None = operating_area.lower().strip() if operating_area else None
+
+    # 0) Lexical fast path: an exact KPI id needs no transformer inference
+    if lexical_index is not None:
+        exact_id: str | None = lexical_index.lookup_id(keyword)
+        if exact_id is not None and exact_id in kpi_map:
+            exact_kpi: KoladaKpiSearchResult = kpi_map[exact_id]
+            if area_key is None or _kpi_in_area(exact_kpi, area_key):
+                return [{**exact_kpi, "score": 1.0}] if include_scores else [exact_kpi]
+
+    # --- Vector-based approach (while keeping the original docstring) ---
+    store: KpiEmbeddingStore = lifespan_ctx["kpi_embedding_store"]
+    if not await store.wait_until_ready(EMBEDDINGS_READY_TIMEOUT):
+        if hybrid and lexical_index is not None:
+            print(
+                f"[Kolada MCP] Embeddings not available within {EMBEDDINGS_READY_TIMEOUT}s"
+                f" (error: {store.error}); returning lexical matches only.",
+                file=sys.stderr,
+            )
+            lexical_rows, _ = lexical_index.search(
+                keyword, limit, _area_subset(lexical_index.area_rows, area_key)
+            )
+            return [
+                kpi_map[lexical_index.kpi_ids[row]]
+                for row in lexical_rows
+                if lexical_index.kpi_ids[row] in kpi_map
+            ]
+        print(
+            f"[Kolada MCP] Embeddings not available within {EMBEDDINGS_READY_TIMEOUT}s"
+            f" (error: {store.error}); returning empty list.",
+            file=sys.stderr,
+        )
+        empty_list: list[KoladaKpiSearchResult] = []
+        return empty_list
+
+    embeddings = store.embeddings
+    kpi_ids = store.kpi_ids
 
     if embeddings.shape[0] == 0:
         print(
             "[Kolada MCP] No KPI embeddings found; returning empty list.",
             file=sys.stderr,
         )
-        empty_list: list[KoladaKpi] = []
+        empty_list: list[KoladaKpiSearchResult] = []
         return empty_list
 
-    # 1) Embed user query
-    query_vector = model.encode([keyword], normalize_embeddings=True)  # type: ignore[encode]
-    query_vec = query_vector[0]
+    # Rows of the requested operating area, precomputed at startup
+    area_subset = _area_subset(store.area_rows, area_key)
+    if area_subset is not None and area_subset.shape[0] == 0:
+        print(
+            f"[Kolada MCP] No KPIs found for operating area '{operating_area}'.",
+            file=sys.stderr,
+        )
+        empty_list: list[KoladaKpiSearchResult] = []
+        return empty_list
 
-    # 2) Compute dot products with normalized embeddings
-    #    (We assume embeddings is already normalized)
-    sims = embeddings @ query_vec
+    # 1) Embed user query off the event loop, batched with concurrent searches
+    #    (repeated queries are served from the query cache)
+    query_vec = (await store.encode_queries([keyword]))[0]
+
+    # 2) Score against the normalized embeddings and take the best rows
+    #    (through the IVF index for large catalogues, exact scan otherwise;
+    #    with an operating area only that area's rows are scored)
+    use_lexical: bool = hybrid and lexical_index is not None
+    n_candidates: int = max(limit, HYBRID_CANDIDATES) if use_lexical else limit
+    top_indices, top_scores = search_embeddings(
+        embeddings,
+        query_vec,
+        n_candidates,
+        store.ann_index,
+        min_score=min_score,
+        subset=area_subset,
+    )
 
-    # 3) Sort descending by similarity
-    indices_sorted = np.argsort(-sims)
-    top_indices = indices_sorted[:limit]
+    # 3) Hybrid: fuse with the BM25 ranking over title, description and operating area
+    if use_lexical:
+        lexical_rows, _ = lexical_index.search(  # type: ignore[union-attr]
+            keyword, n_candidates, _area_subset(lexical_index.area_rows, area_key)  # type: ignore[union-attr]
+        )
+        lexical_ids: list[str] = [
+            lexical_index.kpi_ids[row]  # type: ignore[union-attr]
+            for row in lexical_rows
+            if lexical_index.kpi_ids[row] in store.kpi_rows  # type: ignore[union-attr]
+        ]
+        if lexical_ids:
+            fused = reciprocal_rank_fusion(
+                [[kpi_ids[row] for row in top_indices], lexical_ids]
+            )
+            top_indices = np.array(
+                [store.kpi_rows[kpi_id] for kpi_id, _ in fused], dtype=np.int64
+            )
+            # Report the cosine similarity, also for KPIs found only lexically,
+            # and apply the cutoff to the fused list before truncating it
+            top_scores = embeddings.score_rows(query_vec, top_indices)
+            if min_score is not None:
+                keep = top_scores >= min_score
+                top_indices, top_scores = top_indices[keep], top_scores[keep]
+
+    return _to_search_results(
+        top_indices[:limit], top_scores[:limit], kpi_ids, kpi_map, include_scores
+    )
 
-    results: list[KoladaKpi] = []
-    for idx in top_indices:
-        if kpi_ids[idx] in kpi_map:
-            results.append(kpi_map[kpi_ids[idx]])
 
-    return results
+async def search_kpis_batch(
+    keywords: list[str],
+    ctx: Context,  # type: ignore[Context]
+    limit: int = 20,
+    include_scores: bool = False,
+    min_score: float | None = None,
+    merge: bool = False,
+    operating_area: str | None = None,
+) -> KoladaKpiBatchSearchResult:
+    """
+    **Purpose:** Runs the semantic KPI search of `search_kpis` for several keywords or
+    phrasings at once. All keywords are embedded in a single model call and scored
+    against the KPI embeddings in a single matrix-matrix product, which is much cheaper
+    than calling `search_kpis` once per phrasing.
+
+    **Use Cases:**
+    *   "Find KPIs about 'unemployment', 'arbetslöshet' and 'jobless youth'." (related phrasings of one topic)
+    *   "Which KPIs cover 'school results', 'teacher density' and 'school costs'?" (several topics in one go)
+
+    **Arguments:**
+    *   `keywords` (list[str]): The search terms or phrases. **Required.**
+    *   `ctx` (Context): The server context (automatically injected by the MCP framework). You do not need to provide this.
+    *   `limit` (int, optional): The maximum number of KPIs per keyword (and in the merged ranking). Default is 20.
+    *   `include_scores` (bool, optional): If True, each returned KPI gets a `score` field with its cosine similarity. Default is False.
+    *   `min_score` (float, optional): Drops KPIs whose similarity is below this cutoff. Default is no cutoff.
+    *   `merge` (bool, optional): If True, also returns `merged`: one ranking over all keywords without duplicates, where each KPI is ranked by its best score across the keywords. Default is False.
+    *   `operating_area` (str, optional): Only searches KPIs from this operating area (case-insensitive), scoring just that area's KPIs. Default is all areas.
+
+    **Return Value:**
+    *   A dictionary with:
+        *   `results`: One entry per keyword, in input order, with `keyword` and its ranked `kpis` (as returned by `search_kpis`).
+        *   `merged` (only if `merge` is True): The de-duplicated ranking, at most `limit` KPIs.
+    *   The lists are empty if the embeddings are unavailable (still loading or failed).
+
+    **Important Notes:**
+    *   Like `search_kpis`, this works entirely on cached data and does not call the Kolada API.
+    """
+    empty: KoladaKpiBatchSearchResult = {
+        "results": [{"keyword": keyword, "kpis": []} for keyword in keywords]
+    }
+    if merge:
+        empty["merged"] = []
+
+    lifespan_ctx: KoladaLifespanContext | None = safe_get_lifespan_context(ctx)
+    if not lifespan_ctx or not keywords:
+        return empty
+
+    store: KpiEmbeddingStore = lifespan_ctx["kpi_embedding_store"]
+    if not await store.wait_until_ready(EMBEDDINGS_READY_TIMEOUT):
+        print(
+            f"[Kolada MCP] Embeddings not available within {EMBEDDINGS_READY_TIMEOUT}s"
+            f" (error: {store.error}); returning empty results.",
+            file=sys.stderr,
+        )
+        return empty
+
+    embeddings = store.embeddings
+    kpi_ids = store.kpi_ids
+    kpi_map = lifespan_ctx["kpi_map"]
+    if embeddings.shape[0] == 0:
+        print("[Kolada MCP] No KPI embeddings found; returning empty results.", file=sys.stderr)
+        return empty
+
+    # 1) Embed all keywords in one forward pass in a worker thread (cached queries are skipped)
+    query_matrix = await store.encode_queries(keywords)
+
+    # 2) Score every keyword in one matrix-matrix product (over the rows of
+    #    `operating_area` only, if given) and take each top `limit`
+    ranked = search_embeddings_batch(
+        embeddings,
+        query_matrix,
+        limit,
+        store.ann_index,
+        min_score=min_score,
+        subset=_area_subset(
+            store.area_rows, operating_area.lower().strip() if operating_area else None
+        ),
+    )
+
+    results: list[KoladaKpiQueryResults] = [
+        {
+            "keyword": keyword,
+            "kpis": _to_search_results(rows, scores, kpi_ids, kpi_map, include_scores),
+        }
+        for keyword, (rows, scores) in zip(keywords, ranked)
+    ]
+    batch_result: KoladaKpiBatchSearchResult = {"results": results}
+
+    if merge:
+        # 3) Merge: keep each row's best score across keywords, then rank again
+        best_scores: dict[int, float] = {}
+        for rows, scores in ranked:
+            for row, score in zip(rows.tolist(), scores.tolist()):
+                if score > best_scores.get(row, float("-inf")):
+                    best_scores[row] = score
+        merged_rows = sorted(best_scores, key=lambda row: best_scores[row], reverse=True)[:limit]
+        batch_result["merged"] = _to_search_results(
+            np.array(merged_rows, dtype=np.int64),
+            np.array([best_scores[row] for row in merged_rows], dtype=np.float32),
+            kpi_ids,
+            kpi_map,
+            include_scores,
+        )
+
+    return batch_result
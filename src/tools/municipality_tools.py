@@ -3,6 +3,7 @@ from typing import Any
 from mcp.server.fastmcp.server import Context
 
 from models.types import KoladaLifespanContext, KoladaMunicipality
+from services.municipality_index import MunicipalityIndex
 from tools.data_tools import fetch_kolada_data  # type: ignore[Context]
 from utils.context import safe_get_lifespan_context  # type: ignore[Context]
 
@@ -58,6 +59,62 @@ async def list_municipalities(
     return result
 
 
+async def resolve_municipality(
+    names: list[str],
+    ctx: Context,  # type: ignore[Context]
+    limit: int = 3,
+    municipality_type: str = "",
+) -> list[dict[str, Any]]:
+    """
+    **Purpose:** Resolves municipality or region names to their IDs, tolerating
+    misspellings, missing diacritics and suffixes such as "kommun", "stad" or
+    "region". Use this instead of `list_municipalities` when you already know
+    which places you are interested in.
+
+    **Use Cases:**
+    *   "What is the municipality ID of Göteborg?"
+    *   "Find the IDs for Malmö, Lund and Region Skåne."
+    *   "Resolve 'Gotebrog kommun' to a municipality ID."
+
+    **Arguments:**
+    *   `names` (list[str]): One or more names (or IDs) to resolve, e.g. `["Göteborgs stad", "malmo"]`.
+    *   `ctx` (Context): The server context (automatically injected by the MCP framework). You do not need to provide this.
+    *   `limit` (int, optional): Maximum number of candidates per name. Default is 3.
+    *   `municipality_type` (str, optional): Restrict candidates to one type ("K", "R" or "L").
+        Default is "" (all types).
+
+    **Return Value:**
+    A list with one dictionary per name, in input order, containing:
+    *   `query` (str): The name as given.
+    *   `candidates` (list[dict]): Best matches first, each with `id`, `name`,
+        `type` and `score` (1.0 for an exact match, lower for fuzzy matches).
+        Empty if nothing is similar enough.
+    *   If the context is invalid, returns a list with a single error entry.
+
+    **Important Notes:**
+    *   This tool accesses the server's cache, not the live Kolada API.
+    *   An exact match (ignoring case and suffixes) scores 1.0; a name that only
+        matches without diacritics ("Habo" for "Håbo") scores 0.95. If any name
+        matches this way, no fuzzy candidates are returned.
+    *   "Region X" never matches the municipality X exactly, nor "X kommun" the
+        region X.
+    """
+    lifespan_ctx: KoladaLifespanContext | None = safe_get_lifespan_context(ctx)
+    if not lifespan_ctx:
+        return [{"error": "Server context invalid or incomplete."}]
+
+    index: MunicipalityIndex | None = lifespan_ctx.get("municipality_index")
+    if index is None:
+        index = MunicipalityIndex(list(lifespan_ctx.get("municipality_map", {}).values()))
+    return [
+        {
+            "query": name,
+            "candidates": index.resolve(name, limit=limit, municipality_type=municipality_type),
+        }
+        for name in names
+    ]
+
+
 async def filter_municipalities_by_kpi(
     ctx: Context,  # type: ignore[Context]
     kpi_id: str,
@@ -4,7 +4,7 @@ from typing import Optional, Dict, Any, List
 from mcp.server.fastmcp.server import Context
 
 from models.types import InterestRateType
-from services.riksbank_api import riksbank_api
+from src.services.riksbank_api import riksbank_api
 from utils.context import safe_get_lifespan_context
 
 
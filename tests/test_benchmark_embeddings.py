@@ -0,0 +1,27 @@
+from unittest.mock import MagicMock
+
+import numpy as np
+
+from benchmark_embeddings import measure_backend, topk_overlap
+
+
+def test_topk_overlap_counts_shared_rows_per_query():
+    """Overlap is the share of reference top-k rows found by the candidate."""
+    reference = np.array([[0.9, 0.1], [0.8, 0.2], [0.1, 0.9], [0.0, 0.8]])
+    candidate = np.array([[0.9, 0.1], [0.0, 0.2], [0.8, 0.9], [0.0, 0.8]])
+
+    assert topk_overlap(reference, reference, 2) == 1.0
+    assert topk_overlap(reference, candidate, 2) == 0.75
+
+
+def test_measure_backend_reports_timings_and_scores():
+    """The measurement returns latency percentiles, throughput and a score matrix."""
+    model = MagicMock()
+    model.encode.side_effect = lambda texts, **kwargs: np.ones((len(texts), 3))
+
+    result = measure_backend(model, ["a", "b", "c"], ["q1", "q2"], repeats=2)
+
+    assert result["scores"].shape == (3, 2)
+    assert result["latency_p95_ms"] >= result["latency_p50_ms"] >= 0
+    assert result["titles_per_second"] > 0
+    assert model.encode.call_count == 1 + 2 * 2 + 2
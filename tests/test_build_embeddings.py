@@ -0,0 +1,47 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+# Runs a script's KPI loader without a metadata snapshot, as `uv run <script>` from src/ would
+NO_SNAPSHOT_RUN = """
+import sys
+from unittest.mock import AsyncMock, patch
+
+import {module} as script
+
+kpis = [{{"id": "N00001", "title": "Skola"}}]
+with patch.object(script, "load_metadata_snapshot", return_value=None), patch.object(
+    script, "fetch_kpi_catalogue", AsyncMock(return_value=kpis)
+) as fetch:
+    loaded = script.{loader}
+assert fetch.await_count == 1, fetch.await_count
+assert "src" not in sys.modules
+print(loaded)
+"""
+
+
+@pytest.mark.parametrize(
+    "module,loader,expected",
+    [
+        ("build_embeddings", "load_kpis()", "[{'id': 'N00001', 'title': 'Skola'}]"),
+        ("benchmark_embeddings", "load_titles(0)", "['Skola']"),
+    ],
+)
+def test_scripts_fetch_the_catalogue_without_a_snapshot(module, loader, expected):
+    """Without a snapshot the offline scripts fetch the catalogue, run from src/ only."""
+    env = {k: v for k, v in os.environ.items() if k != "PYTHONPATH"}
+    result = subprocess.run(
+        [sys.executable, "-c", NO_SNAPSHOT_RUN.format(module=module, loader=loader)],
+        cwd=SRC_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == expected
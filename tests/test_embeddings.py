@@ -0,0 +1,288 @@
+import asyncio
+import json
+import os
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+from services.embeddings import (
+    KpiEmbeddingStore,
+    cache_namespace,
+    load_sentence_model,
+    load_or_build_ann_index,
+    load_or_create_embeddings,
+)
+from services.quantization import QuantizedEmbeddings
+from services.vector_index import IvfIndex
+
+KPIS = [
+    {"id": "N00001", "title": "Invånare totalt"},
+    {"id": "N00002", "title": "Arbetslöshet"},
+]
+
+
+def fake_model(dim=4):
+    """Build a mock SentenceTransformer returning deterministic unit vectors."""
+
+    def encode(texts, **kwargs):
+        vectors = np.array(
+            [[float(len(t) + i) for i in range(dim)] for t in texts], dtype=np.float32
+        )
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    model = MagicMock()
+    model.encode.side_effect = encode
+    return model
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    """Run in a temporary directory so the default embeddings cache lands there."""
+    monkeypatch.chdir(tmp_path)
+    return str(tmp_path / "embeddings_cache")
+
+
+@pytest.mark.asyncio
+async def test_store_loads_in_background_and_warms_up(cache_dir):
+    """The store becomes ready with embeddings for every KPI and a warm-up encode."""
+    model = fake_model()
+    with patch("services.embeddings.load_sentence_model", return_value=model):
+        store = KpiEmbeddingStore()
+        store.start(KPIS)
+        assert await store.wait_until_ready(timeout=5)
+
+    assert store.kpi_ids == ["N00001", "N00002"]
+    assert store.embeddings.shape == (2, 4)
+    assert store.embeddings.precision == "float32"
+    assert model.encode.call_args_list[-1][0][0] == ["uppvärmning"]
+
+
+@pytest.mark.asyncio
+async def test_repeated_queries_skip_encoding_across_restarts(cache_dir):
+    """Query vectors are cached in memory and persisted when the store closes."""
+    model = fake_model()
+    with patch("services.embeddings.load_sentence_model", return_value=model):
+        store = KpiEmbeddingStore()
+        store.start(KPIS)
+        assert await store.wait_until_ready(timeout=5)
+        first = await store.encode_queries(["skola", " skola ", "vård"])
+        await store.encode_queries(["skola"])
+        await store.close()
+
+        model.encode.reset_mock()
+        restarted = KpiEmbeddingStore()
+        restarted.start(KPIS)
+        assert await restarted.wait_until_ready(timeout=5)
+        again = await restarted.encode_queries(["vård", "skola"])
+
+    assert first.shape == (3, 4)
+    np.testing.assert_array_equal(first[0], first[1])
+    assert store.query_cache.stats()["hits"] == 1
+    np.testing.assert_array_equal(again, first[[2, 0]])
+    assert all(call[0][0] == ["uppvärmning"] for call in model.encode.call_args_list)
+
+
+@pytest.mark.asyncio
+async def test_wait_until_ready_times_out_while_loading(cache_dir):
+    """Waiting returns False while the model is still loading."""
+    release = asyncio.Event()
+    loop = asyncio.get_running_loop()
+
+    def slow_model():
+        asyncio.run_coroutine_threadsafe(release.wait(), loop).result()
+        return fake_model()
+
+    with patch("services.embeddings.load_sentence_model", side_effect=slow_model):
+        store = KpiEmbeddingStore()
+        store.start(KPIS)
+        assert not await store.wait_until_ready(timeout=0.01)
+        release.set()
+        assert await store.wait_until_ready(timeout=5)
+
+
+@pytest.mark.asyncio
+async def test_failed_load_reports_not_ready(cache_dir):
+    """A failing model load marks the store as finished but not ready."""
+    with patch(
+        "services.embeddings.load_sentence_model", side_effect=OSError("no model")
+    ):
+        store = KpiEmbeddingStore()
+        store.start(KPIS)
+        assert not await store.wait_until_ready(timeout=5)
+
+    assert isinstance(store.error, OSError)
+
+
+def test_unchanged_catalogue_reuses_cache_without_encoding(cache_dir):
+    """An identical catalogue is served from the cache without any encode call."""
+    first, _ = load_or_create_embeddings(KPIS, fake_model(), cache_dir=cache_dir)
+    model = fake_model()
+
+    second, ids = load_or_create_embeddings(KPIS, model, cache_dir=cache_dir)
+
+    model.encode.assert_not_called()
+    assert ids == ["N00001", "N00002"]
+    np.testing.assert_array_equal(first, second)
+    # Unchanged caches are served straight from a read-only memory map
+    assert isinstance(second, np.memmap)
+    assert not second.flags.writeable
+
+
+def test_catalogue_changes_only_encode_new_and_retitled_kpis(cache_dir):
+    """Unchanged rows are reused, new/re-titled rows encoded, deleted rows dropped."""
+    first, _ = load_or_create_embeddings(KPIS, fake_model(), cache_dir=cache_dir)
+    updated = [
+        {"id": "N00003", "title": "Ny KPI"},
+        {"id": "N00001", "title": "Invånare totalt"},
+        {"id": "N00002", "title": "Arbetslöshet 16-64 år"},
+    ]
+    model = fake_model()
+
+    embeddings, ids = load_or_create_embeddings(updated, model, cache_dir=cache_dir)
+
+    encoded_titles = model.encode.call_args[0][0]
+    assert encoded_titles == ["Ny KPI", "Arbetslöshet 16-64 år"]
+    assert ids == ["N00003", "N00001", "N00002"]
+    np.testing.assert_array_equal(embeddings[1], first[0])
+
+    # The merged matrix was written back, so a restart needs no encoding
+    model = fake_model()
+    reloaded, _ = load_or_create_embeddings(updated, model, cache_dir=cache_dir)
+    model.encode.assert_not_called()
+    np.testing.assert_array_equal(reloaded, embeddings)
+
+
+def test_interrupted_rewrite_keeps_the_previous_pair(cache_dir):
+    """A crash before the manifest switch leaves the last complete build in use."""
+    first, _ = load_or_create_embeddings(KPIS, fake_model(), cache_dir=cache_dir)
+    swapped = [{"id": "N00001", "title": "Arbetslöshet"}, {"id": "N00002", "title": "Ny titel"}]
+    with patch("services.embeddings._update_manifest", side_effect=OSError("crash")):
+        load_or_create_embeddings(swapped, fake_model(), cache_dir=cache_dir)
+
+    model = fake_model()
+    reloaded, _ = load_or_create_embeddings(KPIS, model, cache_dir=cache_dir)
+
+    model.encode.assert_not_called()
+    np.testing.assert_array_equal(reloaded, first)
+
+
+def test_rewrite_switches_to_a_new_pair_and_removes_the_old_one(cache_dir):
+    load_or_create_embeddings(KPIS, fake_model(), cache_dir=cache_dir)
+    old_files = set(os.listdir(cache_dir))
+
+    load_or_create_embeddings(KPIS[:1], fake_model(), cache_dir=cache_dir)
+
+    new_files = set(os.listdir(cache_dir))
+    assert {f for f in old_files if f.endswith(".npy")}.isdisjoint(new_files)
+    assert len([f for f in new_files if f.endswith(".npy")]) == 2
+
+
+def test_cache_is_namespaced_by_model_configuration(cache_dir):
+    """Another model revision or normalization setting never reuses vectors."""
+    load_or_create_embeddings(KPIS, fake_model(), cache_dir=cache_dir)
+
+    for kwargs in (
+        {"revision": "v2"},
+        {"normalize": False},
+        {"model_name": "other"},
+        {"backend": "onnx"},
+    ):
+        model = fake_model()
+        load_or_create_embeddings(KPIS, model, cache_dir=cache_dir, **kwargs)
+        assert model.encode.call_count == 1
+
+    # Every configuration lives side by side, none of them forced a rebuild
+    model = fake_model()
+    load_or_create_embeddings(KPIS, model, cache_dir=cache_dir)
+    model.encode.assert_not_called()
+    with open(os.path.join(cache_dir, "manifest.json")) as f:
+        assert len(json.load(f)["namespaces"]) == 5
+
+
+def test_branch_revision_is_keyed_by_the_commit_it_resolved_to(tmp_path, monkeypatch):
+    """A new commit pushed to "main" gets a new namespace instead of reusing old vectors."""
+    refs = tmp_path / "models--org--model" / "refs"
+    refs.mkdir(parents=True)
+    monkeypatch.setattr("huggingface_hub.constants.HF_HUB_CACHE", str(tmp_path))
+
+    (refs / "main").write_text("a" * 40)
+    old = cache_namespace("org/model", "main", True, "title")
+    assert old == cache_namespace("org/model", "a" * 40, True, "title")
+
+    (refs / "main").write_text("b" * 40)
+    assert cache_namespace("org/model", "main", True, "title") != old
+
+
+def test_kpis_sharing_a_title_are_encoded_once(cache_dir):
+    """Vectors are keyed by text hash, so duplicate titles share one encode."""
+    kpis = KPIS + [{"id": "N00003", "title": "Arbetslöshet"}]
+    model = fake_model()
+
+    embeddings, _ = load_or_create_embeddings(kpis, model, cache_dir=cache_dir)
+
+    assert model.encode.call_args[0][0] == ["Invånare totalt", "Arbetslöshet"]
+    np.testing.assert_array_equal(embeddings[1], embeddings[2])
+
+
+def test_ann_index_only_for_large_catalogues_and_cached(cache_dir):
+    """Small catalogues get no index; larger ones build it once and reload it."""
+    matrix, _ = load_or_create_embeddings(KPIS, fake_model(), cache_dir=cache_dir)
+    embeddings = QuantizedEmbeddings(matrix)
+    assert load_or_build_ann_index(KPIS, embeddings, cache_dir=cache_dir) is None
+
+    with patch(
+        "services.embeddings.IvfIndex.build", wraps=IvfIndex.build
+    ) as mock_build:
+        first = load_or_build_ann_index(KPIS, embeddings, min_rows=1, cache_dir=cache_dir)
+        second = load_or_build_ann_index(KPIS, embeddings, min_rows=1, cache_dir=cache_dir)
+
+    assert mock_build.call_count == 1
+    np.testing.assert_array_equal(first.centroids, second.centroids)
+    np.testing.assert_array_equal(first.list_rows, second.list_rows)
+
+
+def test_unknown_backend_is_rejected():
+    """Only the supported inference backends can be selected."""
+    with pytest.raises(ValueError, match="Unsupported embedding backend"):
+        load_sentence_model("tensorflow")
+
+
+def test_interrupted_build_resumes_from_checkpointed_shards(cache_dir):
+    """Finished shards survive a crash and are not encoded again on the next run."""
+    kpis = [{"id": f"N{i:05d}", "title": f"KPI {i:05d}"} for i in range(5)]
+    crashing = fake_model()
+    encode = crashing.encode.side_effect
+
+    def crash_on_second_shard(texts, **kwargs):
+        if crashing.encode.call_count == 2:
+            raise KeyboardInterrupt
+        return encode(texts, **kwargs)
+
+    crashing.encode.side_effect = crash_on_second_shard
+    with patch("services.embeddings.EMBEDDING_SHARD_SIZE", 2):
+        with pytest.raises(KeyboardInterrupt):
+            load_or_create_embeddings(kpis, crashing, cache_dir=cache_dir, workers=1)
+
+        model = fake_model()
+        embeddings, _ = load_or_create_embeddings(kpis, model, cache_dir=cache_dir, workers=1)
+
+    assert sum(len(call[0][0]) for call in model.encode.call_args_list) == 3
+    assert embeddings.shape == (5, 4)
+    assert not [name for name in os.listdir(cache_dir) if name.endswith(".shards")]
+
+
+def test_large_builds_use_a_process_pool(cache_dir):
+    """Above the threshold, shards are encoded through the multi-process pool."""
+    model = fake_model()
+    model.encode_multi_process.side_effect = lambda texts, pool, **kwargs: model.encode(
+        texts, **kwargs
+    )
+    with patch("services.embeddings.EMBEDDING_MULTIPROCESS_MIN_TEXTS", 2):
+        load_or_create_embeddings(KPIS, model, cache_dir=cache_dir, workers=3)
+
+    model.start_multi_process_pool.assert_called_once_with(["cpu"] * 3)
+    model.encode_multi_process.assert_called_once()
+    model.stop_multi_process_pool.assert_called_once_with(
+        model.start_multi_process_pool.return_value
+    )
@@ -0,0 +1,101 @@
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+
+from src.services.auth import riksbank_auth
+from src.services.http_clients import (
+    create_http_client,
+    open_http_clients,
+    prewarm_client,
+    shared_or_new_client,
+)
+from src.services.riksbank_api import riksbank_api
+
+
+@pytest.mark.asyncio
+async def test_shared_client_is_reused_and_left_open():
+    """An injected client is yielded as is and not closed on exit."""
+    shared = create_http_client()
+    async with shared_or_new_client(shared) as client:
+        assert client is shared
+    assert not shared.is_closed
+    await shared.aclose()
+
+
+@pytest.mark.asyncio
+async def test_without_shared_client_a_short_lived_one_is_used():
+    async with shared_or_new_client(None) as client:
+        assert isinstance(client, httpx.AsyncClient)
+    assert client.is_closed
+
+
+@pytest.mark.asyncio
+async def test_open_http_clients_closes_every_client_on_exit():
+    async with open_http_clients(prewarm=False) as clients:
+        assert set(clients) == {"kolada", "riksbank", "oauth"}
+        assert len({id(c) for c in clients.values()}) == 3
+    assert all(client.is_closed for client in clients.values())
+
+
+@pytest.mark.asyncio
+async def test_prewarm_failures_are_only_logged():
+    client = MagicMock()
+    client.head = AsyncMock(side_effect=httpx.ConnectError("offline"))
+
+    with patch("src.services.http_clients.logger") as mock_logger:
+        await prewarm_client(client, "https://example.invalid")
+
+    mock_logger.warning.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_app_lifespan_injects_and_detaches_pooled_clients():
+    """The Riksbank singletons use the pooled clients only while the server runs."""
+    import services.api
+    from lifespan.context import app_lifespan
+
+    seen = {}
+
+    @asynccontextmanager
+    async def fake_kolada_lifespan(server):
+        seen["kolada"] = services.api._kolada_client
+        seen["riksbank"] = riksbank_api._client
+        seen["oauth"] = riksbank_auth._client
+        yield {}
+
+    with patch("lifespan.context._kolada_lifespan", fake_kolada_lifespan), patch(
+        "src.services.http_clients.prewarm_client", AsyncMock()
+    ), patch("lifespan.context.open_kolada_cache", return_value=None):
+        async with app_lifespan(MagicMock()):
+            pass
+
+    assert all(isinstance(c, httpx.AsyncClient) for c in seen.values())
+    assert seen["riksbank"] is not seen["oauth"]
+    assert services.api._kolada_client is None
+    assert riksbank_api._client is None and riksbank_auth._client is None
+
+
+@pytest.mark.asyncio
+async def test_riksbank_tools_use_the_injected_client():
+    """The tools share the singleton the lifespan injects the pooled client into."""
+    from tools.riksbank_tools import list_interest_rate_types
+
+    pooled = MagicMock()
+    pooled.request = AsyncMock(
+        return_value=MagicMock(status_code=200, json=MagicMock(return_value={"items": []}))
+    )
+    auth = MagicMock()
+    auth.get_access_token = AsyncMock(return_value="token")
+    ctx = MagicMock()
+    ctx.request_context.lifespan_context = {}
+
+    riksbank_api.set_client(pooled)
+    try:
+        with patch("src.services.riksbank_api.riksbank_auth", auth):
+            await list_interest_rate_types(ctx)
+    finally:
+        riksbank_api.set_client(None)
+
+    pooled.request.assert_awaited_once()
@@ -0,0 +1,80 @@
+import datetime
+import sqlite3
+import zlib
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.config import KOLADA_CACHE_HISTORICAL_TTL, KOLADA_CACHE_RECENT_TTL
+from src.services import api
+from src.services.kolada_cache import (
+    KoladaResponseCache,
+    canonical_url,
+    open_kolada_cache,
+    response_ttl,
+)
+
+URL = "https://api.kolada.se/v2/data/kpi/N00001/municipality/0180/year/2015,2016"
+
+
+def test_canonical_url_normalizes_host_query_and_lists():
+    assert canonical_url("HTTPS://API.Kolada.se/v2/kpi/?b=2&a=1") == (
+        "https://api.kolada.se/v2/kpi?a=1&b=2"
+    )
+    assert canonical_url(URL.replace(",", ", ")) == URL
+
+
+def test_ttl_depends_on_the_age_of_the_requested_years():
+    today = datetime.date(2024, 5, 1)
+
+    assert response_ttl(URL, today) == KOLADA_CACHE_HISTORICAL_TTL
+    assert response_ttl(URL.replace("2016", "2023"), today) == KOLADA_CACHE_RECENT_TTL
+    assert response_ttl("https://api.kolada.se/v2/data/kpi/N00001", today) == (
+        KOLADA_CACHE_RECENT_TTL
+    )
+
+
+@pytest.mark.asyncio
+async def test_responses_survive_reopening_and_expire(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = KoladaResponseCache(path)
+    await cache.put(URL, {"count": 1, "values": [{"kpi": "N00001", "värde": 1.5}]})
+    await cache.put(URL.replace("N00001", "N00002"), {"count": 0, "values": []}, ttl=-1)
+    cache.close()
+
+    reopened = open_kolada_cache(path)
+    assert await reopened.get(URL + "/") == {
+        "count": 1,
+        "values": [{"kpi": "N00001", "värde": 1.5}],
+    }
+    assert await reopened.get(URL.replace("N00001", "N00002")) is None
+    assert (reopened.hits, reopened.misses) == (1, 1)
+    body = reopened._conn.execute("SELECT body FROM responses").fetchone()[0]
+    assert zlib.decompress(body).startswith(b'{"count":1')
+    reopened.close()
+
+
+def test_open_kolada_cache_returns_none_when_unusable(tmp_path):
+    with patch(
+        "src.services.kolada_cache.KoladaResponseCache", side_effect=sqlite3.OperationalError("locked")
+    ):
+        assert open_kolada_cache(str(tmp_path / "cache.sqlite3")) is None
+
+
+@pytest.mark.asyncio
+async def test_fetch_data_from_kolada_serves_repeats_from_the_cache(tmp_path):
+    """Only successful responses are stored, and cache=False always fetches."""
+    cache = KoladaResponseCache(str(tmp_path / "cache.sqlite3"))
+    fetch = AsyncMock(return_value={"count": 1, "values": [{"v": 1}]})
+
+    with patch.object(api, "_kolada_cache", cache), patch.object(api, "_fetch_kolada_pages", fetch):
+        first = await api.fetch_data_from_kolada(URL)
+        second = await api.fetch_data_from_kolada(URL)
+        await api.fetch_data_from_kolada(URL, cache=False)
+        fetch.return_value = {"error": "boom"}
+        await api.fetch_data_from_kolada(URL + "?x=1")
+        await api.fetch_data_from_kolada(URL + "?x=1")
+
+    assert first == second == {"count": 1, "values": [{"v": 1}]}
+    assert fetch.await_count == 4
+    cache.close()
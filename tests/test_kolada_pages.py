@@ -0,0 +1,99 @@
+import asyncio
+from unittest.mock import MagicMock, patch
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+import pytest
+
+from services import kolada_pages
+from src.services import api
+
+BASE = "https://api.kolada.se/v2/data/kpi/N00001"
+
+
+def data_page(page, total, per_page, next_page=True, count=True):
+    """A Kolada-style data page; `next_page` links to page + 1 while pages remain."""
+    start = (page - 1) * per_page
+    payload = {"values": [{"n": i} for i in range(start, min(start + per_page, total))]}
+    if count:
+        payload["count"] = total
+    if next_page and start + per_page < total:
+        payload["next_page"] = f"{BASE}?page={page + 1}&per_page={per_page}"
+    return payload
+
+
+def make_client(pages, delays=None, fail=()):
+    """Mock client answering page numbers from `pages`, tracking concurrency."""
+    delays = delays or {}
+    state = {"in_flight": 0, "max_in_flight": 0, "urls": []}
+
+    async def get(url, timeout=None):
+        state["urls"].append(url)
+        page = int(parse_qs(urlparse(url).query).get("page", ["1"])[0])
+        if page in fail:
+            raise httpx.ConnectError("boom")
+        state["in_flight"] += 1
+        state["max_in_flight"] = max(state["max_in_flight"], state["in_flight"])
+        try:
+            await asyncio.sleep(delays.get(page, 0))
+            response = MagicMock()
+            response.json.return_value = pages[page]
+            return response
+        finally:
+            state["in_flight"] -= 1
+
+    client = MagicMock()
+    client.get = get
+    return client, state
+
+
+@pytest.mark.asyncio
+async def test_remaining_pages_are_fetched_concurrently_in_page_order():
+    pages = {p: data_page(p, 10, 3) for p in range(1, 5)}
+    client, state = make_client(pages, delays={2: 0.03, 3: 0.01})
+
+    with patch.object(api, "_kolada_client", client), patch.object(
+        kolada_pages, "KOLADA_PAGE_CONCURRENCY", 2
+    ):
+        result = await api._fetch_kolada_pages(BASE)
+
+    assert result == {"count": 10, "values": [{"n": i} for i in range(10)]}
+    assert len(state["urls"]) == 4
+    assert state["max_in_flight"] == 2
+
+
+@pytest.mark.asyncio
+async def test_without_a_total_count_next_page_links_are_followed():
+    pages = {p: data_page(p, 7, 3, count=False) for p in range(1, 4)}
+    client, state = make_client(pages)
+
+    with patch.object(api, "_kolada_client", client):
+        result = await api._fetch_kolada_pages(BASE)
+
+    assert [v["n"] for v in result["values"]] == list(range(7))
+    assert state["max_in_flight"] == 1
+
+
+@pytest.mark.asyncio
+async def test_link_cycles_stop_the_walk():
+    pages = {1: data_page(1, 6, 3, count=False), 2: data_page(2, 6, 3, count=False)}
+    pages[2]["next_page"] = f"{BASE}?page=2&per_page=3"
+    client, state = make_client(pages)
+
+    with patch.object(api, "_kolada_client", client):
+        result = await api._fetch_kolada_pages(BASE)
+
+    assert result["count"] == 6
+    assert len(state["urls"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_page_returns_an_error():
+    pages = {p: data_page(p, 9, 3) for p in range(1, 4)}
+    client, _ = make_client(pages, fail={3})
+
+    with patch.object(api, "_kolada_client", client):
+        result = await api._fetch_kolada_pages(BASE)
+
+    assert "Error accessing Kolada API" in result["error"]
+    assert "page=3" in result["endpoint"]
@@ -0,0 +1,54 @@
+import numpy as np
+
+from services.lexical_index import Bm25Index, reciprocal_rank_fusion, tokenize
+
+KPIS = [
+    {"id": "N00945", "title": "Invånare totalt", "operating_area": "Befolkning"},
+    {
+        "id": "N15033",
+        "title": "Elever i åk 9 som uppnått kunskapskraven",
+        "description": "Andel elever enligt SCB, inklusive elever med NPF.",
+        "operating_area": "Grundskola",
+    },
+    {"id": "N17473", "title": "Elever i gymnasieskolan", "operating_area": "Gymnasieskola"},
+    {"title": "KPI without id"},
+]
+
+
+def test_tokenize_casefolds_and_keeps_swedish_letters():
+    """Tokens are case-folded words; å/ä/ö are part of words."""
+    assert tokenize("Åk 9: Elever, NPF-stöd") == ["åk", "9", "elever", "npf", "stöd"]
+
+
+def test_bm25_finds_rare_description_terms():
+    """A term that only appears in a description ranks that KPI first."""
+    index = Bm25Index.build(KPIS)
+    rows, scores = index.search("npf", 5)
+
+    assert len(index) == 3
+    assert [index.kpi_ids[r] for r in rows] == ["N15033"]
+    assert scores[0] > 0
+
+
+def test_bm25_prefers_rarer_terms_and_skips_non_matches():
+    """Documents sharing only common terms score lower; non-matching ones are dropped."""
+    index = Bm25Index.build(KPIS)
+    rows, scores = index.search("elever gymnasieskolan", 5)
+
+    assert [index.kpi_ids[r] for r in rows] == ["N17473", "N15033"]
+    assert np.all(np.diff(scores) <= 0)
+
+
+def test_lookup_id_is_exact_and_case_insensitive():
+    """Only a whole KPI id resolves; partial ids do not."""
+    index = Bm25Index.build(KPIS)
+
+    assert index.lookup_id(" n00945 ") == "N00945"
+    assert index.lookup_id("N0094") is None
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    """Items ranked by both lists beat items ranked high by only one."""
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "d"]], k=60)
+
+    assert [item for item, _ in fused] == ["b", "a", "d", "c"]
@@ -0,0 +1,227 @@
+import asyncio
+from urllib.parse import parse_qs, urlparse
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+
+from lifespan.context import _revalidate_metadata
+from services.kolada_pages import fetch_kpi_catalogue
+from services.snapshot import build_metadata_snapshot
+
+
+def make_response(payload):
+    """Build a mock httpx response returning the given JSON payload."""
+    response = MagicMock()
+    response.json.return_value = payload
+    response.raise_for_status = MagicMock()
+    return response
+
+
+def make_paged_client(pages, delays=None):
+    """
+    Build a mock client serving KPI catalogue pages keyed by page number.
+    Pages listed in `delays` are answered after the given number of seconds.
+    """
+    delays = delays or {}
+    state = {"in_flight": 0, "max_in_flight": 0, "urls": []}
+
+    async def get(url, timeout=None):
+        state["urls"].append(url)
+        page = int(parse_qs(urlparse(url).query).get("page", ["1"])[0])
+        state["in_flight"] += 1
+        state["max_in_flight"] = max(state["max_in_flight"], state["in_flight"])
+        try:
+            await asyncio.sleep(delays.get(page, 0))
+            return make_response(pages[page])
+        finally:
+            state["in_flight"] -= 1
+
+    client = MagicMock()
+    client.get = get
+    return client, state
+
+
+def kpi_page(page, total, per_page, has_next):
+    """Build a Kolada-style KPI catalogue page."""
+    start = (page - 1) * per_page
+    values = [{"id": f"N{i:05d}"} for i in range(start, min(start + per_page, total))]
+    payload = {"count": total, "values": values}
+    if has_next:
+        payload["next_page"] = f"https://kolada/kpi?page={page + 1}&per_page={per_page}"
+    return payload
+
+
+@pytest.mark.asyncio
+async def test_fetch_kpi_catalogue_parallel_keeps_page_order():
+    """Remaining pages are fetched concurrently but merged in page order."""
+    pages = {p: kpi_page(p, 10, 3, p < 4) for p in range(1, 5)}
+    client, state = make_paged_client(pages, delays={2: 0.03, 3: 0.01})
+
+    with patch("services.kolada_pages.KPI_PER_PAGE", 3), patch(
+        "services.kolada_pages.KOLADA_PAGE_CONCURRENCY", 2
+    ):
+        kpis = await fetch_kpi_catalogue(client)
+
+    assert [k["id"] for k in kpis] == [f"N{i:05d}" for i in range(10)]
+    assert len(state["urls"]) == 4
+    assert state["max_in_flight"] == 2
+
+
+@pytest.mark.asyncio
+async def test_fetch_kpi_catalogue_falls_back_to_next_page_links():
+    """Without a usable total count, next_page links are followed sequentially."""
+    pages = {p: kpi_page(p, 6, 3, p < 2) for p in range(1, 3)}
+    for payload in pages.values():
+        payload.pop("count")
+    client, state = make_paged_client(pages)
+
+    with patch("services.kolada_pages.KPI_PER_PAGE", 3):
+        kpis = await fetch_kpi_catalogue(client)
+
+    assert [k["id"] for k in kpis] == [f"N{i:05d}" for i in range(6)]
+    assert state["max_in_flight"] == 1
+
+
+@pytest.mark.asyncio
+async def test_fetch_kpi_catalogue_raises_on_failed_page():
+    """A failing page aborts the catalogue fetch with a RuntimeError."""
+    pages = {p: kpi_page(p, 6, 3, p < 2) for p in range(1, 3)}
+    client, _ = make_paged_client(pages)
+    original_get = client.get
+
+    async def failing_get(url, timeout=None):
+        if "page=2" in url:
+            raise httpx.ConnectError("boom")
+        return await original_get(url, timeout=timeout)
+
+    client.get = failing_get
+
+    with patch("services.kolada_pages.KPI_PER_PAGE", 3):
+        with pytest.raises(RuntimeError, match="Failed to initialize Kolada KPI cache"):
+            await fetch_kpi_catalogue(client)
+
+
+@pytest.mark.asyncio
+async def test_fetch_kpi_catalogue_reuses_a_fetched_first_page():
+    pages = {p: kpi_page(p, 6, 3, p < 2) for p in range(1, 3)}
+    client, state = make_paged_client(pages)
+
+    with patch("services.kolada_pages.KPI_PER_PAGE", 3):
+        kpis = await fetch_kpi_catalogue(client, first_page=pages[1])
+
+    assert [k["id"] for k in kpis] == [f"N{i:05d}" for i in range(6)]
+    assert state["urls"] == ["https://kolada/kpi?page=2&per_page=3"]
+
+
+@pytest.mark.asyncio
+async def test_revalidate_metadata_not_modified_keeps_context():
+    """A 304 for page 1 and unchanged remaining metadata leave the context untouched."""
+    snapshot = build_metadata_snapshot(
+        [{"id": "N00001", "title": "A"}],
+        [{"id": "0180", "title": "Stockholm"}],
+        [],
+        {"etag": '"v1"'},
+    )
+    context_data = {"kpi_cache": snapshot["kpi_cache"]}
+
+    client = MagicMock()
+    client.get = AsyncMock(return_value=MagicMock(status_code=304))
+    client.__aenter__ = AsyncMock(return_value=client)
+    client.__aexit__ = AsyncMock(return_value=None)
+
+    with patch("httpx.AsyncClient", return_value=client), patch(
+        "lifespan.context._fetch_municipalities",
+        AsyncMock(return_value=snapshot["municipality_cache"]),
+    ), patch("lifespan.context.save_metadata_snapshot") as mock_save:
+        await _revalidate_metadata(context_data, snapshot)
+
+    assert client.get.call_args.kwargs["headers"] == {"If-None-Match": '"v1"'}
+    client.get.assert_awaited_once()  # A single-page catalogue needs no further KPI request
+    mock_save.assert_not_called()
+    assert context_data == {"kpi_cache": snapshot["kpi_cache"]}
+
+
+@pytest.mark.asyncio
+async def test_revalidate_metadata_checks_later_pages_and_municipalities_after_304():
+    """A 304 for page 1 still picks up changes on later pages and in the municipality list."""
+    old_kpis = [kpi_page(1, 6, 3, False)["values"], kpi_page(2, 6, 3, False)["values"]]
+    snapshot = build_metadata_snapshot(
+        old_kpis[0] + old_kpis[1], [{"id": "0180", "title": "Stockholm"}], [], {"etag": '"v1"'}
+    )
+    page_2 = kpi_page(2, 6, 3, False)
+    page_2["values"][0]["title"] = "Changed"
+    new_municipalities = [{"id": "0180", "title": "Stockholm"}, {"id": "1280", "title": "Malmö"}]
+    old_store = MagicMock()
+    old_store.wait_until_ready = AsyncMock(return_value=True)
+    new_store = MagicMock()
+    new_store.wait_until_ready = AsyncMock(return_value=True)
+    context_data = {"kpi_cache": snapshot["kpi_cache"], "kpi_embedding_store": old_store}
+
+    async def get(url, headers=None, timeout=None):
+        return MagicMock(status_code=304) if headers else make_response(page_2)
+
+    client = MagicMock()
+    client.get = AsyncMock(side_effect=get)
+    client.__aenter__ = AsyncMock(return_value=client)
+    client.__aexit__ = AsyncMock(return_value=None)
+
+    with patch("lifespan.context.KPI_PER_PAGE", 3), patch(
+        "services.kolada_pages.KPI_PER_PAGE", 3
+    ), patch("httpx.AsyncClient", return_value=client), patch(
+        "lifespan.context._fetch_municipalities", AsyncMock(return_value=new_municipalities)
+    ), patch(
+        "lifespan.context.KpiEmbeddingStore", return_value=new_store
+    ), patch("lifespan.context.save_metadata_snapshot") as mock_save:
+        await _revalidate_metadata(context_data, snapshot)
+
+    assert [call.args[0] for call in client.get.await_args_list][1:] == [
+        "https://api.kolada.se/v2/kpi?page=2&per_page=3"
+    ]
+    assert context_data["kpi_cache"] == old_kpis[0] + page_2["values"]
+    assert context_data["municipality_cache"] == new_municipalities
+    assert mock_save.call_args[0][0]["validators"] == {"etag": '"v1"'}
+
+
+@pytest.mark.asyncio
+async def test_revalidate_metadata_swaps_in_changed_catalogue(tmp_path):
+    """Changed metadata replaces the context caches and rewrites the snapshot."""
+    snapshot = build_metadata_snapshot(
+        [{"id": "N00001", "title": "A"}], [{"id": "0180", "title": "Stockholm"}], []
+    )
+    old_store = MagicMock()
+    old_store.wait_until_ready = AsyncMock(return_value=True)
+    new_store = MagicMock()
+    new_store.wait_until_ready = AsyncMock(return_value=True)
+    context_data = {"kpi_cache": snapshot["kpi_cache"], "kpi_embedding_store": old_store}
+    new_kpis = [{"id": "N00001", "title": "A"}, {"id": "N00002", "title": "B"}]
+
+    first_page = {"count": 2, "values": new_kpis}
+    response = MagicMock(status_code=200, headers={"ETag": '"v2"'})
+    response.json.return_value = first_page
+    client = MagicMock()
+    client.get = AsyncMock(return_value=response)
+    client.__aenter__ = AsyncMock(return_value=client)
+    client.__aexit__ = AsyncMock(return_value=None)
+
+    mock_catalogue = AsyncMock(return_value=new_kpis)
+    with patch("httpx.AsyncClient", return_value=client), patch(
+        "lifespan.context.fetch_kpi_catalogue", mock_catalogue
+    ), patch(
+        "lifespan.context._fetch_municipalities",
+        AsyncMock(return_value=snapshot["municipality_cache"]),
+    ), patch(
+        "lifespan.context.KpiEmbeddingStore", return_value=new_store
+    ), patch("lifespan.context.save_metadata_snapshot") as mock_save:
+        await _revalidate_metadata(context_data, snapshot)
+
+    # The revalidation response is reused as the first catalogue page
+    client.get.assert_awaited_once()
+    mock_catalogue.assert_awaited_once_with(client, first_page=first_page)
+    assert context_data["kpi_cache"] == new_kpis
+    assert set(context_data["kpi_map"]) == {"N00001", "N00002"}
+    assert context_data["kpi_embedding_store"] is new_store
+    new_store.start.assert_called_once_with(new_kpis, model=old_store.model)
+    saved = mock_save.call_args[0][0]
+    assert saved["kpi_cache"] == new_kpis
+    assert saved["validators"] == {"etag": '"v2"'}
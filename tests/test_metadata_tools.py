@@ -0,0 +1,220 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import numpy as np
+import pytest
+
+from services.data_processing import build_area_rows, build_operating_area_index
+from services.lexical_index import Bm25Index
+from services.quantization import QuantizedEmbeddings
+from tools.metadata_tools import (
+    complete_kpi,
+    get_kpis_by_operating_area,
+    search_kpis,
+    search_kpis_batch,
+)
+
+KPI_MAP = {
+    "N00001": {"id": "N00001", "title": "Invånare totalt", "operating_area": "Befolkning"},
+    "N00002": {"id": "N00002", "title": "Arbetslöshet", "operating_area": "Arbetsmarknad"},
+    "N00003": {
+        "id": "N00003",
+        "title": "Elever i åk 9",
+        "operating_area": "Grundskola, Befolkning",
+    },
+}
+
+
+@pytest.fixture
+def mock_context():
+    """Mock MCP context with a ready embedding store over three KPIs."""
+    embeddings = np.eye(3, dtype=np.float32)
+    store = MagicMock()
+    store.wait_until_ready = AsyncMock(return_value=True)
+    store.embeddings = QuantizedEmbeddings(embeddings)
+    store.kpi_ids = ["N00001", "N00002", "N00003"]
+    store.kpi_rows = {"N00001": 0, "N00002": 1, "N00003": 2}
+    store.area_rows = build_area_rows(list(KPI_MAP.values()), store.kpi_rows)
+    store.ann_index = None
+    store.encode_queries = AsyncMock(
+        return_value=np.array([[0.6, 0.8, 0.0]], dtype=np.float32)
+    )
+
+    ctx = MagicMock()
+    ctx.request_context.lifespan_context = {
+        "kpi_map": KPI_MAP,
+        "kpi_embedding_store": store,
+    }
+    return ctx
+
+
+@pytest.mark.asyncio
+async def test_search_kpis_returns_ranked_kpis(mock_context):
+    """Results are ordered by similarity and carry no score by default."""
+    results = await search_kpis("arbete", mock_context, limit=2)
+
+    assert [r["id"] for r in results] == ["N00002", "N00001"]
+    assert "score" not in results[0]
+
+
+@pytest.mark.asyncio
+async def test_search_kpis_scores_and_cutoff(mock_context):
+    """include_scores adds similarities and min_score stops at the cutoff."""
+    results = await search_kpis(
+        "arbete", mock_context, limit=3, include_scores=True, min_score=0.5
+    )
+
+    assert [(r["id"], r["score"]) for r in results] == [("N00002", 0.8), ("N00001", 0.6)]
+    assert "score" not in KPI_MAP["N00002"]
+
+
+@pytest.mark.asyncio
+async def test_search_kpis_returns_empty_when_embeddings_not_ready(mock_context):
+    """A store that is not ready within the timeout yields an empty list."""
+    store = mock_context.request_context.lifespan_context["kpi_embedding_store"]
+    store.wait_until_ready.return_value = False
+
+    assert await search_kpis("arbete", mock_context) == []
+
+
+@pytest.mark.asyncio
+async def test_search_kpis_batch_ranks_each_keyword_and_merges(mock_context):
+    """Each keyword gets its own ranking; the merged list keeps each KPI's best score."""
+    store = mock_context.request_context.lifespan_context["kpi_embedding_store"]
+    store.encode_queries.return_value = np.array(
+        [[0.6, 0.8, 0.0], [0.0, 0.3, 0.95]], dtype=np.float32
+    )
+
+    result = await search_kpis_batch(
+        ["arbete", "skola"], mock_context, limit=2, include_scores=True, merge=True
+    )
+
+    store.encode_queries.assert_called_once_with(["arbete", "skola"])
+    assert [r["keyword"] for r in result["results"]] == ["arbete", "skola"]
+    assert [k["id"] for k in result["results"][0]["kpis"]] == ["N00002", "N00001"]
+    assert [k["id"] for k in result["results"][1]["kpis"]] == ["N00003", "N00002"]
+    assert [(k["id"], k["score"]) for k in result["merged"]] == [
+        ("N00003", 0.95),
+        ("N00002", 0.8),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_search_kpis_batch_returns_empty_lists_when_not_ready(mock_context):
+    """Unavailable embeddings give an empty list for every keyword."""
+    store = mock_context.request_context.lifespan_context["kpi_embedding_store"]
+    store.wait_until_ready.return_value = False
+
+    result = await search_kpis_batch(["a", "b"], mock_context)
+
+    assert result == {"results": [{"keyword": "a", "kpis": []}, {"keyword": "b", "kpis": []}]}
+
+
+@pytest.mark.asyncio
+async def test_search_kpis_exact_id_skips_the_model(mock_context):
+    """An exact KPI id is answered from the lexical index without encoding."""
+    lifespan = mock_context.request_context.lifespan_context
+    lifespan["kpi_lexical_index"] = Bm25Index.build(list(KPI_MAP.values()))
+
+    results = await search_kpis("n00003", mock_context, include_scores=True)
+
+    assert results == [{**KPI_MAP["N00003"], "score": 1.0}]
+    lifespan["kpi_embedding_store"].encode_queries.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_search_kpis_hybrid_adds_lexical_matches(mock_context):
+    """A word the dense ranking misses is pulled in by BM25 and keeps its cosine score."""
+    lifespan = mock_context.request_context.lifespan_context
+    lifespan["kpi_lexical_index"] = Bm25Index.build(list(KPI_MAP.values()))
+
+    hybrid = await search_kpis("elever", mock_context, limit=2, include_scores=True)
+    dense = await search_kpis("elever", mock_context, limit=2, hybrid=False)
+
+    assert [r["id"] for r in dense] == ["N00002", "N00001"]
+    assert [(r["id"], r["score"]) for r in hybrid] == [("N00003", 0.0), ("N00002", 0.8)]
+
+
+@pytest.mark.asyncio
+async def test_search_kpis_hybrid_applies_min_score_to_lexical_matches(mock_context):
+    """A keyword-only match below the cutoff is dropped and does not take a slot."""
+    lifespan = mock_context.request_context.lifespan_context
+    lifespan["kpi_lexical_index"] = Bm25Index.build(list(KPI_MAP.values()))
+
+    results = await search_kpis(
+        "elever", mock_context, limit=5, include_scores=True, min_score=0.5
+    )
+    top_two = await search_kpis("elever", mock_context, limit=2, min_score=0.5)
+
+    assert [(r["id"], r["score"]) for r in results] == [("N00002", 0.8), ("N00001", 0.6)]
+    assert [r["id"] for r in top_two] == ["N00002", "N00001"]
+
+
+@pytest.mark.asyncio
+async def test_search_kpis_falls_back_to_lexical_when_not_ready(mock_context):
+    """Without embeddings the hybrid search still returns keyword matches."""
+    lifespan = mock_context.request_context.lifespan_context
+    lifespan["kpi_lexical_index"] = Bm25Index.build(list(KPI_MAP.values()))
+    lifespan["kpi_embedding_store"].wait_until_ready.return_value = False
+
+    results = await search_kpis("arbetslöshet", mock_context)
+
+    assert results == [KPI_MAP["N00002"]]
+
+
+@pytest.mark.asyncio
+async def test_search_kpis_filters_by_operating_area(mock_context):
+    """Only KPIs of the requested area are scored and returned."""
+    lifespan = mock_context.request_context.lifespan_context
+    lifespan["kpi_lexical_index"] = Bm25Index.build(list(KPI_MAP.values()))
+
+    results = await search_kpis("arbete", mock_context, operating_area="befolkning ")
+    exact_id_outside_area = await search_kpis(
+        "N00002", mock_context, operating_area="Grundskola"
+    )
+    unknown = await search_kpis("arbete", mock_context, operating_area="Rymdfart")
+
+    assert [r["id"] for r in results] == ["N00001", "N00003"]
+    assert [r["id"] for r in exact_id_outside_area] == ["N00003"]
+    assert unknown == []
+
+
+def test_operating_area_index_is_case_insensitive_and_keeps_order():
+    """Multi-area KPIs are listed under every area, keyed by lower-cased name."""
+    index = build_operating_area_index(list(KPI_MAP.values()))
+
+    assert index["befolkning"] == ["N00001", "N00003"]
+    assert index["grundskola"] == ["N00003"]
+
+
+@pytest.mark.asyncio
+async def test_get_kpis_by_operating_area_uses_index_and_projects_fields(mock_context):
+    """Lookups go through the area index and can drop unwanted fields."""
+    lifespan = mock_context.request_context.lifespan_context
+    lifespan["kpi_area_index"] = build_operating_area_index(list(KPI_MAP.values()))
+
+    full = await get_kpis_by_operating_area("BEFOLKNING", mock_context)
+    projected = await get_kpis_by_operating_area(
+        "Befolkning", mock_context, fields=["title"]
+    )
+
+    assert full == [KPI_MAP["N00001"], KPI_MAP["N00003"]]
+    assert projected == [
+        {"id": "N00001", "title": "Invånare totalt"},
+        {"id": "N00003", "title": "Elever i åk 9"},
+    ]
+    assert await get_kpis_by_operating_area("Rymdfart", mock_context) == []
+
+
+@pytest.mark.asyncio
+async def test_complete_kpi_returns_ids_and_titles_without_encoding(mock_context):
+    """Completions come from the prefix index; the limit is capped."""
+    results = await complete_kpi("n0000", mock_context, limit=2)
+
+    assert results == [
+        {"id": "N00001", "title": "Invånare totalt"},
+        {"id": "N00002", "title": "Arbetslöshet"},
+    ]
+    assert [r["id"] for r in await complete_kpi("elever", mock_context)] == ["N00003"]
+    assert len(await complete_kpi("N", mock_context, limit=1000)) == 3
+    store = mock_context.request_context.lifespan_context["kpi_embedding_store"]
+    store.encode_queries.assert_not_called()
@@ -0,0 +1,83 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from services.municipality_index import MunicipalityIndex, normalize_name
+from tools.municipality_tools import resolve_municipality
+
+MUNICIPALITIES = [
+    {"id": "0180", "title": "Stockholm", "type": "K"},
+    {"id": "0001", "title": "Region Stockholm", "type": "L"},
+    {"id": "1280", "title": "Malmö", "type": "K"},
+    {"id": "1480", "title": "Göteborg", "type": "K"},
+    {"id": "1490", "title": "Borås", "type": "K"},
+    {"id": "0014", "title": "Västra Götalandsregionen", "type": "L"},
+    {"id": "0305", "title": "Håbo", "type": "K"},
+    {"id": "0643", "title": "Habo", "type": "K"},
+]
+
+
+@pytest.fixture
+def index():
+    return MunicipalityIndex(MUNICIPALITIES)
+
+
+def test_normalize_name_folds_diacritics_and_drops_affixes():
+    assert normalize_name("Göteborgs  Stad") == "goteborgs"
+    assert normalize_name("Region Skåne") == "skane"
+    assert normalize_name("Västra Götalandsregionen") == "vastra gotalands"
+
+
+def test_exact_match_ignores_case_and_genitive_suffix(index):
+    """'Göteborgs kommun' resolves exactly, and on its own."""
+    assert index.resolve("Göteborgs kommun") == [
+        {"id": "1480", "name": "Göteborg", "type": "K", "score": 1.0}
+    ]
+    assert index.resolve("MALMO") == [
+        {"id": "1280", "name": "Malmö", "type": "K", "score": 0.95}
+    ]
+    assert [c["id"] for c in index.resolve("1490")] == ["1490"]
+
+
+def test_diacritics_decide_between_otherwise_equal_names(index):
+    assert [(c["id"], c["score"]) for c in index.resolve("Habo")] == [("0643", 1.0), ("0305", 0.95)]
+    assert [(c["id"], c["score"]) for c in index.resolve("håbo")] == [("0305", 1.0), ("0643", 0.95)]
+
+
+def test_typos_rank_the_intended_name_first(index):
+    candidates = index.resolve("Gotebrog")
+
+    assert candidates[0]["id"] == "1480"
+    assert 0 < candidates[0]["score"] < 1
+    assert index.resolve("Västra Götaland")[0]["id"] == "0014"
+    assert index.resolve("xyz") == []
+
+
+def test_ties_prefer_municipalities(index):
+    assert [c["id"] for c in index.resolve("Stockholm")] == ["0180", "0001"]
+    assert [c["id"] for c in index.resolve("Stockholm", municipality_type="L")] == ["0001"]
+
+
+def test_only_the_named_kind_of_body_matches_exactly(index):
+    """'Region X' is not an exact match for the municipality X, and vice versa."""
+    assert [(c["id"], c["score"]) for c in index.resolve("Region Stockholm")] == [
+        ("0001", 1.0),
+        ("0180", 0.9),
+    ]
+    assert [(c["id"], c["score"]) for c in index.resolve("Stockholms stad")] == [
+        ("0180", 1.0),
+        ("0001", 0.9),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_resolve_municipality_tool_keeps_input_order(index):
+    ctx = MagicMock()
+    ctx.request_context.lifespan_context = {"municipality_index": index}
+
+    result = await resolve_municipality(["borås", "Malmö stad"], ctx, limit=1)
+
+    assert [(r["query"], r["candidates"][0]["id"]) for r in result] == [
+        ("borås", "1490"),
+        ("Malmö stad", "1280"),
+    ]
@@ -0,0 +1,37 @@
+from services.prefix_index import KpiPrefixIndex, normalize_title
+
+KPIS = [
+    {"id": "N00945", "title": "Kostnad per elev, grundskola"},
+    {"id": "N00901", "title": "Invånare totalt, antal"},
+    {"id": "N09001", "title": "Elever i åk 9, andel"},
+    {"id": "U00002", "title": "Nettokostnad äldreomsorg"},
+    {"title": "Saknar id"},
+]
+
+
+def test_normalize_title_drops_punctuation_and_case():
+    assert normalize_title("Kostnad  per elev, Grundskola") == "kostnad per elev grundskola"
+
+
+def test_id_prefix_is_case_insensitive_and_sorted():
+    index = KpiPrefixIndex(KPIS)
+
+    assert len(index) == 4
+    assert index.complete("n009") == ["N00901", "N00945"]
+    assert index.complete("N0") == ["N00901", "N00945", "N09001"]
+
+
+def test_title_matches_come_before_later_word_matches():
+    index = KpiPrefixIndex(KPIS)
+
+    assert index.complete("elev") == ["N09001", "N00945"]
+    assert index.complete("Kostnad per") == ["N00945"]
+    assert index.complete("äldre") == ["U00002"]
+
+
+def test_results_are_bounded_and_empty_prefixes_match_nothing():
+    index = KpiPrefixIndex(KPIS)
+
+    assert index.complete("N", limit=2) == ["N00901", "N00945"]
+    assert index.complete("  ") == []
+    assert index.complete("zzz") == []
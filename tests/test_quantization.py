@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from services.quantization import (
+    QuantizedEmbeddings,
+    choose_quantization,
+    measure_recall,
+    quantize_embeddings,
+)
+
+
+@pytest.fixture
+def embeddings():
+    """Random unit vectors standing in for KPI title embeddings."""
+    rng = np.random.default_rng(42)
+    matrix = rng.normal(size=(2000, 64)).astype(np.float32)
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+@pytest.mark.parametrize("precision,ratio", [("float16", 2), ("int8", 3.5)])
+def test_quantization_shrinks_matrix_and_keeps_scores(embeddings, precision, ratio):
+    """Reduced precision cuts memory while keeping scores close to float32."""
+    quantized = quantize_embeddings(embeddings, precision)
+    query = embeddings[7]
+
+    assert quantized.precision == precision
+    assert embeddings.nbytes / quantized.nbytes >= ratio
+    np.testing.assert_allclose(quantized.score(query), embeddings @ query, atol=0.02)
+
+
+def test_score_handles_query_matrices_and_row_subsets(embeddings):
+    """Scoring supports several queries at once and a subset of rows."""
+    quantized = quantize_embeddings(embeddings, "int8")
+    queries = embeddings[:3].T
+    rows = np.array([5, 1, 1999])
+
+    assert quantized.score(queries).shape == (2000, 3)
+    np.testing.assert_allclose(
+        quantized.score_rows(embeddings[0], rows), embeddings[rows] @ embeddings[0], atol=0.02
+    )
+
+
+def test_measure_recall_is_perfect_for_float32(embeddings):
+    """Exact float32 scoring has recall 1.0 against itself."""
+    queries = embeddings[:20]
+    assert measure_recall(embeddings, QuantizedEmbeddings(embeddings), queries) == 1.0
+
+
+def test_choose_quantization_falls_back_below_tolerance(embeddings):
+    """An unreachable recall tolerance falls back to float32."""
+    quantized, recall = choose_quantization(embeddings, "int8", tolerance=0.9)
+    assert quantized.precision == "int8"
+    assert recall >= 0.9
+
+    quantized, recall = choose_quantization(embeddings, "int8", tolerance=1.01)
+    assert quantized.precision == "float32"
+    assert recall == 1.0
+
+
+def test_unsupported_precision_is_rejected(embeddings):
+    """Unknown precisions raise a ValueError."""
+    with pytest.raises(ValueError, match="Unsupported embedding precision"):
+        quantize_embeddings(embeddings, "int4")
@@ -0,0 +1,50 @@
+import numpy as np
+
+from services.query_cache import QueryEmbeddingCache, normalize_query
+
+
+def test_normalize_query_collapses_whitespace_and_keeps_case():
+    """Whitespace variants share a key; case is preserved for the cased model."""
+    assert normalize_query("  skola \t i  Sverige ") == "skola i Sverige"
+    assert normalize_query("Skola") != normalize_query("skola")
+    assert normalize_query("ä") == "ä"
+
+
+def test_lru_evicts_least_recently_used_and_counts():
+    """The cache stays bounded, evicts the oldest entry and tracks hits and misses."""
+    cache = QueryEmbeddingCache(max_entries=2)
+    cache.put("a", np.ones(3))
+    cache.put("b", np.ones(3))
+    assert cache.get("a") is not None  # "a" is now most recently used
+    cache.put("c", np.ones(3))
+
+    assert cache.get("b") is None
+    assert cache.get("c") is not None
+    assert len(cache) == 2
+    assert cache.stats() == {"entries": 2, "hits": 2, "misses": 1, "hit_rate": 2 / 3}
+
+
+def test_save_and_load_roundtrip(tmp_path):
+    """Persisted entries come back in LRU order without pickling."""
+    path = str(tmp_path / "queries.npz")
+    cache = QueryEmbeddingCache(max_entries=10)
+    cache.put("skola", np.array([1.0, 0.0], dtype=np.float32))
+    cache.put("arbetslöshet", np.array([0.0, 1.0], dtype=np.float32))
+    cache.save(path)
+
+    restored = QueryEmbeddingCache(max_entries=1)
+    restored.load(path)
+
+    assert len(restored) == 1
+    np.testing.assert_array_equal(restored.get("arbetslöshet"), [0.0, 1.0])
+
+
+def test_load_ignores_corrupt_file(tmp_path):
+    """An unreadable cache file leaves the cache empty."""
+    path = tmp_path / "queries.npz"
+    path.write_bytes(b"not a zip file")
+
+    cache = QueryEmbeddingCache(max_entries=10)
+    cache.load(str(path))
+
+    assert len(cache) == 0
@@ -0,0 +1,79 @@
+import asyncio
+import threading
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+from services.query_encoder import QueryEncoder
+
+
+def recording_model(fail=False):
+    """Mock model whose encode records each batch and the thread it ran on."""
+    calls = []
+
+    def encode(texts, **kwargs):
+        calls.append((list(texts), threading.current_thread()))
+        if fail:
+            raise RuntimeError("model exploded")
+        return np.array([[float(len(t)), 1.0] for t in texts], dtype=np.float32)
+
+    model = MagicMock()
+    model.encode.side_effect = encode
+    return model, calls
+
+
+@pytest.mark.asyncio
+async def test_concurrent_queries_share_one_batch_off_the_event_loop():
+    """Queries arriving together are encoded in one call in a worker thread."""
+    model, calls = recording_model()
+    encoder = QueryEncoder(model, max_wait=0.01)
+
+    results = await asyncio.gather(
+        encoder.encode(["a"]), encoder.encode(["bb", "ccc"]), encoder.encode(["dddd"])
+    )
+
+    assert len(calls) == 1
+    assert calls[0][0] == ["a", "bb", "ccc", "dddd"]
+    assert calls[0][1] is not threading.current_thread()
+    assert [r[:, 0].tolist() for r in results] == [[1.0], [2.0, 3.0], [4.0]]
+    assert (encoder.batches, encoder.texts_encoded) == (1, 4)
+
+
+@pytest.mark.asyncio
+async def test_batches_are_capped_at_max_batch_size():
+    """Requests beyond max_batch_size texts go into a following batch."""
+    model, calls = recording_model()
+    encoder = QueryEncoder(model, max_batch_size=3, max_wait=0.01)
+
+    await asyncio.gather(*(encoder.encode([str(i) * 2]) for i in range(5)))
+
+    assert [len(texts) for texts, _ in calls] == [3, 2]
+
+
+@pytest.mark.asyncio
+async def test_encode_failure_reaches_every_caller_in_the_batch():
+    """A failing model call raises for each waiting caller."""
+    model, _ = recording_model(fail=True)
+    encoder = QueryEncoder(model, max_wait=0.01)
+
+    results = await asyncio.gather(
+        encoder.encode(["a"]), encoder.encode(["b"]), return_exceptions=True
+    )
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+@pytest.mark.asyncio
+async def test_close_cancels_pending_requests():
+    """Requests still waiting for their batch are cancelled on close."""
+    model, calls = recording_model()
+    encoder = QueryEncoder(model, max_wait=1.0)
+
+    pending = asyncio.create_task(encoder.encode(["a"]))
+    await asyncio.sleep(0)
+    await encoder.close()
+
+    with pytest.raises(asyncio.CancelledError):
+        await pending
+    assert calls == []
@@ -0,0 +1,85 @@
+from datetime import date
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.services.api import fetch_data_from_riksbank
+from src.services.response_cache import ResponseCache, make_cache_key, response_ttl
+
+TODAY = date(2024, 6, 15)
+
+
+def test_cache_key_normalizes_endpoint_and_param_order():
+    assert make_cache_key("SWEA", "calendar", {"b": 1, "a": 2}) == make_cache_key(
+        "swea", "/calendar", {"a": 2, "b": 1}
+    )
+    assert make_cache_key("swea", "/x", {"a": 1}) != make_cache_key("tora", "/x", {"a": 1})
+
+
+def test_ttl_depends_on_how_recent_the_range_is():
+    historical = response_ttl("/interestrate", {"fromDate": "2020-01-01", "toDate": "2020-12-31"}, TODAY)
+    recent = response_ttl("/interestrate", {"fromDate": "2024-06-01", "toDate": "2024-06-14"}, TODAY)
+    open_ended = response_ttl("/interestrate", {"fromDate": "2020-01-01"}, TODAY)
+    calendar = response_ttl("/calendar/calendardays", {"fromDate": "2024-06-15"}, TODAY)
+
+    assert historical > calendar > recent
+    assert open_ended == recent
+
+
+def test_hits_misses_and_expiry():
+    cache = ResponseCache()
+    key = make_cache_key("tora", "/interestrate", {})
+
+    assert cache.get(key) is None
+    cache.put(key, {"values": [1]}, ttl=60)
+    first = cache.get(key)
+    first["values"].append(2)  # Callers get their own copy
+
+    assert cache.get(key) == {"values": [1]}
+    with patch("src.services.response_cache.time.monotonic", return_value=10**12):
+        assert cache.get(key) is None
+    assert cache.stats() == {
+        "entries": 0,
+        "size_bytes": 0,
+        "hits": 2,
+        "misses": 2,
+        "evictions": 0,
+    }
+
+
+def test_least_recently_used_entries_are_evicted_to_fit_the_byte_budget():
+    cache = ResponseCache(max_bytes=60)
+    keys = [make_cache_key("swea", f"/e{i}") for i in range(3)]
+    cache.put(keys[0], {"v": "a" * 15}, ttl=60)
+    cache.put(keys[1], {"v": "b" * 15}, ttl=60)
+    cache.get(keys[0])
+    cache.put(keys[2], {"v": "c" * 15}, ttl=60)
+
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None and cache.get(keys[2]) is not None
+    assert cache.evictions == 1 and cache.size_bytes <= 60
+
+    cache.put(make_cache_key("swea", "/huge"), {"v": "x" * 100}, ttl=60)
+    assert len(cache) == 2
+
+
+@pytest.mark.asyncio
+async def test_fetch_data_from_riksbank_caches_only_when_asked():
+    """Cached GETs skip the API; errors and uncached calls always go through."""
+    fresh = ResponseCache()
+    api = AsyncMock()
+    api.get.return_value = {"data": 1}
+
+    with patch("src.services.api.riksbank_api", api), patch(
+        "src.services.api.riksbank_response_cache", fresh
+    ):
+        await fetch_data_from_riksbank("/interestrate", "tora", params={"a": 1}, cache=True)
+        cached = await fetch_data_from_riksbank("/interestrate", "tora", params={"a": 1}, cache=True)
+        await fetch_data_from_riksbank("/interestrate", "tora", params={"a": 1})
+        api.get.return_value = {"error": "boom"}
+        await fetch_data_from_riksbank("/other", "tora", cache=True)
+        await fetch_data_from_riksbank("/other", "tora", cache=True)
+
+    assert cached == {"data": 1}
+    assert api.get.call_count == 4
+    assert fresh.stats()["hits"] == 1
@@ -162,4 +162,26 @@ async def test_post_method(api_client):
     api_client.request.assert_called_once_with(
         "POST", "/test", "swea", params={"param": "value"}, data=data
     )
-    assert result == {"data": "test_data"} 
\ No newline at end of file
+    assert result == {"data": "test_data"} 
+
+@pytest.mark.asyncio
+async def test_request_uses_injected_client(api_client):
+    """A pooled client set by the lifespan is used instead of a new client per request."""
+    mock_response = MagicMock()
+    mock_response.status_code = 200
+    mock_response.json.return_value = {"data": "pooled"}
+
+    pooled = MagicMock()
+    pooled.request = AsyncMock(return_value=mock_response)
+    api_client.set_client(pooled)
+
+    mock_auth = AsyncMock()
+    mock_auth.get_access_token.return_value = "test_token"
+
+    with patch("httpx.AsyncClient") as mock_client_class:
+        with patch("src.services.riksbank_api.riksbank_auth", mock_auth):
+            result = await api_client.request("GET", "/test-endpoint", "swea")
+
+    assert result == {"data": "pooled"}
+    pooled.request.assert_called_once()
+    mock_client_class.assert_not_called()
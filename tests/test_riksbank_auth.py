@@ -1,3 +1,4 @@
+import asyncio
 import json
 import os
 import time
@@ -128,4 +129,70 @@ async def test_get_access_token_valid_token(auth_instance):
     # Verify _fetch_new_token was NOT called
     auth_instance._fetch_new_token.assert_not_called()
     # Verify the correct token was returned
-    assert token == "valid_token" 
\ No newline at end of file
+    assert token == "valid_token" 
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_token_fetch(auth_instance):
+    """A stale token is refreshed once no matter how many requests are waiting."""
+    calls = 0
+
+    async def slow_fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        auth_instance._access_token = "shared_token"
+        auth_instance._token_expires_at = time.time() + 3600
+
+    auth_instance._fetch_new_token = slow_fetch
+
+    tokens = await asyncio.gather(*(auth_instance.get_access_token() for _ in range(10)))
+
+    assert calls == 1
+    assert tokens == ["shared_token"] * 10
+
+
+@pytest.mark.asyncio
+async def test_failed_shared_fetch_reaches_every_caller_and_is_retried(auth_instance):
+    """All waiters see the failure; the next call starts a fresh fetch."""
+    auth_instance._fetch_new_token = AsyncMock(side_effect=httpx.ConnectError("down"))
+
+    results = await asyncio.gather(
+        auth_instance.get_access_token(), auth_instance.get_access_token(), return_exceptions=True
+    )
+
+    assert all(isinstance(r, httpx.ConnectError) for r in results)
+    assert auth_instance._fetch_new_token.call_count == 1
+    with pytest.raises(httpx.ConnectError):
+        await auth_instance.get_access_token()
+    assert auth_instance._fetch_new_token.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_background_renewal_refreshes_before_expiry(auth_instance):
+    """The renewal task fetches a token up front and again before it expires."""
+    async def fetch():
+        auth_instance._access_token = f"token_{auth_instance._fetch_new_token.call_count}"
+        auth_instance._token_expires_at = time.time() + 0.05
+
+    auth_instance._fetch_new_token = AsyncMock(side_effect=fetch)
+
+    with patch("src.services.auth.RIKSBANK_TOKEN_RENEW_MARGIN", 0.04), patch(
+        "src.services.auth.RIKSBANK_TOKEN_RETRY_DELAY", 0.01
+    ):
+        auth_instance.start_renewal()
+        await asyncio.sleep(0.08)
+        await auth_instance.stop_renewal()
+
+    renewals = auth_instance._fetch_new_token.call_count
+    assert renewals >= 3
+    await asyncio.sleep(0.03)
+    assert auth_instance._fetch_new_token.call_count == renewals
+
+
+@pytest.mark.asyncio
+async def test_start_renewal_without_credentials_does_nothing():
+    with patch.dict(os.environ, {}, clear=True):
+        auth = RiksbankAuth()
+        auth.start_renewal()
+        assert auth._renewal_task is None
@@ -0,0 +1,137 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.services import api
+from src.services.riksbank_api import RiksbankApiClient
+from src.services.single_flight import SingleFlight, request_key
+
+
+def slow(result, delay=0.02, calls=None):
+    """Factory for a call that records itself and returns `result` after `delay`."""
+
+    async def call():
+        if calls is not None:
+            calls.append(result)
+        await asyncio.sleep(delay)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    return call
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_call_and_get_copies():
+    flight = SingleFlight()
+    calls = []
+
+    results = await asyncio.gather(
+        *(flight.run("k", slow({"values": [1]}, calls=calls)) for _ in range(5))
+    )
+
+    assert len(calls) == 1 and flight.coalesced == 4
+    assert all(r == {"values": [1]} for r in results)
+    results[1]["values"].append(2)
+    assert results[0] == {"values": [1]}
+    assert len(flight) == 0
+
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_caller_and_are_not_remembered():
+    flight = SingleFlight()
+    calls = []
+
+    results = await asyncio.gather(
+        *(flight.run("k", slow(ValueError("boom"), calls=calls)) for _ in range(3)),
+        return_exceptions=True,
+    )
+    assert len(calls) == 1
+    assert all(isinstance(r, ValueError) for r in results)
+
+    assert await flight.run("k", slow("ok", calls=calls)) == "ok"
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_the_shared_call():
+    flight = SingleFlight()
+    first = asyncio.create_task(flight.run("k", slow("ok")))
+    second = asyncio.create_task(flight.run("k", slow("unused")))
+    await asyncio.sleep(0)
+
+    first.cancel()
+
+    assert await second == "ok"
+    assert first.cancelled()
+
+
+@pytest.mark.asyncio
+async def test_call_is_cancelled_when_no_caller_waits_anymore():
+    flight = SingleFlight()
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def call():
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    caller = asyncio.create_task(flight.run("k", call))
+    await started.wait()
+    caller.cancel()
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
+
+    assert len(flight) == 0
+    assert await flight.run("k", slow("fresh", delay=0)) == "fresh"
+
+
+def test_request_key_ignores_dict_order():
+    assert request_key("swea", {"a": 1, "b": 2}) == request_key("swea", {"b": 2, "a": 1})
+
+
+@pytest.mark.asyncio
+async def test_fetch_data_from_kolada_coalesces_equivalent_urls():
+    async def fetch_pages(url):
+        await asyncio.sleep(0.02)
+        return {"count": 0, "values": []}
+
+    fetch = AsyncMock(side_effect=fetch_pages)
+    url = "https://api.kolada.se/v2/data/kpi/N00001/year/2020"
+
+    with patch.object(api, "_fetch_kolada_pages", fetch):
+        await asyncio.gather(
+            api.fetch_data_from_kolada(url),
+            api.fetch_data_from_kolada(url + "/"),
+            api.fetch_data_from_kolada(url.replace("https://api.kolada.se", "HTTPS://API.KOLADA.SE")),
+            api.fetch_data_from_kolada(url, cache=False),
+        )
+
+    assert fetch.await_count == 2  # The uncached call does not join the cached one
+
+
+@pytest.mark.asyncio
+async def test_riksbank_client_coalesces_gets_but_not_posts():
+    client = RiksbankApiClient()
+    async def send(*args, **kwargs):
+        await asyncio.sleep(0.02)
+        return {"data": 1}
+
+    client._request = AsyncMock(side_effect=send)
+
+    await asyncio.gather(
+        client.request("GET", "/x", "swea", params={"a": 1}),
+        client.request("GET", "x", "SWEA", params={"a": 1}),
+        client.request("GET", "/x", "swea", params={"a": 2}),
+    )
+    assert client._request.await_count == 2
+
+    await asyncio.gather(
+        client.request("POST", "/x", "swea", data={"a": 1}),
+        client.request("POST", "/x", "swea", data={"a": 1}),
+    )
+    assert client._request.await_count == 4
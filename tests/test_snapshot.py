@@ -0,0 +1,58 @@
+import json
+import os
+
+from services.snapshot import (
+    build_metadata_snapshot,
+    compute_content_hash,
+    load_metadata_snapshot,
+    save_metadata_snapshot,
+)
+
+KPIS = [
+    {"id": "N00945", "title": "Invånare totalt", "operating_area": "Befolkning"},
+    {"id": "N15033", "title": "Elever i åk 9", "operating_area": "Skola"},
+]
+MUNICIPALITIES = [{"id": "0180", "title": "Stockholm", "type": "K"}]
+SUMMARY = [{"operating_area": "Befolkning", "kpi_count": 1}]
+
+
+def test_snapshot_roundtrip(tmp_path):
+    """A saved snapshot is loaded back unchanged, without leftover temp files."""
+    path = str(tmp_path / "snapshot.json")
+    snapshot = build_metadata_snapshot(KPIS, MUNICIPALITIES, SUMMARY, {"etag": '"abc"'})
+
+    save_metadata_snapshot(snapshot, path)
+    loaded = load_metadata_snapshot(path)
+
+    assert loaded == snapshot
+    assert os.listdir(tmp_path) == ["snapshot.json"]
+
+
+def test_load_snapshot_rejects_other_version(tmp_path):
+    """Snapshots written with another format version are ignored."""
+    path = str(tmp_path / "snapshot.json")
+    snapshot = build_metadata_snapshot(KPIS, MUNICIPALITIES, SUMMARY)
+    snapshot["version"] = -1
+    save_metadata_snapshot(snapshot, path)
+
+    assert load_metadata_snapshot(path) is None
+
+
+def test_load_snapshot_handles_missing_and_corrupt_files(tmp_path):
+    """Missing or corrupt snapshot files yield None instead of raising."""
+    path = tmp_path / "snapshot.json"
+    assert load_metadata_snapshot(str(path)) is None
+
+    path.write_text("{not json")
+    assert load_metadata_snapshot(str(path)) is None
+
+
+def test_content_hash_tracks_metadata_changes():
+    """The content hash is stable for equal metadata and changes with edits."""
+    original = compute_content_hash(KPIS, MUNICIPALITIES)
+    reordered_keys = [json.loads(json.dumps(k)) for k in KPIS]
+
+    assert compute_content_hash(reordered_keys, MUNICIPALITIES) == original
+
+    retitled = [dict(KPIS[0], title="Invånare"), KPIS[1]]
+    assert compute_content_hash(retitled, MUNICIPALITIES) != original
@@ -43,7 +43,8 @@ async def test_get_interest_rates_success():
         mock_fetch.assert_called_with(
             endpoint="/interestrate",
             api_type="tora",
-            params={"fromDate": "2024-03-20"}
+            params={"fromDate": "2024-03-20"},
+            cache=True
         )
 
 @pytest.mark.asyncio
@@ -71,7 +72,8 @@ async def test_get_interest_rates_with_filters():
                 "toDate": "2024-03-31",
                 "interestRateId": "REPO",
                 "limit": 50
-            }
+            },
+            cache=True
         )
 
 @pytest.mark.asyncio
@@ -0,0 +1,108 @@
+import numpy as np
+import pytest
+
+from services.quantization import QuantizedEmbeddings
+from services.vector_index import (
+    IvfIndex,
+    search_embeddings,
+    search_embeddings_batch,
+    spherical_kmeans,
+    top_k,
+)
+
+
+@pytest.fixture
+def clustered_embeddings():
+    """Unit vectors drawn around 20 well separated directions."""
+    rng = np.random.default_rng(7)
+    centers = rng.normal(size=(20, 32))
+    rows = centers[rng.integers(0, 20, size=3000)] + rng.normal(0, 0.3, size=(3000, 32))
+    rows /= np.linalg.norm(rows, axis=1, keepdims=True)
+    return QuantizedEmbeddings(rows.astype(np.float32))
+
+
+def test_spherical_kmeans_returns_unit_centroids(clustered_embeddings):
+    """Centroids are normalized and one per requested cluster."""
+    centroids = spherical_kmeans(clustered_embeddings.data, 20)
+    assert centroids.shape == (20, 32)
+    np.testing.assert_allclose(np.linalg.norm(centroids, axis=1), 1.0, rtol=1e-5)
+
+
+def test_ivf_lists_partition_all_rows(clustered_embeddings):
+    """Every row appears in exactly one inverted list."""
+    index = IvfIndex.build(clustered_embeddings)
+    assert index.n_lists == int(np.sqrt(3000))
+    assert index.list_offsets[-1] == 3000
+    assert sorted(index.list_rows.tolist()) == list(range(3000))
+
+
+def test_ivf_search_matches_exact_search(clustered_embeddings):
+    """Probing every list is exact; a few probes keep recall high."""
+    index = IvfIndex.build(clustered_embeddings)
+    query = clustered_embeddings.data[123]
+    exact_rows, exact_scores = search_embeddings(clustered_embeddings, query, 10)
+
+    all_rows, all_scores = search_embeddings(
+        clustered_embeddings, query, 10, index, n_probe=index.n_lists
+    )
+    np.testing.assert_array_equal(all_rows, exact_rows)
+    np.testing.assert_allclose(all_scores, exact_scores)
+
+    probed_rows, _ = search_embeddings(clustered_embeddings, query, 10, index, n_probe=4)
+    assert len(set(probed_rows) & set(exact_rows)) >= 8
+
+
+def test_search_without_index_is_exact_and_sorted(clustered_embeddings):
+    """Without an index the exact scan returns the best rows, best first."""
+    query = clustered_embeddings.data[0]
+    rows, scores = search_embeddings(clustered_embeddings, query, 5)
+
+    assert rows[0] == 0
+    assert np.all(np.diff(scores) <= 0)
+    assert scores[0] == pytest.approx(1.0, abs=1e-5)
+
+
+def test_top_k_selects_best_scores_in_order():
+    """top_k returns the k best indices sorted by descending score."""
+    scores = np.array([0.1, 0.9, 0.3, 0.7, 0.5], dtype=np.float32)
+    np.testing.assert_array_equal(top_k(scores, 3), [1, 3, 4])
+    np.testing.assert_array_equal(top_k(scores, 10), [1, 3, 4, 2, 0])
+    assert top_k(scores, 0).shape == (0,)
+
+
+def test_search_applies_min_score_cutoff(clustered_embeddings):
+    """Rows scoring below min_score are dropped from the results."""
+    query = clustered_embeddings.data[0]
+    rows, scores = search_embeddings(clustered_embeddings, query, 500, min_score=0.8)
+
+    assert 0 < len(rows) < 500
+    assert np.all(scores >= 0.8)
+
+
+def test_batch_search_matches_single_queries(clustered_embeddings):
+    """One matrix-matrix pass gives the same rankings as per-query searches."""
+    queries = clustered_embeddings.data[[0, 10, 20]]
+    batch = search_embeddings_batch(clustered_embeddings, queries, 5, min_score=0.5)
+
+    for query, (rows, scores) in zip(queries, batch):
+        single_rows, single_scores = search_embeddings(
+            clustered_embeddings, query, 5, min_score=0.5
+        )
+        np.testing.assert_array_equal(rows, single_rows)
+        np.testing.assert_allclose(scores, single_scores, rtol=1e-5)
+
+
+def test_subset_search_only_returns_subset_rows(clustered_embeddings):
+    """With a row subset, results come from the subset and match exact scoring."""
+    query = clustered_embeddings.data[0]
+    subset = np.arange(100, 3000, 7, dtype=np.int64)
+
+    rows, scores = search_embeddings(clustered_embeddings, query, 5, subset=subset)
+    exact = clustered_embeddings.data[subset] @ query
+
+    assert set(rows) <= set(subset)
+    np.testing.assert_allclose(scores, np.sort(exact)[::-1][:5], rtol=1e-5)
+    (batch_rows, _), = search_embeddings_batch(
+        clustered_embeddings, query[None, :], 5, subset=subset
+    )
+    np.testing.assert_array_equal(batch_rows, rows)